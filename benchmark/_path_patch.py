@@ -0,0 +1,7 @@
+# Adds the pipelayer source to the path, so benchmarks run against the working tree
+import os
+import sys
+from pathlib import Path
+
+project_root = Path(os.path.abspath(__file__)).parents[1]
+sys.path.insert(0, f"{project_root}/src")
@@ -0,0 +1,18 @@
+import timeit
+from typing import Callable
+
+
+def measure(func: Callable[[], object], number: int = 100_000, repeat: int = 5) -> float:
+    """
+    Returns the best time per call in nanoseconds.
+    """
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e9
+
+
+def report(name: str, baseline_ns: float, optimized_ns: float) -> None:
+    print(f"{name:<40} {baseline_ns:>10.0f} ns {optimized_ns:>10.0f} ns {baseline_ns / optimized_ns:>7.1f}x")
+
+
+def header(title: str) -> None:
+    print(f"\n{title}")
+    print(f"{'':<40} {'baseline':>13} {'optimized':>13} {'speedup':>8}")
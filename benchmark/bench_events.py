@@ -0,0 +1,64 @@
+"""
+Measures the event overhead of a filter without handlers, against the previous raise_events.
+
+    python benchmark/bench_events.py
+"""
+import _path_patch  # NOQA F401
+
+from _timer import header, measure, report
+from pipelayer import Action, Filter, FilterEventArgs, State
+from pipelayer.filter import _parse_filter_event_args, raise_events
+
+
+def previous_raise_events(func):
+    def wrapper(*args, **kwargs):
+        filter, data, context = _parse_filter_event_args(*args, **kwargs)
+
+        evt_args = FilterEventArgs(data, context, State.RUNNING)
+        [e(filter, evt_args) for e in filter.start]
+
+        if evt_args.action in (Action.EXIT, Action.SKIP):
+            return evt_args.data
+
+        data = func(*args, **kwargs)
+
+        evt_args = FilterEventArgs(data, context, State.COMPLETING)
+        [e(filter, evt_args) for e in filter.end]
+
+        if evt_args.action is Action.EXIT:
+            return evt_args.data
+
+        return data
+    return wrapper
+
+
+class PlainFilter(Filter):
+    def run(self, data, context):
+        return data
+
+
+class PreviousFilter(Filter):
+    @previous_raise_events
+    def run(self, data, context):
+        return data
+
+
+class EventFilter(Filter):
+    @raise_events
+    def run(self, data, context):
+        return data
+
+
+def main() -> None:
+    plain, previous, events = PlainFilter(), PreviousFilter(), EventFilter()
+
+    header("Filter without handlers")
+    undecorated = measure(lambda: plain.run(1, None))
+    baseline = measure(lambda: previous.run(1, None))
+    optimized = measure(lambda: events.run(1, None))
+    report("@raise_events", baseline, optimized)
+    report("overhead", baseline - undecorated, max(optimized - undecorated, 1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Compares Pipeline.run() against a frozen pipeline.
+
+    python benchmark/bench_freeze.py
+"""
+import _path_patch  # NOQA F401
+
+from _timer import header, measure, report
+from pipelayer import Filter, Pipeline, Switch
+
+
+class Increment(Filter):
+    def run(self, data, context):
+        return data + 1
+
+
+def double(data, context):
+    return data * 2
+
+
+def create_pipeline() -> Pipeline:
+    return Pipeline([
+        Increment(),
+        double,
+        Pipeline([Increment(), double], "Inner"),
+        Switch(lambda d, c: d % 2, {0: double, 1: Increment()}),
+    ])
+
+
+def main() -> None:
+    pipeline = create_pipeline()
+    traced = pipeline.freeze()
+    untraced = pipeline.freeze(trace=False)
+
+    header("Frozen pipeline")
+    baseline = measure(lambda: pipeline.run(1), number=10_000)
+    report("freeze()", baseline, measure(lambda: traced.run(1), number=10_000))
+    report("freeze(trace=False)", baseline, measure(lambda: untraced.run(1), number=10_000))
+
+
+if __name__ == "__main__":
+    main()
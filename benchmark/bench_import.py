@@ -0,0 +1,55 @@
+"""
+Measures the cold-start import time of pipelayer with python -X importtime,
+and exits with an error if an import is over its budget.
+
+    python benchmark/bench_import.py
+"""
+import _path_patch  # NOQA F401
+
+import os
+import subprocess
+import sys
+from typing import Dict
+
+# Budgets in milliseconds, for the cumulative import time of the statement
+BUDGETS: Dict[str, float] = {
+    "import pipelayer": 25,
+    "from pipelayer import Filter": 40,
+    "from pipelayer import Pipeline": 60,
+}
+
+
+def import_time_ms(statement: str, repeat: int = 5) -> float:
+    """
+    Returns the best total of the cumulative import times of pipelayer modules
+    imported at the top level, in milliseconds.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    times = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", statement],
+            env=env, capture_output=True, text=True, check=True
+        )
+        total_us = 0
+        for line in result.stderr.splitlines()[1:]:
+            _, cumulative_us, name = line.split("|")
+            # Nested imports are indented
+            if name[1:].split(".")[0] == "pipelayer":
+                total_us += int(cumulative_us)
+        times.append(total_us / 1000)
+    return min(times)
+
+
+def main() -> None:
+    print(f"\n{'':<40} {'import':>13} {'budget':>13}")
+    over_budget = False
+    for statement, budget in BUDGETS.items():
+        ms = import_time_ms(statement)
+        over_budget = over_budget or ms > budget
+        print(f"{statement:<40} {ms:>10.1f} ms {budget:>10.1f} ms {'' if ms <= budget else 'OVER BUDGET'}")
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
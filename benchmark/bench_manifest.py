@@ -0,0 +1,45 @@
+"""
+Measures the cost of recording the manifest of a 20 step pipeline, against creating
+a pydantic Manifest for each step.
+
+    python benchmark/bench_manifest.py
+"""
+import _path_patch  # NOQA F401
+
+from _timer import header, measure, report
+from pipelayer import Pipeline, StepType
+from pipelayer.manifest import close_manifest, create_manifest
+from pipelayer.tracing import OFF
+
+STEPS = 20
+
+
+def step(data, context):
+    return data
+
+
+def run_with_manifests(pipeline: Pipeline) -> None:
+    """
+    An untraced run plus the manifests the previous runner created.
+    """
+    pipeline.run(1)
+    manifest = create_manifest(pipeline.name, StepType.PIPELINE)
+    for _ in range(STEPS):
+        s_manifest = create_manifest("step", StepType.FUNCTION)
+        close_manifest(s_manifest)
+        manifest.steps.append(s_manifest)
+    close_manifest(manifest)
+
+
+def main() -> None:
+    untraced = Pipeline([step] * STEPS, tracing=OFF)
+    traced = Pipeline([step] * STEPS)
+
+    header(f"Pipeline of {STEPS} steps")
+    baseline = measure(lambda: run_with_manifests(untraced), number=10_000)
+    report("run", baseline, measure(lambda: traced.run(1), number=10_000))
+    report("run and read manifest", baseline, measure(lambda: traced.execute(1).manifest, number=10_000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Compares running nested pipelines as steps against running them inlined into the parent's plan.
+
+    python benchmark/bench_nested_pipeline.py
+"""
+import _path_patch  # NOQA F401
+
+from _timer import header, measure, report
+from pipelayer import Filter, Pipeline
+
+
+class Increment(Filter):
+    def run(self, data, context):
+        return data + 1
+
+
+def do_nothing(sender, args) -> None:
+    pass
+
+
+def create_pipeline(depth: int, inline: bool) -> Pipeline:
+    pipeline = Pipeline([Increment()])
+    for _ in range(depth):
+        if not inline:
+            pipeline.start += do_nothing
+        pipeline = Pipeline([pipeline, Increment()])
+    return pipeline
+
+
+def main() -> None:
+    header("Nested pipelines")
+    for depth in [1, 3, 5]:
+        nested = create_pipeline(depth, inline=False)
+        inlined = create_pipeline(depth, inline=True)
+        report(
+            f"depth {depth}",
+            measure(lambda: nested.run(0), number=5_000),
+            measure(lambda: inlined.run(0), number=5_000)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Compares a Parallel step against a pipeline that makes the same lookups one after another.
+
+    python benchmark/bench_parallel.py
+"""
+import _path_patch  # NOQA F401
+
+import time
+
+from _timer import header, measure, report
+from pipelayer import Parallel, Pipeline
+
+LOOKUPS = 4
+
+
+def lookup(data, context):
+    time.sleep(0.002)
+    return data
+
+
+def merge(outputs, context):
+    return outputs[0]
+
+
+def step(data, context):
+    return data
+
+
+def main() -> None:
+    header(f"{LOOKUPS} lookups of 2 ms")
+    report(
+        "run",
+        measure(lambda: Pipeline([lookup] * LOOKUPS).run(1), number=20),
+        measure(lambda: Pipeline([Parallel([lookup] * LOOKUPS, merge)]).run(1), number=20)
+    )
+
+    header(f"{LOOKUPS} steps without I/O (overhead)")
+    report(
+        "run",
+        measure(lambda: Pipeline([step] * LOOKUPS).run(1), number=2_000),
+        measure(lambda: Pipeline([Parallel([step] * LOOKUPS, merge)]).run(1), number=2_000)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Compares CPU-bound steps run in threads by a Parallel step, where they contend for the GIL,
+against the same steps run in a process pool with InProcess.
+
+    python benchmark/bench_process.py
+"""
+import _path_patch  # NOQA F401
+
+from concurrent.futures import ProcessPoolExecutor
+
+from _timer import header, measure, report
+from pipelayer import InProcess, Parallel
+
+BRANCHES = 4
+
+
+def parse(data, context):
+    return sum(int(str(i)) for i in range(data))
+
+
+def main() -> None:
+    with ProcessPoolExecutor(BRANCHES) as executor:
+        threads = Parallel([parse] * BRANCHES)
+        processes = Parallel([InProcess(parse, executor) for _ in range(BRANCHES)])
+        processes.run(1)
+
+        header(f"{BRANCHES} CPU-bound branches")
+        report(
+            "run",
+            measure(lambda: threads.run(200_000), number=5),
+            measure(lambda: processes.run(200_000), number=5)
+        )
+
+
+if __name__ == "__main__":
+    main()
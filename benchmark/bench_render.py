@@ -0,0 +1,46 @@
+"""
+Measures rendering the manifest of a pipeline with thousands of steps,
+against the previous render_manifest, which round-tripped the manifest through json.
+
+    python benchmark/bench_render.py
+"""
+import _path_patch  # NOQA F401
+
+import json
+from io import StringIO
+
+from _timer import header, measure, report
+from pipelayer import Pipeline, util
+from pipelayer.manifest import Manifest
+
+STEPS = 5_000
+
+
+def step(data, context):
+    return data
+
+
+def previous_render_manifest(manifest: Manifest, indent: int = 2) -> str:
+    return json.dumps(json.loads(manifest.json(exclude_none=True)), indent=indent)
+
+
+def main() -> None:
+    inner = Pipeline([step] * 10, "Inner")
+    inner.start += lambda sender, args: None
+    manifest = Pipeline([inner] * (STEPS // 11)).execute().manifest
+    orjson = util.orjson
+
+    header(f"Manifest of {STEPS} steps")
+    baseline = measure(lambda: previous_render_manifest(manifest), number=10)
+    report("render_manifest", baseline, measure(lambda: util.render_manifest(manifest), number=10))
+    compact = measure(lambda: util.render_manifest(manifest, compact=True), number=10)
+    report("render_manifest compact", baseline, compact)
+    report("write_manifest", baseline, measure(lambda: util.write_manifest(manifest, StringIO()), number=10))
+
+    util.orjson = None
+    report("render_manifest without orjson", baseline, measure(lambda: util.render_manifest(manifest), number=10))
+    util.orjson = orjson
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Compares a Router against nested Switches that route on the same fields.
+
+    python benchmark/bench_router.py
+"""
+import _path_patch  # NOQA F401
+
+from _timer import header, measure, report
+from pipelayer import Context, Router, Rule, Switch
+
+COUNTRIES = [f"C{i}" for i in range(20)]
+TIERS = ["gold", "silver", "bronze"]
+TYPES = ["json", "xml"]
+
+
+def route(data, context):
+    return data
+
+
+def create_switch() -> Switch:
+    return Switch(lambda d, c: d["country"], {
+        country: Switch(lambda d, c: d["tier"], {
+            tier: Switch(lambda d, c: d["type"], {payload: route for payload in TYPES})
+            for tier in TIERS
+        })
+        for country in COUNTRIES
+    })
+
+
+def create_router() -> Router:
+    return Router([
+        Rule({"country": country, "tier": tier, "type": payload}, route)
+        for country in COUNTRIES for tier in TIERS for payload in TYPES
+    ])
+
+
+def main() -> None:
+    context = Context()
+    record = {"country": COUNTRIES[-1], "tier": TIERS[-1], "type": TYPES[-1]}
+    switch, router = create_switch(), create_router()
+
+    header(f"Routing on 3 fields, {len(router.rules)} rules")
+    report("run", measure(lambda: switch.run(record, context), number=2_000),
+           measure(lambda: router.run(record, context), number=2_000))
+
+
+if __name__ == "__main__":
+    main()
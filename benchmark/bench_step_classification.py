@@ -0,0 +1,53 @@
+"""
+Compares step classification against the runtime_checkable protocol checks it replaces.
+
+    python benchmark/bench_step_classification.py
+"""
+import _path_patch  # NOQA F401
+
+from _timer import header, measure, report
+from pipelayer import Filter, Pipeline, StepType
+from pipelayer.protocol import ICompoundStep, IFilter, IStep
+from pipelayer.step import classify_step
+
+
+class MyFilter(Filter):
+    def run(self, data, context):
+        return data
+
+
+def my_function(data, context):
+    return data
+
+
+def protocol_kind(obj: object) -> tuple:
+    is_step = isinstance(obj, IStep)
+    step_type = StepType.FILTER if is_step else StepType.FUNCTION
+    return step_type, is_step, isinstance(obj, IFilter), isinstance(obj, ICompoundStep)
+
+
+def exception_contains(item: object) -> bool:
+    try:
+        StepType(item)
+    except ValueError:
+        return False
+    else:
+        return True
+
+
+def main() -> None:
+    header("Step classification")
+    for name, obj in [
+        ("Filter", MyFilter()),
+        ("Pipeline", Pipeline([])),
+        ("function", my_function),
+    ]:
+        report(name, measure(lambda: protocol_kind(obj)), measure(lambda: classify_step(obj)))
+
+    header("StepType membership")
+    for item in ["Pipeline", "MyFilter"]:
+        report(f"'{item}' in StepType", measure(lambda: exception_contains(item)), measure(lambda: item in StepType))
+
+
+if __name__ == "__main__":
+    main()
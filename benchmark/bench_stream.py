@@ -0,0 +1,65 @@
+"""
+Compares streaming records through a pipeline against running it once per record.
+
+    python benchmark/bench_stream.py
+"""
+import _path_patch  # NOQA F401
+
+import time
+
+from _timer import header, measure, report
+from pipelayer import Pipeline
+
+RECORDS = 50
+
+
+def fetch(data, context):
+    time.sleep(0.001)
+    return data
+
+
+def transform(data, context):
+    return sum(range(data % 100))
+
+
+def store(data, context):
+    time.sleep(0.001)
+    return data
+
+
+def step(data, context):
+    return data
+
+
+def run_each(pipeline: Pipeline) -> None:
+    for record in range(RECORDS):
+        pipeline.run(record)
+
+
+def main() -> None:
+    pipeline = Pipeline([fetch, transform, store])
+
+    header(f"{RECORDS} records, 1 ms fetch and store")
+    report(
+        "stream",
+        measure(lambda: run_each(pipeline), number=5),
+        measure(lambda: list(pipeline.stream(range(RECORDS))), number=5)
+    )
+    report(
+        "stream, 4 fetch and store workers",
+        measure(lambda: run_each(pipeline), number=5),
+        measure(lambda: list(pipeline.stream(range(RECORDS), workers=(4, 1, 4))), number=5)
+    )
+
+    pipeline = Pipeline([step, step, step])
+
+    header(f"{RECORDS} records of steps without I/O (overhead)")
+    report(
+        "stream",
+        measure(lambda: run_each(pipeline), number=50),
+        measure(lambda: list(pipeline.stream(range(RECORDS))), number=50)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Compares Switch dispatch against evaluating the expression once per case label.
+
+    python benchmark/bench_switch.py
+"""
+import _path_patch  # NOQA F401
+
+from _timer import header, measure, report
+from pipelayer import Context, Switch
+from pipelayer.case import Interval
+from pipelayer.step import get_step, get_step_func
+
+
+def expression(data, context):
+    return data
+
+
+def case(data, context):
+    return data
+
+
+def previous_select(switch: Switch, data, context):
+    expr_func = get_step_func(get_step(switch.expression))
+    label = next((label for label in switch.cases if label == expr_func(data, context)), None)
+    return switch.cases.get(label)
+
+
+def main() -> None:
+    context = Context()
+
+    header("Switch case selection")
+    for count in [5, 50, 500]:
+        switch = Switch(expression, {label: case for label in range(count)})
+        last = count - 1
+        report(
+            f"{count} cases, last label",
+            measure(lambda: previous_select(switch, last, context), number=1_000),
+            measure(lambda: switch._select_case(last, context), number=1_000)
+        )
+
+    header("Interval cases")
+    for count in [5, 50, 500]:
+        intervals = [Interval(i * 10, i * 10 + 10) for i in range(count)]
+        switch = Switch(expression, {interval: case for interval in intervals})
+        last = count * 10 - 1
+        report(
+            f"{count} intervals, last interval",
+            measure(lambda: next(i for i in intervals if last in i), number=1_000),
+            measure(lambda: switch._select_case(last, context), number=1_000)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Compares sending a 64 MB buffer to and from a process step pickled with the data,
+against sending it through shared memory with SharedMemoryTransport.
+
+    python benchmark/bench_transport.py
+"""
+import _path_patch  # NOQA F401
+
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+from _timer import header, measure, report
+from pipelayer import InProcess
+from pipelayer.transport import SharedMemoryTransport
+
+SIZE = 64 << 20
+
+
+def echo(data, context):
+    return data
+
+
+def echo_buffer(data, context):
+    return pickle.PickleBuffer(data)
+
+
+def main() -> None:
+    data = bytes(SIZE)
+    with ProcessPoolExecutor(1) as executor:
+        pickled = InProcess(echo, executor)
+        shared = InProcess(echo_buffer, executor, transport=SharedMemoryTransport())
+
+        header(f"Round trip of {SIZE >> 20} MB")
+        report(
+            "run",
+            measure(lambda: pickled.run(data), number=5),
+            measure(lambda: shared.run(pickle.PickleBuffer(data)), number=5)
+        )
+
+
+if __name__ == "__main__":
+    main()
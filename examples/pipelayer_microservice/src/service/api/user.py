@@ -1,6 +1,6 @@
 import json
 
-from pipelayer import Manifest
+from pipelayer import Execution
 from service.access_control import authorize
 from service.api import handle_exception
 from service.config import app_settings_factory
@@ -18,19 +18,23 @@ settings: AppSettings = app_settings_factory.create(AppSettingsProvider("dev"))
 context = AppContext(settings)
 user_provider = ResReqUserProvider
 
+# Pipelines are built once and shared by all requests
+user_pipeline = get_user_pipeline(user_provider)
+users_pipeline = get_users_pipeline(user_provider)
+find_pipeline = find_users_pipeline(context.settings.user_provider)
 
-def get_response(model: DomainModel, manifest: Manifest) -> dict:
+
+def get_response(execution: Execution) -> dict:
+    model: DomainModel = execution.data
     model = model.__root__ if hasattr(model, "__root__") else model
-    resp_model = Response(data=model, manifest=manifest)
+    resp_model = Response(data=model, manifest=execution.manifest)
     return json.loads(resp_model.json(by_alias=True))
 
 
 @authorize
 def get(**kwargs) -> dict:
     try:
-        pipeline = get_user_pipeline(user_provider)
-        user = pipeline.run(kwargs, context)
-        return get_response(user, pipeline.manifest)
+        return get_response(user_pipeline.execute(kwargs, context))
     except Exception as e:
         return handle_exception(e)
 
@@ -38,9 +42,7 @@ def get(**kwargs) -> dict:
 @authorize
 def get_users(**kwargs) -> dict:
     try:
-        pipeline = get_users_pipeline(user_provider)
-        users = pipeline.run(kwargs, context)
-        return get_response(users, pipeline.manifest)
+        return get_response(users_pipeline.execute(kwargs, context))
     except Exception as e:
         return handle_exception(e)
 
@@ -48,8 +50,6 @@ def get_users(**kwargs) -> dict:
 @authorize
 def find_users(**kwargs) -> dict:
     try:
-        pipeline = find_users_pipeline(context.settings.user_provider)
-        users = pipeline.run(kwargs, context)
-        return get_response(users, pipeline.manifest)
+        return get_response(find_pipeline.execute(kwargs, context))
     except Exception as e:
         return handle_exception(e)
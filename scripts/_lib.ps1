@@ -323,3 +323,16 @@ function Publish_Package {
         throw
     }
 }
+
+function Run_Benchmarks {
+    try {
+        Write_Banner "Run Benchmarks"
+        Get-ChildItem -Path benchmark -Filter bench_*.py | ForEach-Object {
+            Execute_Command "python" $_.FullName
+        }
+    }
+    catch {
+        Write-Host "*** Run Benchmarks Failed ***"
+        throw
+    }
+}
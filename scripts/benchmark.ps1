@@ -0,0 +1,3 @@
+. .\scripts\_lib.ps1
+
+Run_Benchmarks
@@ -1,8 +1,64 @@
-from pipelayer.context import Context  # NOQA F401
-from pipelayer.enum import Action, State, StepType  # NOQA F401
-from pipelayer.event_args import FilterEventArgs  # NOQA F401
-from pipelayer.event_args import PipelineEventArgs  # NOQA F401
-from pipelayer.filter import Filter  # NOQA F401
-from pipelayer.manifest import Manifest  # NOQA F401
-from pipelayer.pipeline import Pipeline  # NOQA F401
-from pipelayer.switch import Switch  # NOQA F401
+"""
+Names are imported from their modules when first used, so importing pipelayer
+doesn't load pydantic until a feature that needs it is used.
+"""
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pipelayer.context import Context  # NOQA F401
+    from pipelayer.enum import Action, ExecutorKind, Scope  # NOQA F401
+    from pipelayer.enum import State, StepType  # NOQA F401
+    from pipelayer.event_args import FilterEventArgs  # NOQA F401
+    from pipelayer.event_args import PipelineEventArgs  # NOQA F401
+    from pipelayer.execution import Execution  # NOQA F401
+    from pipelayer.executor import Executors, InExecutor  # NOQA F401
+    from pipelayer.executor import runs_in  # NOQA F401
+    from pipelayer.filter import Filter  # NOQA F401
+    from pipelayer.lifecycle import Scoped  # NOQA F401
+    from pipelayer.manifest import Manifest  # NOQA F401
+    from pipelayer.parallel import Parallel  # NOQA F401
+    from pipelayer.pipeline import Pipeline  # NOQA F401
+    from pipelayer.process import InProcess  # NOQA F401
+    from pipelayer.router import Router, Rule  # NOQA F401
+    from pipelayer.switch import Switch  # NOQA F401
+
+
+_exports = {
+    "Context": "pipelayer.context",
+    "Action": "pipelayer.enum",
+    "ExecutorKind": "pipelayer.enum",
+    "Scope": "pipelayer.enum",
+    "State": "pipelayer.enum",
+    "StepType": "pipelayer.enum",
+    "FilterEventArgs": "pipelayer.event_args",
+    "PipelineEventArgs": "pipelayer.event_args",
+    "Execution": "pipelayer.execution",
+    "Executors": "pipelayer.executor",
+    "InExecutor": "pipelayer.executor",
+    "runs_in": "pipelayer.executor",
+    "Filter": "pipelayer.filter",
+    "Scoped": "pipelayer.lifecycle",
+    "Manifest": "pipelayer.manifest",
+    "Parallel": "pipelayer.parallel",
+    "Pipeline": "pipelayer.pipeline",
+    "InProcess": "pipelayer.process",
+    "Router": "pipelayer.router",
+    "Rule": "pipelayer.router",
+    "Switch": "pipelayer.switch",
+}
+
+__all__ = list(_exports)
+
+
+def __getattr__(name: str) -> Any:
+    module = _exports.get(name)
+    if module is None:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(__all__)
@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+from bisect import bisect_right
+from enum import Enum
+from typing import (Any, Callable, Dict, List, Mapping, Optional, Sequence,
+                    Tuple, Union)
+
+from pipelayer.context import Context
+from pipelayer.enum import StepType
+from pipelayer.executor import run_step_async
+from pipelayer.filter import subscribe
+from pipelayer.plan import PlanStep, compile_step
+from pipelayer.protocol import FilterEventHandlerT, IStep, PipelineCallableT
+from pipelayer.recorder import Recorder
+from pipelayer.tracing import end_trace, start_untraced
+
+# Labels of these types compare equal only to values with the same hash
+_HASHABLE_TYPES = (str, int, float, complex, bytes, bool, type(None), Enum)
+
+
+# region Labels
+
+class Labels:
+    """
+    A case label that matches any of several labels, e.g. Labels("GB", "IE").
+    """
+    __slots__ = ("__labels",)
+
+    def __init__(self, *labels: Any) -> None:
+        self.__labels = labels
+
+    @property
+    def labels(self) -> Tuple[Any, ...]:
+        return self.__labels
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Labels) and self.__labels == other.labels
+
+    def __hash__(self) -> int:
+        return hash((Labels, self.__labels))
+
+    def __repr__(self) -> str:
+        return f"Labels{self.__labels!r}"
+
+
+class Interval:
+    """
+    A case label that matches values from low up to, but not including, high.
+    A bound of None is unbounded, e.g. Interval(90, None) matches values of 90 and above.
+    The intervals of a Switch can't overlap.
+    """
+    __slots__ = ("__low", "__high")
+
+    def __init__(self, low: Any, high: Any) -> None:
+        if low is not None and high is not None and not low < high:
+            raise ValueError(f"The low bound of an interval must be less than the high bound: {low!r}, {high!r}")
+        self.__low = low
+        self.__high = high
+
+    @property
+    def low(self) -> Any:
+        return self.__low
+
+    @property
+    def high(self) -> Any:
+        return self.__high
+
+    def __contains__(self, value: Any) -> bool:
+        return (self.__low is None or self.__low <= value) and (self.__high is None or value < self.__high)
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Interval) and (self.__low, self.__high) == (other.low, other.high)
+
+    def __hash__(self) -> int:
+        return hash((Interval, self.__low, self.__high))
+
+    def __repr__(self) -> str:
+        return f"Interval({self.__low!r}, {self.__high!r})"
+
+
+class Predicate:
+    """
+    A case label that matches values the function returns True for.
+    Predicates are tried in order, after the other labels.
+    """
+    __slots__ = ("__func",)
+
+    def __init__(self, func: Callable[[Any], bool]) -> None:
+        self.__func = func
+
+    @property
+    def func(self) -> Callable[[Any], bool]:
+        return self.__func
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Predicate) and self.__func == other.func
+
+    def __hash__(self) -> int:
+        return hash((Predicate, self.__func))
+
+    def __repr__(self) -> str:
+        return f"Predicate({self.__func!r})"
+
+# endregion
+
+
+class IntervalIndex:
+    """
+    Finds the interval that contains a value with a binary search of the low bounds.
+    """
+    __slots__ = ("__lows", "__intervals", "__unbounded")
+
+    def __init__(self, intervals: Sequence[Tuple[Interval, PlanStep]]) -> None:
+        unbounded = [item for item in intervals if item[0].low is None]
+        bounded = sorted((item for item in intervals if item[0].low is not None), key=lambda item: item[0].low)
+        if len(unbounded) > 1:
+            raise ValueError(f"Interval cases overlap: {unbounded[0][0]!r}, {unbounded[1][0]!r}")
+
+        ordered = unbounded + bounded
+        for (previous, _), (interval, _) in zip(ordered, ordered[1:]):
+            if previous.high is None or interval.low < previous.high:
+                raise ValueError(f"Interval cases overlap: {previous!r}, {interval!r}")
+
+        self.__lows = [interval.low for interval, _ in bounded]
+        self.__intervals = bounded
+        self.__unbounded = unbounded[0] if unbounded else None
+
+    def __len__(self) -> int:
+        return len(self.__intervals) + (self.__unbounded is not None)
+
+    def get(self, value: Any) -> Optional[PlanStep]:
+        try:
+            index = bisect_right(self.__lows, value) - 1
+            interval, case = self.__intervals[index] if index >= 0 else self.__unbounded or (None, None)
+            return case if interval is not None and (interval.high is None or value < interval.high) else None
+        except TypeError:
+            # The value can't be compared with the bounds
+            return None
+
+
+class CaseTable:
+    """
+    The precompiled expression and cases of a Switch.
+    The expression is evaluated once per run, and its value is looked up by hash,
+    then in the interval index. Labels of other types, which may define their own
+    equality, are compared in order when those miss, as are all labels when the
+    value can't be hashed. Predicates are tried last.
+    """
+    __slots__ = ("__expression", "__cases", "__intervals", "__compared", "__labels", "__predicates", "__default")
+
+    def __init__(self, expression: PlanStep, cases: Mapping[Any, PlanStep], default: Optional[PlanStep]) -> None:
+        self.__expression = expression
+        self.__cases: Dict[Any, PlanStep] = {}
+        self.__compared: List[Tuple[Any, PlanStep]] = []
+        self.__default = default
+
+        labels: List[Tuple[Any, PlanStep]] = []
+        intervals: List[Tuple[Interval, PlanStep]] = []
+        predicates: List[Tuple[Callable[[Any], bool], PlanStep]] = []
+        for label, case in cases.items():
+            if isinstance(label, Interval):
+                intervals.append((label, case))
+            elif isinstance(label, Predicate):
+                predicates.append((label.func, case))
+            elif isinstance(label, Labels):
+                labels.extend((item, case) for item in label.labels)
+            else:
+                labels.append((label, case))
+
+        for label, case in labels:
+            if _is_hashable(label):
+                self.__cases.setdefault(label, case)
+            if not _is_hashable_type(label):
+                self.__compared.append((label, case))
+
+        self.__labels = tuple(labels)
+        self.__intervals = IntervalIndex(intervals) if intervals else None
+        self.__predicates = tuple(predicates)
+
+    @property
+    def expression(self) -> PlanStep:
+        return self.__expression
+
+    @property
+    def default(self) -> Optional[PlanStep]:
+        return self.__default
+
+    def evaluate(self, data: Any, context: Context) -> Any:
+        expression = self.__expression
+        step, func = expression.bind()
+        try:
+            return func(data, context)
+        finally:
+            expression.release(step)
+
+    def get(self, value: Any) -> Optional[PlanStep]:
+        """
+        Returns the case for the value, or the default case.
+        """
+        try:
+            case = self.__cases.get(value)
+            compared: Sequence[Tuple[Any, PlanStep]] = self.__compared
+        except TypeError:
+            case = None
+            compared = self.__labels
+
+        if case is None and self.__intervals is not None:
+            case = self.__intervals.get(value)
+
+        if case is None and compared:
+            case = next((c for label, c in compared if label == value), None)
+
+        if case is None and self.__predicates:
+            case = next((c for predicate, c in self.__predicates if predicate(value)), None)
+
+        return case or self.__default
+
+    def select(self, data: Any, context: Context) -> Optional[PlanStep]:
+        if self.__expression.is_async:
+            raise TypeError(f"The expression '{self.__expression.name}' is a coroutine, so it must be run with arun()")
+        return self.get(self.evaluate(data, context))
+
+    async def aselect(self, data: Any, context: Context) -> Optional[PlanStep]:
+        """
+        Selects the case from a coroutine. The expression can be a coroutine function.
+        """
+        expression = self.__expression
+        step, func = expression.bind()
+        try:
+            value = await run_step_async(expression, step, func, data, context)
+        finally:
+            expression.release(step)
+        return self.get(value)
+
+
+def compile_cases(
+    expression: Union[IStep, PipelineCallableT],
+    cases: Mapping[Any, Union[IStep, PipelineCallableT]],
+    default: Optional[Union[IStep, PipelineCallableT]] = None
+) -> CaseTable:
+    return CaseTable(
+        compile_step(expression),
+        {label: compile_step(case) for label, case in cases.items() if case},
+        compile_step(default) if default else None
+    )
+
+
+def record_case(recorder: Recorder, case: Optional[PlanStep], parent: int) -> int:
+    if case is None:
+        return recorder.open("Default", StepType.UNDEFINED, parent)
+    return recorder.open(case.name, case.step_type, parent)
+
+
+def run_case(
+    case: PlanStep,
+    data: Any,
+    context: Context,
+    recorder: Optional[Recorder],
+    index: int,
+    exit_handler: Optional[FilterEventHandlerT] = None
+) -> Any:
+    """
+    Runs a case. Compound steps record their steps under the case at index.
+    The exit handler is subscribed to filter cases while they run.
+    """
+    if case.is_async:
+        raise TypeError(f"The case '{case.name}' is a coroutine, so it must be run with arun()")
+    step, func = case.bind()
+    try:
+        if exit_handler is None or not case.is_filter:
+            return _call_case(case, func, data, context, recorder, index)
+        with subscribe(step.exit, exit_handler):
+            return _call_case(case, func, data, context, recorder, index)
+    finally:
+        case.release(step)
+
+
+async def arun_case(
+    case: PlanStep,
+    data: Any,
+    context: Context,
+    recorder: Optional[Recorder],
+    index: int,
+    exit_handler: Optional[FilterEventHandlerT] = None
+) -> Any:
+    """
+    Runs a case from a coroutine. Compound steps record their steps under the case at index.
+    """
+    step, func = case.bind()
+    try:
+        if exit_handler is None or not case.is_filter:
+            return await _acall_case(case, step, func, data, context, recorder, index)
+        with subscribe(step.exit, exit_handler):
+            return await _acall_case(case, step, func, data, context, recorder, index)
+    finally:
+        case.release(step)
+
+
+def _call_case(
+    case: PlanStep, func: Callable[..., Any], data: Any, context: Context, recorder: Optional[Recorder], index: int
+) -> Any:
+    if not case.is_compound:
+        return func(data, context)
+    if recorder is None:
+        token = start_untraced()
+        try:
+            return func(data, context)[0]
+        finally:
+            end_trace(token)
+    recorder.begin_compound(index)
+    data, manifest = func(data, context)
+    recorder.end_compound(index, manifest)
+    return data
+
+
+async def _acall_case(
+    case: PlanStep,
+    step: Any,
+    func: Callable[..., Any],
+    data: Any,
+    context: Context,
+    recorder: Optional[Recorder],
+    index: int
+) -> Any:
+    if not case.is_compound:
+        return await run_step_async(case, step, func, data, context, recorder, index)
+    if recorder is None:
+        token = start_untraced()
+        try:
+            return (await run_step_async(case, step, func, data, context, recorder, index))[0]
+        finally:
+            end_trace(token)
+    recorder.begin_compound(index)
+    data, manifest = await run_step_async(case, step, func, data, context, recorder, index)
+    recorder.end_compound(index, manifest)
+    return data
+
+
+def _is_hashable_type(label: Any) -> bool:
+    if isinstance(label, (tuple, frozenset)):
+        return all(map(_is_hashable_type, label))
+    return isinstance(label, _HASHABLE_TYPES)
+
+
+def _is_hashable(label: Any) -> bool:
+    try:
+        hash(label)
+    except TypeError:
+        return False
+    return True
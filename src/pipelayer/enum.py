@@ -4,12 +4,13 @@ from typing import Any
 
 class EnumContains(EnumMeta):
     def __contains__(cls, item: Any) -> bool:
-        try:
-            cls(item)
-        except ValueError:
-            return False
-        else:
+        if isinstance(item, cls):
             return True
+        try:
+            return item in cls._value2member_map_
+        except TypeError:
+            # Unhashable values can't be in the value map, but may still equal a member's value
+            return any(member.value == item for member in cls)  # type: ignore
 
 
 class Event(Enum, metaclass=EnumContains):
@@ -34,6 +35,27 @@ class Action(Enum, metaclass=EnumContains):
 class StepType(Enum, metaclass=EnumContains):
     PIPELINE = "Pipeline"
     SWITCH = "Switch"
+    ROUTER = "Router"
+    PARALLEL = "Parallel"
     FILTER = "Filter"
     FUNCTION = "Function"
     UNDEFINED = "Undefined"
+
+
+class Scope(Enum, metaclass=EnumContains):
+    SINGLETON = "singleton"  # ONE INSTANCE PER PIPELINE
+    THREAD = "thread"        # ONE INSTANCE PER THREAD
+    RUN = "run"              # A NEW INSTANCE FOR EACH RUN
+    POOLED = "pooled"        # INSTANCES ARE BORROWED FROM A POOL FOR A RUN
+
+
+class ExecutorKind(Enum, metaclass=EnumContains):
+    IO = "io"          # A SHARED THREAD POOL
+    CPU = "cpu"        # A SHARED PROCESS POOL
+    INLINE = "inline"  # THE CALLING THREAD
+
+
+class TraceLevel(Enum, metaclass=EnumContains):
+    OFF = "off"          # NO MANIFESTS
+    SAMPLED = "sampled"  # MANIFESTS FOR A SAMPLE OF RUNS
+    FULL = "full"        # MANIFESTS FOR EVERY RUN
@@ -1,25 +1,32 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import TYPE_CHECKING, Any, Optional, Union
 
 from pipelayer.context import Context
 from pipelayer.enum import Action, State
-from pipelayer.manifest import Manifest
+from pipelayer.recorder import Record, materialize
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pipelayer.manifest import Manifest
 
 
 class PipelineEventArgs:
+    __slots__ = ("data", "__manifest_entry")
+
     def __init__(
-        self, data: Any, manifest_entry: Manifest
+        self, data: Any, manifest_entry: Union[Manifest, Record, None]
     ) -> None:
         self.data: Any = data
-        self.__manifest_entry: Manifest = manifest_entry
+        self.__manifest_entry = manifest_entry
 
     @property
-    def manifest_entry(self) -> Manifest:
-        return self.__manifest_entry
+    def manifest_entry(self) -> Optional[Manifest]:
+        return materialize(self.__manifest_entry)
 
 
 class FilterEventArgs:
+    __slots__ = ("data", "__context", "state", "action")
+
     def __init__(
         self, data: Any, context: Context, state: State
     ) -> None:
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Optional, Union
+
+from pipelayer.recorder import Record, materialize
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pipelayer.manifest import Manifest
+
+
+class Execution:
+    """
+    The state of a single run of a Pipeline or Switch.
+    Run state is kept here, rather than on the step, so one step can be run concurrently.
+    """
+    __slots__ = ("data", "__manifest", "exiting")
+
+    def __init__(self, data: Any = None, manifest: Union[Manifest, Record, None] = None) -> None:
+        self.data: Any = data
+        self.__manifest = manifest
+        self.exiting: bool = False
+
+    @property
+    def manifest(self) -> Optional[Manifest]:
+        """
+        The manifest of the run, which is created when it's first read.
+        """
+        return materialize(self.__manifest)
+
+    @manifest.setter
+    def manifest(self, value: Union[Manifest, Record, None]) -> None:
+        self.__manifest = value
+
+    @property
+    def record(self) -> Optional[Record]:
+        """
+        The recorded step of the run, or None if the manifest isn't recorded.
+        """
+        manifest = self.__manifest
+        return manifest if type(manifest) is Record else None
+
+
+# The execution of the pipeline running in the current context, whose filters set whether it's exiting
+current_execution: ContextVar[Optional[Execution]] = ContextVar("pipelayer.execution", default=None)
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import threading
+from contextvars import ContextVar, copy_context
+from inspect import isawaitable
+from time import perf_counter_ns, thread_time_ns
+from typing import (TYPE_CHECKING, Any, Callable, NamedTuple, Optional,
+                    Tuple, TypeVar, Union, cast)
+from weakref import WeakKeyDictionary
+
+from pipelayer.context import Context
+from pipelayer.enum import ExecutorKind
+from pipelayer.lifecycle import Scoped
+from pipelayer.protocol import IStep
+from pipelayer.step import get_step, get_step_name, is_proxy
+
+if TYPE_CHECKING:  # pragma: no cover
+    from concurrent.futures import Executor
+
+    from pipelayer.plan import PlanStep
+    from pipelayer.recorder import Recorder
+
+StepT = TypeVar("StepT")
+
+
+# region Declarations
+
+_kinds: WeakKeyDictionary[Any, ExecutorKind] = WeakKeyDictionary()
+
+
+def runs_in(kind: ExecutorKind) -> Callable[[StepT], StepT]:
+    """
+    Declares where a step function or class runs wherever it's added to a pipeline,
+    e.g. @runs_in(ExecutorKind.CPU). IO steps run in a thread pool when the pipeline is
+    run with arun(), CPU steps run in a process pool, like InProcess, and INLINE steps
+    run in the calling thread, e.g. to override the declaration of a base class.
+    """
+    if not isinstance(kind, ExecutorKind):
+        raise TypeError(f"'{kind}' is not an ExecutorKind")
+
+    def declare(step: StepT) -> StepT:
+        _kinds[step] = kind
+        return step
+
+    return declare
+
+
+def get_executor_kind(step: Any) -> ExecutorKind:
+    """
+    Returns the declared executor of a step function, class or instance, or INLINE if it isn't declared.
+    """
+    if is_proxy(step):
+        step = step.func
+    try:
+        kind = _kinds.get(step)
+    except TypeError:
+        # The step can't be weakly referenced
+        kind = None
+    if kind is None:
+        mro = step.__mro__ if isinstance(step, type) else type(step).__mro__
+        kind = next((_kinds[cls] for cls in mro if cls in _kinds), None)
+    return kind or ExecutorKind.INLINE
+
+
+class Executors(NamedTuple):
+    """
+    The pools that a pipeline runs IO and CPU steps in. A pool of None is a pool shared by pipelines.
+    """
+    io: Optional[Executor] = None
+    cpu: Optional[Executor] = None
+
+
+DEFAULT_EXECUTORS = Executors()
+
+# endregion
+
+
+class InExecutor:
+    """
+    Declares that a synchronous step runs in an executor when a pipeline is run with arun(),
+    e.g. InExecutor(lookup_user), so it doesn't block the event loop.
+    The step runs in the event loop's default executor if executor is None.
+    Pipelines run with run() call the step directly.
+    """
+
+    def __init__(
+        self,
+        step: Union[IStep, Callable[..., Any], Scoped],
+        executor: Optional[Executor] = None
+    ) -> None:
+        self.__step = step
+        self.__executor = executor
+
+    @property
+    def kind(self) -> ExecutorKind:
+        return ExecutorKind.IO
+
+    @property
+    def step(self) -> Union[IStep, Callable[..., Any], Scoped]:
+        return self.__step
+
+    @property
+    def executor(self) -> Optional[Executor]:
+        return self.__executor
+
+    @property
+    def name(self) -> str:
+        return get_step_name(self.__step)
+
+    def run(self, data: Any, context: Context) -> Any:
+        """
+        Runs the step, e.g. when the InExecutor step is a Switch case.
+        """
+        step = self.__step
+        if isinstance(step, Scoped):
+            return step.run(data, context)
+        return cast(IStep, get_step(step)).run(data, context)
+
+
+async def run_step_async(
+    entry: PlanStep,
+    step: Any,
+    func: Any,
+    data: Any,
+    context: Context,
+    recorder: Optional[Recorder] = None,
+    index: int = -1
+) -> Any:
+    """
+    Runs a bound step from a coroutine, and returns the output, or for compound steps,
+    the output and manifest. Compound steps with an _arun coroutine are awaited, and
+    steps declared with InExecutor run in their executor. The executor, and the time the
+    step waited for it, are recorded for the step at index.
+    """
+    if entry.is_compound and entry.executor is None:
+        arun = getattr(step, "_arun", None)
+        if arun is not None:
+            return await arun(data, context)
+
+    if entry.executor is not None and not entry.is_async:
+        from asyncio import get_running_loop
+
+        # The step sees the context variables of the run, e.g. to exit the pipeline
+        submitted = perf_counter_ns()
+        data, started, cpu_time = await get_running_loop().run_in_executor(
+            entry.executor.executor, copy_context().run, run_pooled, _call_timed, func, data, context
+        )
+        if recorder is not None:
+            recorder.dispatch(index, entry.executor.kind, started - submitted)
+            recorder.set_cpu_time(index, cpu_time)
+        return data
+
+    result = func(data, context)
+    if not isawaitable(result):
+        return result
+    if recorder is not None:
+        # The CPU time of the thread includes the coroutines that ran while the step awaited
+        recorder.set_cpu_time(index, None)
+    return await result
+
+
+def _call_timed(func: Callable[..., Any], data: Any, context: Context) -> Tuple[Any, int, int]:
+    """
+    Calls a step in an executor, and returns its output, when it started, and the CPU time of the call.
+    """
+    started = perf_counter_ns()
+    cpu_started = thread_time_ns()
+    return func(data, context), started, thread_time_ns() - cpu_started
+
+
+# Whether this process is a worker of a process pool that runs steps
+_is_worker_process = False
+
+
+def is_worker_process() -> bool:
+    """
+    CPU steps run inline in the workers of process pools that run steps, instead of in another process pool.
+    Other child processes, e.g. the workers of a web server, run them in a process pool.
+    """
+    return _is_worker_process
+
+
+def mark_worker_process() -> None:
+    """
+    Marks this process as a worker that runs steps. It's the initializer of the shared process pool,
+    and it's called when a step is first run in another pool.
+    """
+    global _is_worker_process
+    _is_worker_process = True
+
+
+# region Pools
+
+# The pools are imported when they're created, as concurrent.futures is slow to import
+_thread_pool: Optional[Executor] = None
+_process_pool: Optional[Executor] = None
+_pool_lock = threading.Lock()
+
+# Whether the current task runs on a thread pool
+_pooled: ContextVar[bool] = ContextVar("pipelayer.executor.pooled", default=False)
+
+
+def get_thread_pool() -> Executor:
+    """
+    Returns the thread pool shared by pipelines, e.g. for IO steps and Parallel branches,
+    which is created when it's first used.
+    """
+    global _thread_pool
+    if _thread_pool is None:
+        with _pool_lock:
+            if _thread_pool is None:
+                from concurrent.futures import ThreadPoolExecutor
+
+                _thread_pool = ThreadPoolExecutor(thread_name_prefix="pipelayer")
+    return _thread_pool
+
+
+def run_pooled(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Runs a task that was submitted to a thread pool, e.g. executor.submit(copy_context().run, run_pooled, func),
+    so the steps it runs know they're on a pool.
+    """
+    _pooled.set(True)
+    return func(*args)
+
+
+def is_pooled() -> bool:
+    """
+    Whether the current step runs on a thread pool, where waiting for tasks queued behind it could deadlock the pool.
+    """
+    return _pooled.get()
+
+
+def get_process_pool() -> Executor:
+    """
+    Returns the process pool shared by pipelines, e.g. for CPU steps, which is created when it's first used.
+    """
+    global _process_pool
+    if _process_pool is None:
+        with _pool_lock:
+            if _process_pool is None:
+                from concurrent.futures import ProcessPoolExecutor
+
+                _process_pool = ProcessPoolExecutor(initializer=mark_worker_process)
+    return _process_pool
+
+# endregion
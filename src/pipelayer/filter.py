@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import threading
 from abc import ABC, abstractmethod
 from collections.abc import Iterable
+from contextlib import nullcontext
 from functools import wraps
-from typing import Any, Callable, List, Optional, Tuple, Union, cast
+from inspect import iscoroutinefunction
+from types import TracebackType
+from typing import (Any, Callable, ContextManager, Dict, List, Optional,
+                    Tuple, Type, Union, cast)
 
 from pipelayer.context import Context
 from pipelayer.enum import Action, State
@@ -11,12 +16,76 @@ from pipelayer.event_args import FilterEventArgs
 from pipelayer.protocol import FilterEventHandlerT, IFilter
 
 
+class EventSubscription:
+    """
+    A handler subscribed to a FilterEventHandlerList until the subscription is closed.
+    """
+    __slots__ = ("__handlers", "__handler")
+
+    def __init__(self, handlers: Optional[FilterEventHandlerList], handler: FilterEventHandlerT) -> None:
+        self.__handlers = handlers
+        self.__handler = handler
+
+    def close(self) -> None:
+        handlers, self.__handlers = self.__handlers, None
+        if handlers is not None:
+            handlers._unsubscribe(self.__handler)
+
+    def __enter__(self) -> EventSubscription:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType]
+    ) -> None:
+        self.close()
+
+
 class FilterEventHandlerList(List[FilterEventHandlerT]):
+    def __init__(self, handlers: Iterable[FilterEventHandlerT] = ()) -> None:
+        super().__init__(handlers)
+        self.__subscriptions: Dict[FilterEventHandlerT, int] = {}
+        self.__lock = threading.Lock()
+
     def append(self, handler: FilterEventHandlerT) -> None:
         super().append(handler)
 
+    def subscribe(self, handler: FilterEventHandlerT) -> EventSubscription:
+        """
+        Adds a handler until the returned subscription is closed, e.g. for the duration of a run.
+        The handler is added once, however many subscriptions are open, and is removed when
+        the last one is closed. Handlers that were added with append or += are left in place.
+        """
+        with self.__lock:
+            count = self.__subscriptions.get(handler, 0)
+            if not count:
+                if handler in self:
+                    return EventSubscription(None, handler)
+                super().append(handler)
+            self.__subscriptions[handler] = count + 1
+        return EventSubscription(self, handler)
+
+    def _unsubscribe(self, handler: FilterEventHandlerT) -> None:
+        with self.__lock:
+            count = self.__subscriptions.pop(handler) - 1
+            if count:
+                self.__subscriptions[handler] = count
+            elif handler in self:
+                self.remove(handler)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        """
+        Handler lists are pickled without the handlers that are subscribed for a run.
+        """
+        return FilterEventHandlerList, ([handler for handler in self if handler not in self.__subscriptions],)
+
     def __iadd__(self, handlers: Union[FilterEventHandlerT, Iterable[FilterEventHandlerT]]) -> FilterEventHandlerList:
-        return FilterEventHandlerList(super().__iadd__(handlers if isinstance(handlers, Iterable) else [handlers]))
+        return cast(
+            FilterEventHandlerList,
+            super().__iadd__(handlers if isinstance(handlers, Iterable) else [handlers])
+        )
 
     def __add__(self, handlers: Union[FilterEventHandlerT, Iterable[FilterEventHandlerT]]) -> FilterEventHandlerList:
         return FilterEventHandlerList(super().__add__(
@@ -92,17 +161,33 @@ class Filter(ABC):
     # region Events
 
     def _on_start(self, args: FilterEventArgs) -> None:
-        [e(self, args) for e in self.start]
+        # Handlers are called from a snapshot, as other runs may unsubscribe while they're called
+        for handler in tuple(self.start):
+            handler(self, args)
 
     def _on_exit(self, args: FilterEventArgs) -> None:
-        [e(self, args) for e in self.exit]
+        for handler in tuple(self.exit):
+            handler(self, args)
 
     def _on_end(self, args: FilterEventArgs) -> None:
-        [e(self, args) for e in self.end]
+        for handler in tuple(self.end):
+            handler(self, args)
 
     # endregion
 
 
+def subscribe(handlers: Iterable[FilterEventHandlerT], handler: FilterEventHandlerT) -> ContextManager[Any]:
+    """
+    Subscribes a handler for the duration of a with block. Handler lists that are
+    not a FilterEventHandlerList can't be unsubscribed from, so the handler is added once.
+    """
+    if isinstance(handlers, FilterEventHandlerList):
+        return handlers.subscribe(handler)
+    if handler not in handlers:
+        cast(List[FilterEventHandlerT], handlers).append(handler)
+    return nullcontext()
+
+
 def _parse_filter_event_args(*args: str, **kwargs: dict) -> Tuple[IFilter, Any, Context]:
 
     if len(args) == 3:
@@ -130,30 +215,73 @@ def _parse_filter_event_args(*args: str, **kwargs: dict) -> Tuple[IFilter, Any,
 
 def raise_events(func: Callable) -> Callable:
     """
-    Decorates a filter method to raise events
+    Decorates a filter method to raise events.
+    Filters without start or end handlers can't be exited, so the method is called directly.
+    Coroutine methods are decorated with a coroutine, which raises the end event once it's awaited.
     """
+    if iscoroutinefunction(func):
+        return _raise_async_events(func)
+
     @wraps(func)
     def wrapper(*args: Any, **kwargs: Any) -> Callable:
+        if len(args) == 3 and not kwargs:
+            filter = args[0]
+            if not filter.start and not filter.end:
+                return func(*args)
+
         filter, data, context = _parse_filter_event_args(*args, **kwargs)
 
-        evt_args = FilterEventArgs(data, context, State.RUNNING)
+        evt_args = _raise_start(filter, data, context)
+        if evt_args.state is not State.RUNNING:
+            return evt_args.data
 
-        filter._on_start(evt_args)
+        return _raise_end(filter, func(*args, **kwargs), context)
+    return wrapper
 
-        if evt_args.action in (Action.EXIT, Action.SKIP):
-            evt_args.state = State.SKIPPING if evt_args.action == Action.SKIP else State.EXITING
-            filter._on_exit(evt_args)
-            return evt_args.data
 
-        data = func(*args, **kwargs)
+def _raise_async_events(func: Callable) -> Callable:
+    @wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if len(args) == 3 and not kwargs:
+            filter = args[0]
+            if not filter.start and not filter.end:
+                return await func(*args)
 
-        evt_args = FilterEventArgs(data, context, State.COMPLETING)
-        filter._on_end(evt_args)
+        filter, data, context = _parse_filter_event_args(*args, **kwargs)
 
-        if evt_args.action is Action.EXIT:
-            evt_args.state = State.EXITING
-            filter._on_exit(evt_args)
+        evt_args = _raise_start(filter, data, context)
+        if evt_args.state is not State.RUNNING:
             return evt_args.data
 
-        return data
+        return _raise_end(filter, await func(*args, **kwargs), context)
     return wrapper
+
+
+def _raise_start(filter: IFilter, data: Any, context: Context) -> FilterEventArgs:
+    """
+    Raises the start event, and the exit event if a handler exits or skips the filter.
+    """
+    evt_args = FilterEventArgs(data, context, State.RUNNING)
+
+    filter._on_start(evt_args)
+
+    if evt_args.action in (Action.EXIT, Action.SKIP):
+        evt_args.state = State.SKIPPING if evt_args.action == Action.SKIP else State.EXITING
+        filter._on_exit(evt_args)
+
+    return evt_args
+
+
+def _raise_end(filter: IFilter, data: Any, context: Context) -> Any:
+    """
+    Raises the end event, and the exit event if a handler exits the filter.
+    """
+    evt_args = FilterEventArgs(data, context, State.COMPLETING)
+    filter._on_end(evt_args)
+
+    if evt_args.action is Action.EXIT:
+        evt_args.state = State.EXITING
+        filter._on_exit(evt_args)
+        return evt_args.data
+
+    return data
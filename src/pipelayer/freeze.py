@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import threading
+import weakref
+from typing import (TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple,
+                    cast)
+
+from pipelayer.case import record_case, run_case
+from pipelayer.context import Context
+from pipelayer.enum import Action, StepType, TraceLevel
+from pipelayer.event_args import FilterEventArgs, PipelineEventArgs
+from pipelayer.execution import Execution, current_execution
+from pipelayer.filter import raise_events, subscribe
+from pipelayer.lifecycle import Lifecycle
+from pipelayer.plan import PlanStep
+from pipelayer.protocol import IFilter
+from pipelayer.recorder import Record, materialize
+from pipelayer.step import is_proxy
+from pipelayer.switch import Switch
+from pipelayer.tracing import (FULL, Tracing, end_trace, start_trace,
+                               start_untraced)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pipelayer.manifest import Manifest
+    from pipelayer.pipeline import Pipeline
+
+
+# Python limits the number of statically nested blocks in a function,
+# so deeper pipelines are called rather than inlined.
+MAX_INLINE_DEPTH = 8
+
+
+class FrozenPipeline:
+    """
+    A pipeline compiled into a single function by Pipeline.freeze().
+    """
+
+    def __init__(self, pipeline: Pipeline, tracing: Tracing = FULL) -> None:
+        self.__pipeline = pipeline
+        self.__tracing = tracing
+        self.__local = threading.local()
+        self.__lock = threading.Lock()
+
+        # Traced and untraced runs use separate functions, which are generated on first use
+        self.__funcs: Dict[bool, Callable[[Any, Context], Any]] = {}
+        self.__sources: Dict[bool, str] = {}
+        self.__subscriptions: Dict[int, Any] = {}
+
+        # Filters hold the exit handler until the frozen pipeline is collected
+        weakref.finalize(self, _close_subscriptions, self.__subscriptions)
+
+        self.__get_func(tracing.level is not TraceLevel.OFF)
+
+    # region Properties
+
+    @property
+    def name(self) -> str:
+        return self.__pipeline.name
+
+    @property
+    def pipeline(self) -> Pipeline:
+        return self.__pipeline
+
+    @property
+    def tracing(self) -> Tracing:
+        return self.__tracing
+
+    @property
+    def source(self) -> str:
+        """
+        The generated source code of traced runs, or of untraced runs if tracing is off.
+        """
+        return self.__sources[self.__tracing.level is not TraceLevel.OFF]
+
+    @property
+    def manifest(self) -> Manifest:
+        """
+        The manifest of the last run in the current thread, or None if it wasn't traced.
+        """
+        return cast("Manifest", materialize(getattr(self.__local, "manifest", None)))
+
+    # endregion
+    # region Runners
+
+    def run(self, data: Any = None, context: Optional[Context] = None) -> Any:
+        return self.execute(data, context).data
+
+    def execute(self, data: Any = None, context: Optional[Context] = None) -> Execution:
+        # Steps that aren't inlined follow the decision of the frozen run
+        recorder, index, trace_token = start_trace(self.__tracing, self.name, StepType.PIPELINE)
+        record = Record(recorder, index) if recorder is not None else None
+        func = self.__funcs.get(record is not None) or self.__get_func(record is not None)
+        token = current_execution.set(Execution(manifest=record))
+        try:
+            data = func(data, context or Context())
+        finally:
+            current_execution.reset(token)
+            end_trace(trace_token)
+
+        if recorder is not None and trace_token is not None:
+            recorder.close(index)
+        self.__local.manifest = record
+        return Execution(data, record)
+
+    def __get_func(self, traced: bool) -> Callable[[Any, Context], Any]:
+        with self.__lock:
+            if traced not in self.__funcs:
+                pipeline = self.__pipeline
+                generator = _CodeGenerator(pipeline, traced, self.__subscriptions)
+                self.__sources[traced], func = generator.generate()
+                self.__funcs[traced] = _with_pipeline_events(pipeline, func) if pipeline.start or pipeline.end else func
+            return self.__funcs[traced]
+
+    # endregion
+
+
+class _CodeGenerator:
+    def __init__(
+        self,
+        pipeline: Pipeline,
+        trace: bool,
+        subscriptions: Dict[int, Any]
+    ) -> None:
+        """
+        Args:
+            subscriptions (Dict[int, Any]):
+            The exit subscriptions by filter id, shared by the functions generated for a pipeline,
+            so each filter is subscribed once.
+        """
+        self.__pipeline = pipeline
+        self.__pipeline_type = type(pipeline)
+        self.__trace = trace
+        self.__lines: List[str] = []
+        self.__manifest_count = 0
+        self.__subscriptions = subscriptions
+        self.__namespace: Dict[str, Any] = {
+            "_PipelineEventArgs": PipelineEventArgs,
+            "_Record": Record,
+            "_subscribe": subscribe,
+            "_handle_exit": _handle_exit,
+            "_current_execution": current_execution.get,
+            "_record_case": record_case,
+            "_run_case": run_case,
+            "_start_untraced": start_untraced,
+            "_end_trace": end_trace,
+        }
+
+    def generate(self) -> Tuple[str, Callable[[Any, Context], Any]]:
+        """
+        Generates the function. Traced functions record the steps under the step of the run's record.
+        """
+        pipeline = self.__pipeline
+        self.__manifest_count = 1
+
+        self.__emit_pipeline(pipeline, "m0", 1, 1)
+        self.__emit(1, "return data")
+
+        prologue = ["    _recorder, m0 = _execution.record", "    _open = _recorder.open"] if self.__trace else []
+        source = "\n".join([
+            "def frozen(data, context):",
+            "    _execution = _current_execution()",
+            *prologue,
+            *self.__lines
+        ])
+
+        exec(compile(source, f"<frozen {pipeline.name}>", "exec"), self.__namespace)
+
+        return source, self.__namespace["frozen"]
+
+    # region Emitters
+
+    def __emit(self, indent: int, line: str) -> None:
+        self.__lines.append("    " * indent + line)
+
+    def __bind(self, value: Any) -> str:
+        name = f"_c{len(self.__namespace)}"
+        self.__namespace[name] = value
+        return name
+
+    def __emit_manifest(self, name: str, step_type: StepType, parent: str, indent: int) -> str:
+        manifest = f"m{self.__manifest_count}"
+        self.__manifest_count += 1
+        if self.__trace:
+            self.__emit(indent, f"{manifest} = _open({self.__bind(name)}, {self.__bind(step_type)}, {parent})")
+        return manifest
+
+    def __emit_pipeline(self, pipeline: Pipeline, manifest: str, indent: int, depth: int) -> None:
+        self.__emit(indent, "while True:")
+        for entry in pipeline.compile():
+            self.__emit_step(pipeline, entry, manifest, indent + 1, depth)
+        self.__emit(indent + 1, "break")
+
+    def __emit_step(self, pipeline: Pipeline, entry: PlanStep, parent: str, indent: int, depth: int) -> None:
+        if entry.is_async:
+            raise TypeError(f"Pipeline '{pipeline.name}' has coroutine steps, so it can't be frozen")
+        self.__emit(indent, f"# {entry.name!r}")
+        manifest = self.__emit_manifest(entry.name, entry.step_type, parent, indent)
+
+        step = entry.step
+        if entry.lifecycle:
+            self.__emit_lifecycle_step(entry, manifest, indent)
+        elif type(step) is self.__pipeline_type and self.__can_inline(step, depth):
+            self.__emit_pipeline(step, manifest, indent, depth + 1)
+        elif type(step) is Switch and self.__can_inline(step, depth):
+            self.__emit_switch(step, manifest, indent)
+        else:
+            if entry.is_filter and id(step) not in self.__subscriptions:
+                self.__subscriptions[id(step)] = subscribe(cast(IFilter, step).exit, _handle_exit)
+            func = step.func if is_proxy(step) else entry.func
+            self.__emit_call(self.__bind(func), entry.is_compound and entry.is_filter, manifest, indent)
+
+        record = f"_Record(_recorder, {manifest})" if self.__trace else "None"
+        if self.__trace:
+            self.__emit(indent, f"_recorder.close({manifest})")
+        if pipeline.step_end:
+            self.__emit(indent, f"{self.__bind(pipeline._on_step_end)}(_PipelineEventArgs(data, {record}))")
+        if entry.is_filter:
+            self.__emit(indent, "if _execution.exiting:")
+            self.__emit(indent + 1, "_execution.exiting = False")
+            self.__emit(indent + 1, "break")
+
+    def __emit_lifecycle_step(self, entry: PlanStep, manifest: str, indent: int) -> None:
+        lifecycle = cast(Lifecycle, entry.lifecycle)
+        self.__emit(indent, f"step = {self.__bind(lifecycle.acquire)}()")
+        call = "step._run" if entry.is_compound else "step.run"
+        body = indent
+        if lifecycle.releases:
+            self.__emit(indent, "try:")
+            body += 1
+        if entry.is_filter:
+            self.__emit(body, "with _subscribe(step.exit, _handle_exit):")
+            self.__emit_call(call, entry.is_compound, manifest, body + 1)
+        else:
+            self.__emit_call(call, False, manifest, body)
+        if lifecycle.releases:
+            self.__emit(indent, "finally:")
+            self.__emit(indent + 1, f"{self.__bind(lifecycle.release)}(step)")
+
+    def __emit_call(self, func: str, is_compound: bool, manifest: str, indent: int) -> None:
+        if not is_compound:
+            self.__emit(indent, f"data = {func}(data, context)")
+        elif not self.__trace:
+            self.__emit(indent, "untraced = _start_untraced()")
+            self.__emit(indent, "try:")
+            self.__emit(indent + 1, f"data = {func}(data, context)[0]")
+            self.__emit(indent, "finally:")
+            self.__emit(indent + 1, "_end_trace(untraced)")
+        else:
+            self.__emit(indent, f"_recorder.begin_compound({manifest})")
+            self.__emit(indent, f"data, step_manifest = {func}(data, context)")
+            self.__emit(indent, f"_recorder.end_compound({manifest}, step_manifest)")
+
+    def __emit_switch(self, switch: Switch, manifest: str, indent: int) -> None:
+        self.__emit(indent, f"case = {self.__bind(switch._select_case)}(data, context)")
+        if not self.__trace:
+            self.__emit(indent, "if case is not None:")
+            self.__emit(indent + 1, "data = _run_case(case, data, context, None, -1)")
+            return
+        self.__emit(indent, f"case_manifest = _record_case(_recorder, case, {manifest})")
+        self.__emit(indent, "if case is not None:")
+        self.__emit(indent + 1, "data = _run_case(case, data, context, _recorder, case_manifest)")
+        self.__emit(indent, "_recorder.close(case_manifest)")
+
+    def __can_inline(self, step: Any, depth: int) -> bool:
+        """
+        Steps with start or end handlers are called, so their events are raised.
+        """
+        return depth < MAX_INLINE_DEPTH and not step.start and not step.end
+
+    # endregion
+
+
+def _handle_exit(sender: IFilter, args: FilterEventArgs) -> None:
+    execution = current_execution.get()
+    if execution is not None:
+        execution.exiting = args.action is Action.EXIT
+
+
+def _with_pipeline_events(
+    pipeline: Pipeline,
+    func: Callable[[Any, Context], Any]
+) -> Callable[[Any, Context], Any]:
+    """
+    Raises the pipeline's start, exit and end events around the frozen function.
+    """
+    wrapper = raise_events(lambda sender, data, context: func(data, context))
+    return lambda data, context: wrapper(pipeline, data, context)
+
+
+def _close_subscriptions(subscriptions: Dict[int, Any]) -> None:
+    for subscription in subscriptions.values():
+        subscription.__exit__(None, None, None)
@@ -0,0 +1,97 @@
+"""
+Runs pipelines in sub-interpreters, which have their own GIL on Python 3.14 and later,
+so they run in parallel in one process. Older versions run them in processes.
+"""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from importlib import import_module
+from typing import Any, Callable, Iterable, Optional, Tuple, Union, cast
+
+from pipelayer.process import InProcess
+from pipelayer.protocol import IStep
+from pipelayer.transport import SharedMemoryTransport
+
+try:
+    from concurrent.futures import InterpreterPoolExecutor  # type: ignore
+except ImportError:  # pragma: no cover
+    InterpreterPoolExecutor = None
+
+HAS_SUBINTERPRETERS = InterpreterPoolExecutor is not None
+
+FactoryT = Union[str, Callable[[], Union[IStep, Callable[..., Any]]]]
+
+
+class _Factory:
+    """
+    A step that's pickled as its factory, so each worker builds it when it's unpickled.
+    """
+    __slots__ = ("__factory",)
+
+    def __init__(self, factory: FactoryT) -> None:
+        self.__factory = factory
+
+    @property
+    def name(self) -> str:
+        factory = self.__factory
+        return factory.rpartition(":")[2] if isinstance(factory, str) else factory.__name__
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        if isinstance(self.__factory, str):
+            return _build, (self.__factory,)
+        return self.__factory, ()
+
+
+def _build(factory: str) -> Any:
+    module, _, name = factory.partition(":")
+    return getattr(import_module(module), name)()
+
+
+def create_executor(max_workers: Optional[int] = None) -> Executor:
+    """
+    Returns an InterpreterPoolExecutor if sub-interpreters are supported, otherwise a ProcessPoolExecutor.
+    """
+    if InterpreterPoolExecutor is not None:
+        return cast(Executor, InterpreterPoolExecutor(max_workers))
+    return ProcessPoolExecutor(max_workers)
+
+
+def in_interpreter(
+    factory: FactoryT,
+    executor: Optional[Executor] = None,
+    context_keys: Iterable[str] = (),
+    name: Optional[str] = "",
+    transport: Optional[SharedMemoryTransport] = None
+) -> InProcess:
+    """
+    Returns a step that runs the pipeline the factory builds in a sub-interpreter,
+    e.g. in_interpreter(build_mapping_pipeline) or in_interpreter("app.pipelines:build_mapping").
+
+    The factory is a module-level function, or a "module:function" string, and each worker calls it
+    once to build its own pipeline. Data, the context_keys of the context and the manifest are
+    pickled between interpreters, as they are by InProcess, and large buffers can be sent with a
+    SharedMemoryTransport. Without an executor, the step runs in a pool shared by in_interpreter
+    steps, which uses processes if sub-interpreters aren't supported.
+    """
+    step = _Factory(factory)
+    return InProcess(
+        cast(IStep, step),
+        executor or _get_default_executor(),
+        context_keys,
+        name or step.name,
+        transport
+    )
+
+
+_default_executor: Optional[Executor] = None
+_default_executor_lock = threading.Lock()
+
+
+def _get_default_executor() -> Executor:
+    global _default_executor
+    if _default_executor is None:
+        with _default_executor_lock:
+            if _default_executor is None:
+                _default_executor = create_executor()
+    return _default_executor
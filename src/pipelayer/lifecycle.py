@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, List, NamedTuple, Optional, Type, cast
+from weakref import WeakKeyDictionary
+
+from pipelayer.context import Context
+from pipelayer.enum import Scope
+from pipelayer.protocol import IStep
+from pipelayer.step import get_step_name
+
+StepFactoryT = Callable[[], IStep]
+
+
+class Lifecycle:
+    """
+    Creates the instances of a step class for each run. Instances are created with
+    the factory, which defaults to the class, so a container can be plugged in.
+    """
+    # Lifecycles that reuse an instance once a run is done with it
+    releases = False
+
+    def __init__(self, factory: StepFactoryT, instance: Optional[IStep] = None) -> None:
+        self._factory = factory
+        # An instance created before it was needed, e.g. to compile the step, which is acquired first
+        self.__created: List[IStep] = [instance] if instance is not None else []
+
+    @property
+    def factory(self) -> StepFactoryT:
+        return self._factory
+
+    def acquire(self) -> IStep:
+        return self._create()
+
+    def release(self, step: IStep) -> None:
+        pass
+
+    def peek(self) -> IStep:
+        """
+        Returns an instance to inspect, e.g. to compile the step, without running it.
+        It's the instance that's acquired next, so it isn't created only to be discarded.
+        """
+        created = self.__created
+        if not created:
+            created.append(self._factory())
+        return created[0]
+
+    def _create(self) -> IStep:
+        if self.__created:
+            try:
+                return self.__created.pop()
+            except IndexError:
+                # Another thread acquired it
+                pass
+        return self._factory()
+
+
+class SingletonLifecycle(Lifecycle):
+    def __init__(self, factory: StepFactoryT, instance: Optional[IStep] = None) -> None:
+        super().__init__(factory, instance)
+        self.__instance: Optional[IStep] = None
+        self.__lock = threading.Lock()
+
+    def acquire(self) -> IStep:
+        instance = self.__instance
+        if instance is None:
+            with self.__lock:
+                if self.__instance is None:
+                    self.__instance = self._create()
+                instance = self.__instance
+        return instance
+
+    def peek(self) -> IStep:
+        return self.acquire()
+
+
+class ThreadLifecycle(Lifecycle):
+    def __init__(self, factory: StepFactoryT, instance: Optional[IStep] = None) -> None:
+        super().__init__(factory, instance)
+        self.__local = threading.local()
+
+    def acquire(self) -> IStep:
+        instance = getattr(self.__local, "instance", None)
+        if instance is None:
+            instance = self.__local.instance = self._create()
+        return cast(IStep, instance)
+
+
+class PooledLifecycle(Lifecycle):
+    """
+    Lends each run an idle instance, creating one when none are idle.
+    At most pool_size idle instances are kept.
+    """
+    releases = True
+
+    def __init__(self, factory: StepFactoryT, pool_size: int, instance: Optional[IStep] = None) -> None:
+        if pool_size < 1:
+            raise ValueError("pool_size must be greater than 0")
+        super().__init__(factory, instance)
+        self.__pool_size = pool_size
+        self.__idle: List[IStep] = []
+        self.__lock = threading.Lock()
+
+    @property
+    def pool_size(self) -> int:
+        return self.__pool_size
+
+    def acquire(self) -> IStep:
+        with self.__lock:
+            if self.__idle:
+                return self.__idle.pop()
+        return self._create()
+
+    def release(self, step: IStep) -> None:
+        with self.__lock:
+            if len(self.__idle) < self.__pool_size:
+                self.__idle.append(step)
+
+
+# The default pool size of pooled steps
+DEFAULT_POOL_SIZE = 8
+
+
+def create_lifecycle(
+    scope: Scope,
+    factory: StepFactoryT,
+    pool_size: int = DEFAULT_POOL_SIZE,
+    instance: Optional[IStep] = None
+) -> Lifecycle:
+    """
+    Args:
+        instance (IStep, optional):
+        An instance that has already been created, which is the first instance acquired.
+    """
+    if scope is Scope.SINGLETON:
+        return SingletonLifecycle(factory, instance)
+    if scope is Scope.THREAD:
+        return ThreadLifecycle(factory, instance)
+    if scope is Scope.POOLED:
+        return PooledLifecycle(factory, pool_size, instance)
+    return Lifecycle(factory, instance)
+
+
+# region Declarations
+
+class ScopeDeclaration(NamedTuple):
+    scope: Scope
+    factory: Optional[StepFactoryT]
+    pool_size: int
+
+
+_scopes: WeakKeyDictionary[type, ScopeDeclaration] = WeakKeyDictionary()
+
+
+def register_scope(
+    cls: Type[IStep],
+    scope: Scope,
+    factory: Optional[StepFactoryT] = None,
+    pool_size: int = DEFAULT_POOL_SIZE
+) -> Type[IStep]:
+    """
+    Declares the scope of a step class wherever it's passed to a pipeline as a class.
+    Returns the class.
+    """
+    if scope not in Scope:
+        raise TypeError(f"'{scope}' is not a Scope")
+    _scopes[cls] = ScopeDeclaration(scope, factory, pool_size)
+    return cls
+
+
+def get_scope(cls: type) -> ScopeDeclaration:
+    return _scopes.get(cls) or ScopeDeclaration(Scope.RUN, None, DEFAULT_POOL_SIZE)
+
+
+class Scoped:
+    """
+    Declares the scope of a step class in a pipeline, e.g. Scoped(LookupFilter, Scope.SINGLETON).
+    Instances are shared by every pipeline that the Scoped step is added to.
+    """
+
+    def __init__(
+        self,
+        step: Type[IStep],
+        scope: Scope = Scope.RUN,
+        factory: Optional[StepFactoryT] = None,
+        pool_size: int = DEFAULT_POOL_SIZE
+    ) -> None:
+        if scope not in Scope:
+            raise TypeError(f"'{scope}' is not a Scope")
+        self.__step = step
+        self.__scope = scope
+        self.__lifecycle = create_lifecycle(scope, factory or step, pool_size)
+
+    @property
+    def step(self) -> Type[IStep]:
+        return self.__step
+
+    @property
+    def scope(self) -> Scope:
+        return self.__scope
+
+    @property
+    def lifecycle(self) -> Lifecycle:
+        return self.__lifecycle
+
+    @property
+    def name(self) -> str:
+        return get_step_name(self.__step)
+
+    def run(self, data: Any, context: Context) -> Any:
+        """
+        Runs an instance of the step, e.g. when the Scoped step is a Switch case.
+        """
+        lifecycle = self.__lifecycle
+        step = lifecycle.acquire()
+        try:
+            return step.run(data, context)
+        finally:
+            lifecycle.release(step)
+
+# endregion
@@ -1,7 +1,7 @@
 from datetime import datetime, timedelta
 from typing import Callable, Optional
 
-from pipelayer.enum import StepType
+from pipelayer.enum import ExecutorKind, StepType
 from pydantic import BaseModel
 from pydantic.json import timedelta_isoformat
 from stringbender import camel
@@ -17,6 +17,10 @@ class Manifest(BaseModel):
     start: datetime
     end: Optional[datetime] = None
     duration: Optional[timedelta] = None
+    duration_ns: Optional[int] = None
+    cpu_time_ns: Optional[int] = None
+    executor: Optional[ExecutorKind] = None
+    queue_wait_ns: Optional[int] = None
     steps: ManifestList = ManifestList()
 
     class Config:
@@ -39,3 +43,4 @@ def create_manifest(name: str, step_type: StepType) -> Manifest:
 def close_manifest(manifest: Manifest) -> None:
     manifest.end = datetime.utcnow()
     manifest.duration = manifest.end - manifest.start
+    manifest.duration_ns = manifest.duration // timedelta(microseconds=1) * 1000
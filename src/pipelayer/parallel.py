@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import threading
+from asyncio import gather, get_running_loop
+from concurrent.futures import Executor, wait
+from contextvars import ContextVar, copy_context
+from typing import (TYPE_CHECKING, Any, Callable, Iterable, List, Optional,
+                    Tuple, Union, cast)
+
+from pipelayer.case import arun_case, run_case
+from pipelayer.context import Context
+from pipelayer.enum import Action, State, StepType
+from pipelayer.event_args import FilterEventArgs
+from pipelayer.execution import Execution
+from pipelayer.executor import get_thread_pool, is_pooled, run_pooled
+from pipelayer.filter import Filter, raise_events
+from pipelayer.plan import PlanStep, compile_step
+from pipelayer.protocol import IFilter, IStep
+from pipelayer.recorder import Record, Recorder, materialize
+from pipelayer.tracing import FULL, end_trace, start_branch, start_trace
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pipelayer.manifest import Manifest
+
+MergeT = Callable[[List[Any], Context], Any]
+
+# The result of a branch: its output, its record, and whether it exited
+BranchResult = Tuple[Any, Optional[Record], bool]
+
+
+class Parallel(Filter):
+    """
+    Runs its branches concurrently with the same data, and merges their outputs.
+    It implements the IFilter and ICompoundStep interface.
+    """
+    # region Constructors
+
+    def __init__(self,
+                 branches: Iterable[Union[IStep, Callable[[Any, Context], Any]]],
+                 merge: Optional[MergeT] = None,
+                 name: Optional[str] = "",
+                 executor: Optional[Executor] = None) -> None:
+        """
+        Args:
+            branches (Iterable[Union[Step, PipelineCallableT]]):
+            The steps that run concurrently. Each branch gets the same data, so branches
+            shouldn't modify it.
+
+            merge (Optional[MergeT], optional):
+            A function with the signature (outputs: List[Any], context: Context) -> Any that
+            joins the outputs of the branches, in the order of the branches.
+            Defaults to None, which returns the list of outputs.
+
+            name (Optional[str], optional):
+            Used by the Manifest. Defaults to "".
+
+            executor (Optional[Executor], optional):
+            The thread pool the branches run on. The first branch runs in the calling thread, and
+            when a Parallel runs on the pool, so do the branches that haven't started when it waits for them.
+            Defaults to None, which uses the thread pool shared by pipelines.
+        """
+        super().__init__(name or self.__class__.__name__)
+        self.__branches = tuple(branches)
+        self.__merge = merge
+        self.__executor = executor
+        self.__plan: Optional[Tuple[PlanStep, ...]] = None
+        self.__local = threading.local()
+
+    def __init_subclass__(cls, **kwargs: Any):
+        raise TypeError(f"type '{Parallel.__name__}' is not an acceptable base type")
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        """
+        The executor isn't pickled, so an unpickled Parallel uses the shared pool.
+        """
+        return Parallel, (self.__branches, self.__merge, self.name)
+
+    # endregion
+    # region Properties
+
+    @property
+    def branches(self) -> Tuple[Union[IStep, Callable[[Any, Context], Any]], ...]:
+        return self.__branches
+
+    @property
+    def merge(self) -> Optional[MergeT]:
+        return self.__merge
+
+    @property
+    def executor(self) -> Optional[Executor]:
+        return self.__executor
+
+    @property
+    def manifest(self) -> Manifest:
+        """
+        The manifest of the last run in the current thread, or None if it wasn't traced.
+        """
+        return cast("Manifest", materialize(getattr(self.__local, "manifest", None)))
+
+    # endregion
+    # region Runners
+
+    def compile(self) -> Tuple[PlanStep, ...]:
+        """
+        Resolves the branches into plan steps. The branches are compiled on the first run.
+        """
+        self.__plan = tuple(map(compile_step, self.__branches))
+        return self.__plan
+
+    def run(self, data: Any = None, context: Optional[Context] = None) -> Any:
+        return self.execute(data, context).data
+
+    def execute(self, data: Any = None, context: Optional[Context] = None) -> Execution:
+        """
+        Runs the branches, and returns the merged output and manifest of the run.
+        """
+        data, manifest = self._run(data, context or Context())
+        return Execution(data, manifest)
+
+    async def arun(self, data: Any = None, context: Optional[Context] = None) -> Any:
+        """
+        Runs the branches from a coroutine. Coroutine and compound branches are awaited
+        concurrently, and other branches run on the thread pool.
+        """
+        return (await self.aexecute(data, context)).data
+
+    async def aexecute(self, data: Any = None, context: Optional[Context] = None) -> Execution:
+        data, manifest = await self._arun(data, context or Context())
+        return Execution(data, manifest)
+
+    @raise_events
+    def _run(self, data: Any, context: Context) -> Tuple[Any, Optional[Record]]:
+        branches = self.__plan or self.compile()
+        if any(branch.is_async for branch in branches):
+            raise TypeError(f"Parallel '{self.name}' has coroutine branches, so it must be run with arun()")
+
+        recorder, index, trace_token = start_trace(FULL, self.name, StepType.PARALLEL)
+        try:
+            executor = self.__executor or get_thread_pool()
+            futures = [
+                executor.submit(copy_context().run, run_pooled, _run_branch, branch, data, context, recorder)
+                for branch in branches[1:]
+            ]
+            try:
+                results = [copy_context().run(_run_branch, branches[0], data, context, recorder)] if branches else []
+                # A Parallel on the pool that waited for branches queued behind it could deadlock the pool,
+                # so it runs the branches that haven't started itself
+                pooled = is_pooled()
+                results.extend(
+                    copy_context().run(_run_branch, branch, data, context, recorder)
+                    if pooled and future.cancel() else future.result()
+                    for branch, future in zip(branches[1:], futures)
+                )
+            finally:
+                # When a branch fails, the branches that haven't started are cancelled, and the running ones
+                # are waited for, so they don't run after the Parallel, or record into its run
+                wait([future for future in futures if not future.cancel()])
+        finally:
+            end_trace(trace_token)
+
+        return self.__join(results, context, recorder, index, trace_token is not None)
+
+    @raise_events
+    async def _arun(self, data: Any, context: Context) -> Tuple[Any, Optional[Record]]:
+        branches = self.__plan or self.compile()
+
+        recorder, index, trace_token = start_trace(FULL, self.name, StepType.PARALLEL)
+        try:
+            executor = self.__executor or get_thread_pool()
+            results = await gather(*(_arun_branch(branch, data, context, recorder, executor) for branch in branches))
+        finally:
+            end_trace(trace_token)
+
+        if recorder is not None:
+            # The CPU time of the thread includes the coroutines that ran while the branches were awaited
+            recorder.set_cpu_time(index, None)
+        return self.__join(list(results), context, recorder, index, trace_token is not None)
+
+    def __join(
+        self,
+        results: List[BranchResult],
+        context: Context,
+        recorder: Optional[Recorder],
+        index: int,
+        is_root: bool
+    ) -> Tuple[Any, Optional[Record]]:
+        """
+        Merges the outputs of the branches, and raises the exit event if a branch exited.
+        """
+        outputs = [output for output, _, _ in results]
+        data = self.__merge(outputs, context) if self.__merge else outputs
+
+        if any(exited for _, _, exited in results):
+            args = FilterEventArgs(data, context, State.EXITING)
+            args.action = Action.EXIT
+            self._on_exit(args)
+            data = args.data
+
+        record = None
+        if recorder is not None:
+            for _, branch_record, _ in results:
+                recorder.attach(index, cast(Record, branch_record))
+            if is_root:
+                recorder.close(index)
+            record = Record(recorder, index)
+        self.__local.manifest = record
+
+        return data, record
+
+    # endregion
+
+
+# Whether the filter of the branch running in the current context has exited
+_exits: ContextVar[Optional[List[FilterEventArgs]]] = ContextVar("pipelayer.parallel.exits", default=None)
+
+
+def _handle_exit(sender: IFilter, args: FilterEventArgs) -> None:
+    exits = _exits.get()
+    if exits is not None and args.action is Action.EXIT:
+        exits.append(args)
+
+
+def _run_branch(branch: PlanStep, data: Any, context: Context, recorder: Optional[Recorder]) -> BranchResult:
+    """
+    Runs a branch in a copied context, recording it into its own recorder.
+    """
+    recorder, index = start_branch(recorder, branch.name, branch.step_type)
+    exits: List[FilterEventArgs] = []
+    _exits.set(exits)
+
+    data = run_case(branch, data, context, recorder, index, _handle_exit)
+    return _end_branch(data, recorder, index, exits)
+
+
+async def _arun_branch(
+    branch: PlanStep,
+    data: Any,
+    context: Context,
+    recorder: Optional[Recorder],
+    executor: Executor
+) -> BranchResult:
+    """
+    Runs a branch in its own task. Synchronous steps run on the executor, so they don't block the other branches.
+    """
+    recorder, index = start_branch(recorder, branch.name, branch.step_type)
+    exits: List[FilterEventArgs] = []
+    _exits.set(exits)
+    if recorder is not None:
+        recorder.set_cpu_time(index, None)
+
+    if branch.is_async or branch.is_compound or branch.executor is not None:
+        data = await arun_case(branch, data, context, recorder, index, _handle_exit)
+    else:
+        data = await get_running_loop().run_in_executor(
+            executor, copy_context().run, run_pooled, run_case, branch, data, context, recorder, index, _handle_exit
+        )
+    return _end_branch(data, recorder, index, exits)
+
+
+def _end_branch(data: Any, recorder: Optional[Recorder], index: int, exits: List[FilterEventArgs]) -> BranchResult:
+    if recorder is None:
+        return data, None, bool(exits)
+    recorder.close(index)
+    return data, Record(recorder, index), bool(exits)
@@ -1,15 +1,27 @@
 from __future__ import annotations
 
-from typing import Any, Iterable, List, Optional, Tuple, Union, cast
+import threading
+from typing import (TYPE_CHECKING, Any, Iterable, List, Optional, Sequence,
+                    Tuple, Union, cast)
 
 from pipelayer.context import Context
 from pipelayer.enum import Action, StepType
 from pipelayer.event_args import FilterEventArgs, PipelineEventArgs
-from pipelayer.filter import Filter, raise_events
-from pipelayer.manifest import Manifest, close_manifest, create_manifest
-from pipelayer.protocol import (ICompoundStep, IFilter, IStep,
-                                PipelineCallableT, PipelineEventHandlerT)
-from pipelayer.step import initialize_step
+from pipelayer.execution import Execution, current_execution
+from pipelayer.executor import DEFAULT_EXECUTORS, Executors, run_step_async
+from pipelayer.filter import Filter, raise_events, subscribe
+from pipelayer.plan import (OP_ENTER, OP_LEAVE, ExecutionPlan, PlanStep,
+                            compile_plan, inline_plan)
+from pipelayer.protocol import (IFilter, IStep, PipelineCallableT,
+                                PipelineEventHandlerT)
+from pipelayer.recorder import Record, Recorder, materialize
+from pipelayer.tracing import (FULL, OFF, Tracing, end_trace, start_trace,
+                               start_untraced)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pipelayer.freeze import FrozenPipeline
+    from pipelayer.manifest import Manifest
+    from pipelayer.stream import Stream
 
 
 class PipelineEventHandlerList(List[PipelineEventHandlerT]):
@@ -20,7 +32,10 @@ class PipelineEventHandlerList(List[PipelineEventHandlerT]):
         self,
         handlers: Union[PipelineEventHandlerT, Iterable[PipelineEventHandlerT]]
     ) -> PipelineEventHandlerList:
-        return PipelineEventHandlerList(super().__iadd__(handlers if isinstance(handlers, Iterable) else [handlers]))
+        return cast(
+            PipelineEventHandlerList,
+            super().__iadd__(handlers if isinstance(handlers, Iterable) else [handlers])
+        )
 
     def __add__(
         self,
@@ -38,17 +53,38 @@ class Pipeline(Filter):
 
     def __init__(self: Pipeline,
                  steps: Iterable[Union[IStep, PipelineCallableT]],
-                 name: str = "") -> None:
+                 name: str = "",
+                 tracing: Tracing = FULL,
+                 executors: Executors = DEFAULT_EXECUTORS) -> None:
+        """
+        Args:
+            tracing (Tracing, optional):
+            Whether runs create a manifest: pipelayer.tracing.OFF, FULL or sampled(rate).
+            Nested pipelines follow the run they are part of. Defaults to FULL.
+
+            executors (Executors, optional):
+            The pools that steps declared with runs_in(ExecutorKind.IO) or runs_in(ExecutorKind.CPU)
+            run in. Defaults to the pools shared by pipelines.
+        """
         super().__init__(name or self.__class__.__name__)
         self.__steps: Iterable[Union[IStep, PipelineCallableT]] = steps
-        self.__manifest: Optional[Manifest] = None
-        self.__exit_pipeline: bool = False
+        self.__tracing = tracing
+        self.__executors = executors
+        self.__plan: Optional[ExecutionPlan] = None
+        self.__local = threading.local()
         self.__step_end: PipelineEventHandlerList = PipelineEventHandlerList()
         self.exit += self._handle_exit
 
     def __init_subclass__(cls, **kwargs: Any):
         raise TypeError(f"type '{Pipeline.__name__}' is not an acceptable base type")
 
+    def __reduce__(self) -> Tuple[Any, ...]:
+        """
+        Pipelines are pickled with their steps, e.g. to run in a process, but not their event handlers.
+        """
+        steps = self.__steps if isinstance(self.__steps, Sequence) else self.compile().source
+        return Pipeline, (steps, self.name, self.__tracing)
+
     # endregion
     # region Properties
 
@@ -56,9 +92,38 @@ class Pipeline(Filter):
     def steps(self) -> Iterable[Union[IStep, PipelineCallableT]]:
         return self.__steps
 
+    @steps.setter
+    def steps(self, value: Iterable[Union[IStep, PipelineCallableT]]) -> None:
+        self.__steps = cast(Iterable[Any], value)
+        self.__plan = None
+
+    @property
+    def plan(self) -> Optional[ExecutionPlan]:
+        return self.__plan
+
+    @property
+    def tracing(self) -> Tracing:
+        return self.__tracing
+
+    @tracing.setter
+    def tracing(self, value: Tracing) -> None:
+        self.__tracing = value
+
+    @property
+    def executors(self) -> Executors:
+        return self.__executors
+
+    @executors.setter
+    def executors(self, value: Executors) -> None:
+        self.__executors = value
+        self.__plan = None
+
     @property
     def manifest(self) -> Manifest:
-        return cast(Manifest, self.__manifest)
+        """
+        The manifest of the last run in the current thread, or None if it wasn't traced.
+        """
+        return cast("Manifest", materialize(getattr(self.__local, "manifest", None)))
 
     # region Event Handlers
 
@@ -77,59 +142,342 @@ class Pipeline(Filter):
     # endregion
     # region Runners
 
+    def compile(self) -> ExecutionPlan:
+        """
+        Resolves the steps into an execution plan that is reused across runs.
+        The plan is compiled on the first run, and recompiled if the steps change.
+        Nested pipelines without start or end handlers are inlined into the plan.
+        """
+        self.__plan = compile_plan(self.__steps, self.__executors)
+        return self.__inline(self.__plan)
+
+    def freeze(self, trace: Union[bool, Tracing, None] = None) -> FrozenPipeline:
+        """
+        Generates a function that runs the steps as straight-line code.
+        Nested pipelines and switches are inlined. Steps and event handlers are
+        fixed when the pipeline is frozen, so freeze it again after changing them.
+
+        Args:
+            trace (Union[bool, Tracing, None], optional):
+            Whether runs create a manifest. True is FULL and False is OFF.
+            Defaults to None, which uses the tracing of the pipeline.
+        """
+        if trace is None:
+            tracing = self.__tracing
+        elif isinstance(trace, Tracing):
+            tracing = trace
+        else:
+            tracing = FULL if trace else OFF
+        # Freezing and streaming are imported when they're used, so importing pipelines is faster
+        from pipelayer.freeze import FrozenPipeline
+
+        return FrozenPipeline(self, tracing)
+
+    def stream(
+        self,
+        records: Iterable[Any],
+        context: Optional[Context] = None,
+        workers: Union[int, Sequence[int]] = 1,
+        maxsize: Optional[int] = None,
+        ordered: bool = True
+    ) -> Stream:
+        """
+        Runs a stream of records through the pipeline, with each step running as a stage
+        in its own worker threads, e.g. for output in pipeline.stream(rows, workers=(1, 4, 1)).
+        A record that exits the pipeline skips the remaining stages. Streams aren't traced,
+        and the pipeline's events aren't raised for each record.
+
+        Args:
+            records (Iterable[Any]):
+            The data of each run.
+
+            context (Optional[Context], optional):
+            The context shared by the runs. Defaults to None, which creates one.
+
+            workers (Union[int, Sequence[int]], optional):
+            The number of workers of each stage, or of every stage. Defaults to 1.
+
+            maxsize (Optional[int], optional):
+            The number of records that can wait for a stage before the stage before it waits.
+            Defaults to None, which is DEFAULT_MAXSIZE.
+
+            ordered (bool, optional):
+            Whether outputs are returned in the order of the records, or as they're finished.
+            Defaults to True.
+        """
+        plan = self.__get_plan()
+        if plan.is_async:
+            raise TypeError(f"Pipeline '{self.name}' has coroutine steps, so it can't be streamed")
+        from pipelayer.stream import DEFAULT_MAXSIZE, Stream
+
+        return Stream(
+            plan.steps, records, context or Context(), workers, DEFAULT_MAXSIZE if maxsize is None else maxsize, ordered
+        )
+
     def run(self, data: Any = None, context: Optional[Context] = None) -> Any:
         """
         The Pipeline runner
         """
-        data, self.__manifest = self._run(data, context or Context())
-        return data
+        return self.execute(data, context).data
+
+    def execute(self, data: Any = None, context: Optional[Context] = None) -> Execution:
+        """
+        Runs the pipeline, and returns the output and manifest of the run.
+        Unlike the manifest property, the result isn't shared with other runs.
+        """
+        data, manifest = self._run(data, context or Context())
+        return Execution(data, manifest)
+
+    async def arun(self, data: Any = None, context: Optional[Context] = None) -> Any:
+        """
+        Runs the pipeline from a coroutine. Coroutine functions and filters with a coroutine
+        run method are awaited, and other steps are called, or run in an executor if they're
+        declared with InExecutor.
+        """
+        return (await self.aexecute(data, context)).data
+
+    async def aexecute(self, data: Any = None, context: Optional[Context] = None) -> Execution:
+        data, manifest = await self._arun(data, context or Context())
+        return Execution(data, manifest)
 
     @raise_events
-    def _run(self, data: Any, context: Context) -> Tuple[Any, Manifest]:
+    def _run(self, data: Any, context: Context) -> Tuple[Any, Optional[Record]]:
+        plan = self.__get_plan()
+        if plan.is_async:
+            raise TypeError(f"Pipeline '{self.name}' has coroutine steps, so it must be run with arun()")
+
+        recorder, index, trace_token = start_trace(self.__tracing, self.name, StepType.PIPELINE)
+
+        execution = Execution()
+        token = current_execution.set(execution)
+        try:
+            data = self.__run_plan(plan, execution, recorder, index, data, context)
+        finally:
+            current_execution.reset(token)
+            end_trace(trace_token)
+
+        record = None
+        if recorder is not None:
+            if trace_token is not None:
+                recorder.close(index)
+            record = Record(recorder, index)
+        self.__local.manifest = record
+
+        return data, record
 
-        manifest = create_manifest(self.name, StepType.PIPELINE)
+    @raise_events
+    async def _arun(self, data: Any, context: Context) -> Tuple[Any, Optional[Record]]:
+        plan = self.__get_plan()
+
+        recorder, index, trace_token = start_trace(self.__tracing, self.name, StepType.PIPELINE)
+
+        execution = Execution()
+        token = current_execution.set(execution)
+        try:
+            data = await self.__arun_plan(plan, execution, recorder, index, data, context)
+        finally:
+            current_execution.reset(token)
+            end_trace(trace_token)
+
+        record = None
+        if recorder is not None:
+            # The CPU time of the thread includes the coroutines that ran while the step awaited
+            recorder.set_cpu_time(index, None)
+            if trace_token is not None:
+                recorder.close(index)
+            record = Record(recorder, index)
+        self.__local.manifest = record
+
+        return data, record
+
+    def __get_plan(self) -> ExecutionPlan:
+        plan = self.__plan
+        if plan is None or not plan.is_compiled_from(self.__steps):
+            return self.compile()
+        if plan.flat is None:
+            return self.__inline(plan)
+        return plan
+
+    def __run_plan(
+        self,
+        plan: ExecutionPlan,
+        execution: Execution,
+        recorder: Optional[Recorder],
+        index: int,
+        data: Any,
+        context: Context
+    ) -> Any:
+        """
+        Runs the steps, recording them under the step at index. Untraced runs have no recorder.
+        """
+        flat = cast(tuple, plan.flat)
+        parents = [index]
 
-        for s, s_name, s_type, s_func in map(initialize_step, self.steps):  # type: ignore
+        position = 0
+        count = len(flat)
+        while position < count:
+            op, entry, owner, next_position, exit_to = flat[position]
 
-            s_manifest = create_manifest(s_name, s_type)
+            if op == OP_LEAVE:
+                entry.step.__local.manifest = self.__end_step(owner, recorder, parents.pop(), data)
+                position = next_position
+                continue
 
-            if isinstance(s, IFilter):
-                s.exit += self._handle_exit
+            s_index = recorder.open(entry.name, entry.step_type, parents[-1]) if recorder is not None else -1
 
-                if isinstance(s, ICompoundStep):
-                    data, m_fest = s_func(data, context)
-                    s_manifest.steps = cast(Manifest, m_fest).steps
-                else:
-                    data = s_func(data, context)
+            if op == OP_ENTER and not (entry.step.start or entry.step.end):
+                parents.append(s_index)
+                position += 1
+                continue
 
-                if self.__exit_pipeline:
-                    close_manifest(s_manifest)
-                    self._on_step_end(PipelineEventArgs(data, s_manifest))
-                    manifest.steps.append(s_manifest)
-                    break
+            data = self.__run_step(entry, recorder, s_index, data, context)
+            self.__end_step(owner, recorder, s_index, data)
 
+            if execution.exiting:
+                execution.exiting = False
+                position = exit_to
             else:
-                data = s_func(data, context)
+                position = next_position
 
-            close_manifest(s_manifest)
-            self._on_step_end(PipelineEventArgs(data, s_manifest))
-            manifest.steps.append(s_manifest)
+        return data
 
-        close_manifest(manifest)
+    def __run_step(self, entry: PlanStep, recorder: Optional[Recorder], index: int, data: Any, context: Context) -> Any:
+        """
+        Runs a step. Compound steps record their steps under the step at index.
+        """
+        s, s_func = entry.bind()
+        try:
+            if not entry.is_filter:
+                return s_func(data, context)
+
+            with subscribe(cast(IFilter, s).exit, self._handle_exit):
+                if not entry.is_compound:
+                    return s_func(data, context)
+                if recorder is None:
+                    token = start_untraced()
+                    try:
+                        return s_func(data, context)[0]
+                    finally:
+                        end_trace(token)
+                recorder.begin_compound(index)
+                data, manifest = s_func(data, context)
+                recorder.end_compound(index, manifest)
+                return data
+        finally:
+            entry.release(s)
+
+    async def __arun_plan(
+        self,
+        plan: ExecutionPlan,
+        execution: Execution,
+        recorder: Optional[Recorder],
+        index: int,
+        data: Any,
+        context: Context
+    ) -> Any:
+        """
+        Runs the steps from a coroutine, like __run_plan.
+        """
+        flat = cast(tuple, plan.flat)
+        parents = [index]
+
+        position = 0
+        count = len(flat)
+        while position < count:
+            op, entry, owner, next_position, exit_to = flat[position]
+
+            if op == OP_LEAVE:
+                entry.step.__local.manifest = self.__end_step(owner, recorder, parents.pop(), data)
+                position = next_position
+                continue
+
+            s_index = recorder.open(entry.name, entry.step_type, parents[-1]) if recorder is not None else -1
+
+            if op == OP_ENTER and not (entry.step.start or entry.step.end):
+                if recorder is not None:
+                    # The steps of the inlined pipeline may await
+                    recorder.set_cpu_time(s_index, None)
+                parents.append(s_index)
+                position += 1
+                continue
+
+            data = await self.__arun_step(entry, recorder, s_index, data, context)
+            self.__end_step(owner, recorder, s_index, data)
+
+            if execution.exiting:
+                execution.exiting = False
+                position = exit_to
+            else:
+                position = next_position
+
+        return data
+
+    async def __arun_step(
+        self, entry: PlanStep, recorder: Optional[Recorder], index: int, data: Any, context: Context
+    ) -> Any:
+        s, s_func = entry.bind()
+        try:
+            if not entry.is_filter:
+                return await run_step_async(entry, s, s_func, data, context, recorder, index)
+
+            with subscribe(cast(IFilter, s).exit, self._handle_exit):
+                if not entry.is_compound:
+                    return await run_step_async(entry, s, s_func, data, context, recorder, index)
+                if recorder is None:
+                    token = start_untraced()
+                    try:
+                        return (await run_step_async(entry, s, s_func, data, context, recorder, index))[0]
+                    finally:
+                        end_trace(token)
+                recorder.begin_compound(index)
+                data, manifest = await run_step_async(entry, s, s_func, data, context, recorder, index)
+                recorder.end_compound(index, manifest)
+                return data
+        finally:
+            entry.release(s)
+
+    @staticmethod
+    def __end_step(owner: Pipeline, recorder: Optional[Recorder], index: int, data: Any) -> Optional[Record]:
+        record = None
+        if recorder is not None:
+            recorder.close(index)
+            record = Record(recorder, index)
+        if owner.step_end:
+            owner._on_step_end(PipelineEventArgs(data, record))
+        return record
+
+    def __inline(self, plan: ExecutionPlan) -> ExecutionPlan:
+        self.__plan = inline_plan(self, plan, self.__get_inline_plan)
+        return self.__plan
+
+    def __get_inline_plan(self, entry: PlanStep) -> Optional[ExecutionPlan]:
+        """
+        Returns the plan of a nested pipeline that can be inlined.
+        Pipelines with start or end handlers are run as a step, so their events are raised.
+        """
+        pipeline = entry.step
+        if entry.lifecycle or type(pipeline) is not Pipeline or pipeline.start or pipeline.end:
+            return None
 
-        return data, manifest
+        plan = pipeline.__plan
+        if plan is None or not plan.is_compiled_from(pipeline.__steps):
+            plan = pipeline.__plan = compile_plan(pipeline.__steps, pipeline.__executors)
+        return plan
 
     # endregion
     # region
 
     def _on_step_end(self, args: PipelineEventArgs) -> None:
-        [e(self, args) for e in self.step_end]
+        for handler in self.step_end:
+            handler(self, args)
 
     # endregion
 
     # region Event Handlers
 
     def _handle_exit(self, sender: IFilter, args: FilterEventArgs) -> None:
-        self.__exit_pipeline = args.action is Action.EXIT
+        execution = current_execution.get()
+        if execution is not None:
+            execution.exiting = args.action is Action.EXIT
 
     # endregion
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+from inspect import iscoroutinefunction
+from operator import is_
+from typing import (Any, Callable, Iterable, Iterator, List, NamedTuple,
+                    Optional, Sequence, Set, Tuple, Union, cast)
+
+from pipelayer.enum import ExecutorKind, StepType
+from pipelayer.executor import (DEFAULT_EXECUTORS, Executors, InExecutor,
+                                get_executor_kind, get_thread_pool,
+                                is_worker_process)
+from pipelayer.lifecycle import (Lifecycle, Scoped, create_lifecycle,
+                                 get_scope)
+from pipelayer.protocol import IStep, PipelineCallableT
+from pipelayer.step import (classify_step, get_step, get_step_func,
+                            get_step_name, is_proxy, is_step_type)
+
+
+class PlanStep(NamedTuple):
+    """
+    A step resolved at compile time.
+    """
+    step: Any
+    name: str
+    step_type: StepType
+    func: Callable[..., Any]
+    is_filter: bool
+    is_compound: bool
+    lifecycle: Optional[Lifecycle] = None
+    is_async: bool = False
+    executor: Optional[InExecutor] = None
+
+    def bind(self) -> Tuple[Any, Callable[..., Any]]:
+        """
+        Returns the step instance and callable for a single run.
+        Steps passed as classes get their instance from their lifecycle,
+        and return it with release.
+        """
+        if self.lifecycle is None:
+            return self.step, self.func
+        step = self.lifecycle.acquire()
+        return step, getattr(step, "_run" if self.is_compound else "run")
+
+    def release(self, step: Any) -> None:
+        if self.lifecycle is not None:
+            self.lifecycle.release(step)
+
+
+# Flat step operations
+OP_STEP = 0
+OP_ENTER = 1
+OP_LEAVE = 2
+
+
+class FlatStep(NamedTuple):
+    """
+    An operation in a plan with nested pipelines inlined.
+    ENTER and LEAVE mark the steps of an inlined pipeline, and ENTER runs the
+    pipeline as a single step if it has start or end handlers.
+    """
+    op: int
+    entry: PlanStep
+    owner: Any
+    next: int
+    exit_to: int
+
+
+class ExecutionPlan:
+    """
+    An immutable, pre-resolved sequence of steps.
+    """
+    __slots__ = ("__source", "__executors", "__steps", "__flat", "__inlined", "__is_async")
+
+    def __init__(
+        self,
+        source: Tuple[Any, ...],
+        steps: Tuple[PlanStep, ...],
+        flat: Optional[Tuple[FlatStep, ...]] = None,
+        inlined: Tuple[Tuple[Any, ExecutionPlan], ...] = (),
+        executors: Optional[Executors] = DEFAULT_EXECUTORS
+    ) -> None:
+        self.__source = source
+        self.__executors = executors
+        self.__steps = steps
+        self.__flat = flat
+        self.__inlined = inlined
+        self.__is_async = any(entry.is_async for entry in steps) or any(op.entry.is_async for op in flat or ())
+
+    @property
+    def source(self) -> Tuple[Any, ...]:
+        return self.__source
+
+    @property
+    def executors(self) -> Optional[Executors]:
+        """
+        The executors the steps were dispatched to, or None if they weren't dispatched.
+        """
+        return self.__executors
+
+    @property
+    def steps(self) -> Tuple[PlanStep, ...]:
+        return self.__steps
+
+    @property
+    def flat(self) -> Optional[Tuple[FlatStep, ...]]:
+        """
+        The steps with nested pipelines inlined, or None if they haven't been inlined.
+        """
+        return self.__flat
+
+    @property
+    def is_async(self) -> bool:
+        """
+        True if a step, or a step of an inlined pipeline, is a coroutine function.
+        """
+        return self.__is_async
+
+    def is_compiled_from(self, steps: Iterable[Any]) -> bool:
+        """
+        Returns False if the steps, or the steps or executors of an inlined pipeline,
+        have changed since the plan was compiled.
+        """
+        return _is_source(self.__source, steps) and all(
+            _is_source(plan.source, pipeline.steps) and plan.executors is pipeline.executors
+            for pipeline, plan in self.__inlined
+        )
+
+    def __iter__(self) -> Iterator[PlanStep]:
+        return iter(self.__steps)
+
+    def __len__(self) -> int:
+        return len(self.__steps)
+
+
+def compile_step(
+    step: Union[IStep, PipelineCallableT, Scoped, InExecutor],
+    executors: Optional[Executors] = DEFAULT_EXECUTORS
+) -> PlanStep:
+    """
+    Resolves a step. Steps declared with runs_in are dispatched to the executors,
+    unless executors is None.
+    """
+    if isinstance(step, InExecutor):
+        return compile_step(step.step, None)._replace(executor=step)
+    if executors is not None:
+        dispatched = _dispatch_step(step, executors)
+        if dispatched is not None:
+            return dispatched
+
+    lifecycle: Optional[Lifecycle] = None
+    if isinstance(step, Scoped):
+        lifecycle = step.lifecycle
+        instance: Any = lifecycle.peek()
+    elif is_step_type(step):
+        scope, factory, pool_size = get_scope(cast(type, step))
+        lifecycle = create_lifecycle(scope, factory or cast(Callable[[], IStep], step), pool_size)
+        # The instance the step is compiled from is the first instance a run gets
+        instance = lifecycle.peek()
+    else:
+        instance = get_step(step)
+
+    kind = classify_step(instance)
+    func = get_step_func(instance)
+    return PlanStep(
+        step=instance,
+        name=get_step_name(instance),
+        step_type=kind.step_type,
+        func=func,
+        is_filter=kind.is_filter,
+        is_compound=kind.is_compound,
+        lifecycle=lifecycle,
+        is_async=not kind.is_compound and iscoroutinefunction(instance.func if is_proxy(instance) else func)
+    )
+
+
+def _dispatch_step(step: Any, executors: Executors) -> Optional[PlanStep]:
+    kind = get_executor_kind(step)
+    if kind is ExecutorKind.IO:
+        return compile_step(InExecutor(step, executors.io or get_thread_pool()), None)
+    if kind is ExecutorKind.CPU and not is_worker_process():
+        from pipelayer.process import InProcess
+        return compile_step(InProcess(step, executors.cpu), None)
+    return None
+
+
+def compile_plan(
+    steps: Iterable[Union[IStep, PipelineCallableT, Scoped, InExecutor]],
+    executors: Optional[Executors] = DEFAULT_EXECUTORS
+) -> ExecutionPlan:
+    source = tuple(steps)
+    return ExecutionPlan(source, tuple(compile_step(step, executors) for step in source), executors=executors)
+
+
+def inline_plan(
+    owner: Any,
+    plan: ExecutionPlan,
+    expand: Callable[[PlanStep], Optional[ExecutionPlan]]
+) -> ExecutionPlan:
+    """
+    Flattens the plan, inlining the steps of each nested pipeline that expand returns a plan for.
+    A pipeline isn't inlined into itself.
+    """
+    flat: List[List[Any]] = []
+    inlined: List[Tuple[Any, ExecutionPlan]] = []
+    _inline_steps(owner, plan, expand, flat, inlined, {id(owner)})
+    return ExecutionPlan(
+        plan.source, plan.steps, tuple(FlatStep(*op) for op in flat), tuple(inlined), plan.executors
+    )
+
+
+def _inline_steps(
+    owner: Any,
+    plan: ExecutionPlan,
+    expand: Callable[[PlanStep], Optional[ExecutionPlan]],
+    flat: List[List[Any]],
+    inlined: List[Tuple[Any, ExecutionPlan]],
+    seen: Set[int]
+) -> None:
+    level = []
+    for entry in plan.steps:
+        nested = None if id(entry.step) in seen else expand(entry)
+        enter = len(flat)
+        level.append(enter)
+        if nested is None:
+            flat.append([OP_STEP, entry, owner, enter + 1, -1])
+            continue
+
+        flat.append([OP_ENTER, entry, owner, -1, -1])
+        inlined.append((entry.step, nested))
+        seen.add(id(entry.step))
+        _inline_steps(entry.step, nested, expand, flat, inlined, seen)
+        seen.discard(id(entry.step))
+        flat[enter][3] = len(flat) + 1
+        flat.append([OP_LEAVE, entry, owner, len(flat) + 1, -1])
+
+    # Exiting skips to the end of the pipeline, which is the LEAVE of an inlined pipeline
+    end = len(flat)
+    for index in level:
+        flat[index][4] = end
+
+
+def _is_source(source: Tuple[Any, ...], steps: Iterable[Any]) -> bool:
+    """
+    Iterables that are not sequences can only be consumed once, so they are never stale.
+    """
+    if not isinstance(steps, Sequence):
+        return True
+    return len(source) == len(steps) and all(map(is_, source, steps))
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import pickle
+import threading
+from asyncio import wrap_future
+from concurrent.futures import Executor, Future
+from time import perf_counter_ns
+from typing import (TYPE_CHECKING, Any, Callable, Dict, Iterable, List,
+                    Optional, Tuple, Union, cast)
+from uuid import uuid4
+
+from pipelayer.case import run_case
+from pipelayer.context import Context
+from pipelayer.enum import Action, ExecutorKind, State, StepType
+from pipelayer.event_args import FilterEventArgs
+from pipelayer.execution import Execution
+from pipelayer.executor import get_process_pool, mark_worker_process
+from pipelayer.filter import Filter, raise_events
+from pipelayer.plan import PlanStep, compile_step
+from pipelayer.protocol import IFilter, IStep
+from pipelayer.recorder import CpuTimeRecorder, Record, Recorder, materialize
+from pipelayer.step import get_step_name
+from pipelayer.tracing import FULL, OFF, Tracing, end_trace, start_trace
+from pipelayer.transport import SharedBlocks, SharedMemoryTransport, discard
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pipelayer.manifest import Manifest
+
+# The result of a run in a process: its output, its record, whether it exited, and when it started
+ProcessResult = Tuple[Any, Optional[Record], bool, int]
+
+
+class InProcess(Filter):
+    """
+    Runs a step in a process pool, so CPU-bound steps run in parallel across cores,
+    e.g. InProcess(map_users, context_keys=("settings",)).
+
+    The step, data and output are pickled. Steps can be module-level functions, importable
+    classes, or pipelines, switches, routers and parallel steps of them, which are pickled
+    without their event handlers. The step is pickled once, and is unpickled once per process.
+    The context isn't sent to the process: the step gets a Context with the attributes named
+    by context_keys, and changes to it aren't copied back.
+
+    The manifest of the run in the process is the InProcess step's only child.
+    """
+    # region Constructors
+
+    def __init__(self,
+                 step: Union[IStep, Callable[[Any, Context], Any]],
+                 executor: Optional[Executor] = None,
+                 context_keys: Iterable[str] = (),
+                 name: Optional[str] = "",
+                 transport: Optional[SharedMemoryTransport] = None) -> None:
+        """
+        Args:
+            step (Union[Step, PipelineCallableT]):
+            The step that runs in the process.
+
+            executor (Optional[Executor], optional):
+            The process pool. Defaults to None, which uses the process pool shared by pipelines.
+
+            context_keys (Iterable[str], optional):
+            The context attributes that are pickled and sent with the data. Defaults to ().
+
+            name (Optional[str], optional):
+            Used by the Manifest. Defaults to "", which uses the name of the step.
+
+            transport (Optional[SharedMemoryTransport], optional):
+            Sends large buffers in the data and output through shared memory.
+            Defaults to None, which pickles them with the rest of the data.
+        """
+        super().__init__(name or get_step_name(step))
+        self.__step = step
+        self.__executor = executor
+        self.__context_keys = tuple(context_keys)
+        self.__transport = transport
+        # Identifies the pickled step in the processes it's been sent to
+        self.__key = uuid4().hex
+        self.__payload: Optional[bytes] = None
+        self.__local = threading.local()
+
+    def __init_subclass__(cls, **kwargs: Any):
+        raise TypeError(f"type '{InProcess.__name__}' is not an acceptable base type")
+
+    # endregion
+    # region Properties
+
+    @property
+    def step(self) -> Union[IStep, Callable[[Any, Context], Any]]:
+        return self.__step
+
+    @property
+    def executor(self) -> Optional[Executor]:
+        return self.__executor
+
+    @property
+    def context_keys(self) -> Tuple[str, ...]:
+        return self.__context_keys
+
+    @property
+    def transport(self) -> Optional[SharedMemoryTransport]:
+        return self.__transport
+
+    @property
+    def manifest(self) -> Manifest:
+        """
+        The manifest of the last run in the current thread, or None if it wasn't traced.
+        """
+        return cast("Manifest", materialize(getattr(self.__local, "manifest", None)))
+
+    # endregion
+    # region Runners
+
+    def run(self, data: Any = None, context: Optional[Context] = None) -> Any:
+        return self.execute(data, context).data
+
+    def execute(self, data: Any = None, context: Optional[Context] = None) -> Execution:
+        """
+        Runs the step in the process pool, and returns the output and manifest of the run.
+        """
+        data, manifest = self._run(data, context or Context())
+        return Execution(data, manifest)
+
+    async def arun(self, data: Any = None, context: Optional[Context] = None) -> Any:
+        """
+        Runs the step in the process pool from a coroutine, without blocking the event loop.
+        """
+        return (await self.aexecute(data, context)).data
+
+    async def aexecute(self, data: Any = None, context: Optional[Context] = None) -> Execution:
+        data, manifest = await self._arun(data, context or Context())
+        return Execution(data, manifest)
+
+    @raise_events
+    def _run(self, data: Any, context: Context) -> Tuple[Any, Optional[Record]]:
+        recorder, index, trace_token = start_trace(FULL, self.name, StepType.FILTER)
+        try:
+            future, submitted = self.__submit(data, context, recorder)
+            result = future.result()
+        finally:
+            end_trace(trace_token)
+
+        return self.__finish(result, submitted, context, recorder, index, trace_token is not None)
+
+    @raise_events
+    async def _arun(self, data: Any, context: Context) -> Tuple[Any, Optional[Record]]:
+        recorder, index, trace_token = start_trace(FULL, self.name, StepType.FILTER)
+        try:
+            future, submitted = self.__submit(data, context, recorder)
+            result = await wrap_future(future)
+        finally:
+            end_trace(trace_token)
+
+        if recorder is not None:
+            # The CPU time of the thread includes the coroutines that ran while the step was awaited
+            recorder.set_cpu_time(index, None)
+
+        return self.__finish(result, submitted, context, recorder, index, trace_token is not None)
+
+    def __submit(
+        self, data: Any, context: Context, recorder: Optional[Recorder]
+    ) -> Tuple[Future[ProcessResult], int]:
+        """
+        Submits the run to the process pool, and returns its future and the time it was submitted.
+        """
+        if self.__payload is None:
+            self.__payload = pickle.dumps(self.__step, pickle.HIGHEST_PROTOCOL)
+        values = [(key, getattr(context, key)) for key in self.__context_keys if hasattr(context, key)]
+        # The process records the step if this run is traced
+        tracing = OFF if recorder is None else Tracing(FULL.level, cpu_time=isinstance(recorder, CpuTimeRecorder))
+
+        transport = self.__transport
+        if transport is None:
+            submitted = perf_counter_ns()
+            return (self.__executor or get_process_pool()).submit(
+                _run_in_process, self.__key, self.__payload, data, values, tracing, None
+            ), submitted
+
+        payload = transport.pack(data)
+        submitted = perf_counter_ns()
+        try:
+            future = (self.__executor or get_process_pool()).submit(
+                _run_in_process, self.__key, self.__payload, payload, values, tracing, transport
+            )
+        except BaseException:
+            discard(payload)
+            raise
+        # The process unlinks the blocks it receives, and the ones it didn't are unlinked when the call ends
+        future.add_done_callback(lambda _: discard(payload))
+        return future, submitted
+
+    def __finish(
+        self,
+        result: ProcessResult,
+        submitted: int,
+        context: Context,
+        recorder: Optional[Recorder],
+        index: int,
+        is_root: bool
+    ) -> Tuple[Any, Optional[Record]]:
+        """
+        Raises the exit event if the step exited, and adds the manifest of the process to the run's.
+        """
+        data, child, exited, started = result
+        if self.__transport is not None:
+            data, blocks = self.__transport.unpack(data)
+            blocks.release()
+
+        if exited:
+            args = FilterEventArgs(data, context, State.EXITING)
+            args.action = Action.EXIT
+            self._on_exit(args)
+            data = args.data
+
+        record = None
+        if recorder is not None:
+            recorder.dispatch(index, ExecutorKind.CPU, started - submitted)
+            recorder.attach(index, cast(Record, child))
+            if is_root:
+                recorder.close(index)
+            record = Record(recorder, index)
+        self.__local.manifest = record
+
+        return data, record
+
+    # endregion
+
+
+# The steps unpickled in this process, by key
+_steps: Dict[str, PlanStep] = {}
+_MAX_STEPS = 256
+
+
+def _load_step(key: str, payload: bytes) -> PlanStep:
+    entry = _steps.get(key)
+    if entry is None:
+        # CPU steps of the step run inline, as this process is a worker of the pool it was sent to
+        mark_worker_process()
+        if len(_steps) >= _MAX_STEPS:
+            _steps.clear()
+        entry = _steps[key] = compile_step(pickle.loads(payload), None)
+    return entry
+
+
+def _run_in_process(
+    key: str,
+    payload: bytes,
+    data: Any,
+    values: List[Tuple[str, Any]],
+    tracing: Tracing,
+    transport: Optional[SharedMemoryTransport]
+) -> ProcessResult:
+    """
+    Runs a pickled step in a worker process, and returns its output and record.
+    """
+    started = perf_counter_ns()
+    entry = _load_step(key, payload)
+    context = Context()
+    for name, value in values:
+        setattr(context, name, value)
+
+    exits: List[FilterEventArgs] = []
+
+    def handle_exit(sender: IFilter, args: FilterEventArgs) -> None:
+        if args.action is Action.EXIT:
+            exits.append(args)
+
+    blocks: Optional[SharedBlocks] = None
+    if transport is not None:
+        data, blocks = transport.unpack(data)
+
+    recorder, index, trace_token = start_trace(tracing, entry.name, entry.step_type)
+    try:
+        data = run_case(entry, data, context, recorder, index, handle_exit)
+        output = data if transport is None else transport.pack(data)
+    finally:
+        end_trace(trace_token)
+        data = None
+        if blocks is not None:
+            blocks.release()
+
+    if recorder is None:
+        return output, None, bool(exits), started
+    recorder.close(index)
+    return output, Record(recorder, index), bool(exits), started
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+from array import array
+from datetime import datetime, timedelta
+from time import perf_counter_ns, thread_time_ns, time_ns
+from typing import (TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional,
+                    Tuple, Union, cast)
+
+from pipelayer.enum import ExecutorKind, StepType
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pipelayer.manifest import Manifest
+
+
+_EPOCH = datetime(1970, 1, 1)
+_NOT_DISPATCHED = (None, None)
+
+
+class Recorder:
+    """
+    Records the steps of a run into flat arrays, indexed by the order the steps started in.
+    The Manifest of a step is created when it's first read, so runs whose manifest isn't read
+    don't create one.
+
+    Steps are timed with the monotonic perf_counter_ns, and the wall clock is read once,
+    when the recorder is created, to convert the times into timestamps.
+    """
+    __slots__ = (
+        "names", "step_types", "starts", "ends", "parents", "step", "anchor", "__grafted", "__dispatches", "__manifests"
+    )
+
+    def __init__(self) -> None:
+        self.names: List[str] = []
+        self.step_types: List[StepType] = []
+        self.starts = array("q")
+        self.ends = array("q")
+        self.parents = array("q")
+        # The step that the next compound step run records its steps under
+        self.step = -1
+        # Converts a perf_counter_ns time into nanoseconds since the epoch
+        self.anchor = time_ns() - perf_counter_ns()
+        self.__grafted: Dict[int, List[Union[Manifest, Record]]] = {}
+        # The executors that steps were dispatched to, and how long they waited for them
+        self.__dispatches: Dict[int, Tuple[ExecutorKind, int]] = {}
+        self.__manifests: Dict[int, Manifest] = {}
+
+    def open(self, name: str, step_type: StepType, parent: int) -> int:
+        """
+        Records the start of a step, and returns its index.
+        """
+        index = len(self.names)
+        self.names.append(name)
+        self.step_types.append(step_type)
+        self.parents.append(parent)
+        self.ends.append(-1)
+        self.starts.append(perf_counter_ns())
+        return index
+
+    def close(self, index: int) -> None:
+        self.ends[index] = perf_counter_ns()
+
+    def dispatch(self, index: int, executor: ExecutorKind, queue_wait_ns: int) -> None:
+        """
+        Records that the step at index ran in an executor, after waiting queue_wait_ns for it.
+        """
+        self.__dispatches[index] = (executor, queue_wait_ns)
+
+    def set_cpu_time(self, index: int, cpu_time_ns: Optional[int]) -> None:
+        """
+        Records the CPU time of a step that the thread's CPU time doesn't measure, e.g. a step that
+        ran in an executor, or None if it's unknown, e.g. for a step that awaited. Only recorders
+        that record CPU time record it.
+        """
+
+    def begin_compound(self, index: int) -> None:
+        """
+        Records the steps of the next compound step run under the step at index.
+        """
+        self.step = index
+
+    def end_compound(self, index: int, manifest: Union[Manifest, Record, None]) -> None:
+        """
+        Adds the steps of a manifest returned by a compound step that didn't record into this recorder.
+        """
+        self.step = -1
+        if manifest is None or (type(manifest) is Record and manifest.recorder is self):
+            return
+        manifest = materialize(manifest)
+        if manifest is not None:
+            self.__grafted[index] = list(manifest.steps)
+
+    def attach(self, index: int, record: Record) -> None:
+        """
+        Adds a step recorded by another recorder under the step at index, e.g. a branch that ran in another thread.
+        """
+        self.__grafted.setdefault(index, []).append(record)
+
+    def branch(self) -> Recorder:
+        """
+        Returns an empty recorder of the same type, with the same clock, for steps that run concurrently.
+        """
+        recorder = type(self)()
+        recorder.anchor = self.anchor
+        return recorder
+
+    def take_step(self) -> int:
+        """
+        Returns the step that a compound step run records under, or -1 if the run wasn't started by a step.
+        """
+        index = self.step
+        self.step = -1
+        return index
+
+    def to_manifest(self, index: int = 0) -> Manifest:
+        """
+        Creates the Manifest of the step at index. Manifests of finished steps are cached.
+        """
+        # pydantic is only imported when a manifest is read
+        from pipelayer.manifest import Manifest, ManifestList
+
+        # A step's descendants start after it, and before its next sibling
+        parents = self.parents
+        children: Dict[int, List[int]] = {index: []}
+        for child in range(index + 1, len(parents)):
+            parent = parents[child]
+            if parent not in children:
+                break
+            children[parent].append(child)
+            children[child] = []
+
+        def build(i: int) -> Manifest:
+            manifest = self.__manifests.get(i)
+            if manifest is not None:
+                return manifest
+
+            steps = ManifestList(build(child) for child in children[i])
+            steps.extend(cast("Manifest", materialize(step)) for step in self.__grafted.get(i, ()))
+
+            start = self.starts[i]
+            end = self.ends[i]
+            duration_ns = end - start if end >= 0 else None
+            executor, queue_wait_ns = self.__dispatches.get(i, _NOT_DISPATCHED)
+            manifest = Manifest.construct(
+                name=self.names[i],
+                step_type=self.step_types[i].value,
+                start=_to_datetime(self.anchor + start),
+                end=_to_datetime(self.anchor + end) if end >= 0 else None,
+                duration=timedelta(microseconds=duration_ns / 1000) if duration_ns is not None else None,
+                duration_ns=duration_ns,
+                cpu_time_ns=self.cpu_time_ns(i),
+                executor=executor.value if executor is not None else None,
+                queue_wait_ns=queue_wait_ns,
+                steps=steps
+            )
+            if end >= 0:
+                self.__manifests[i] = manifest
+            return manifest
+
+        return build(index)
+
+    def cpu_time_ns(self, index: int) -> Optional[int]:
+        return None
+
+
+class CpuTimeRecorder(Recorder):
+    """
+    A Recorder that also records the CPU time of the thread running each step.
+    """
+    __slots__ = ("cpu_starts", "cpu_ends", "__cpu_times")
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.cpu_starts = array("q")
+        self.cpu_ends = array("q")
+        # The CPU times of steps that weren't measured by the recording thread
+        self.__cpu_times: Dict[int, Optional[int]] = {}
+
+    def open(self, name: str, step_type: StepType, parent: int) -> int:
+        self.cpu_ends.append(-1)
+        self.cpu_starts.append(thread_time_ns())
+        return super().open(name, step_type, parent)
+
+    def close(self, index: int) -> None:
+        super().close(index)
+        self.cpu_ends[index] = thread_time_ns()
+
+    def set_cpu_time(self, index: int, cpu_time_ns: Optional[int]) -> None:
+        self.__cpu_times[index] = cpu_time_ns
+
+    def cpu_time_ns(self, index: int) -> Optional[int]:
+        if index in self.__cpu_times:
+            return self.__cpu_times[index]
+        end = self.cpu_ends[index]
+        return end - self.cpu_starts[index] if end >= 0 else None
+
+
+class Record(NamedTuple):
+    """
+    A step recorded by a Recorder.
+    """
+    recorder: Recorder
+    step: int
+
+    def to_manifest(self) -> Manifest:
+        return self.recorder.to_manifest(self.step)
+
+
+def materialize(manifest: Union[Manifest, Record, None, Any]) -> Optional[Manifest]:
+    """
+    Returns the Manifest of a record, or the manifest if it isn't a record.
+    """
+    if type(manifest) is Record:
+        return manifest.to_manifest()
+    return cast(Optional["Manifest"], manifest)
+
+
+def _to_datetime(ns: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=ns // 1000)
@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Mapping as MappingABC
+from typing import (TYPE_CHECKING, Any, Callable, Dict, FrozenSet, Iterable,
+                    List, Mapping, NamedTuple, Optional, Tuple, Union, cast)
+
+from pipelayer.case import Labels, arun_case, record_case, run_case
+from pipelayer.context import Context
+from pipelayer.enum import StepType
+from pipelayer.execution import Execution
+from pipelayer.filter import Filter, raise_events
+from pipelayer.plan import PlanStep, compile_step
+from pipelayer.protocol import IStep
+from pipelayer.recorder import Record, materialize
+from pipelayer.tracing import FULL, end_trace, start_trace
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pipelayer.manifest import Manifest
+
+FieldT = Callable[[Any, Context], Any]
+
+
+class Rule(NamedTuple):
+    """
+    Routes data whose fields equal the values in when to the step.
+    A value can be Labels to match any of several values, and a rule without
+    conditions matches all data.
+    """
+    when: Mapping[str, Any]
+    step: Union[IStep, Callable[[Any, Context], Any]]
+    name: str = ""
+
+
+class Route(NamedTuple):
+    case: PlanStep
+    name: str
+
+
+class _Node(NamedTuple):
+    """
+    A decision tree node. Branches are followed by the value of the field, and other
+    is followed by values without a branch. Leaves have no field, and hold the route
+    of the first matching rule.
+    """
+    field: Optional[FieldT]
+    branches: Dict[Any, _Node]
+    other: _Node
+    route: Optional[Route]
+
+
+class RouteTable:
+    """
+    Rules compiled into a decision tree, which reads each field at most once per run.
+    """
+    __slots__ = ("__root", "__default")
+
+    def __init__(self, root: _Node, default: Optional[Route]) -> None:
+        self.__root = root
+        self.__default = default
+
+    def select(self, data: Any, context: Context) -> Optional[Route]:
+        node = self.__root
+        while node.field is not None:
+            value = node.field(data, context)
+            try:
+                node = node.branches.get(value, node.other)
+            except TypeError:
+                node = node.other
+        return node.route or self.__default
+
+
+class Router(Filter):
+    """
+    Routes data to the step of the first rule that matches its fields.
+    It implements the IFilter and ICompoundStep interface.
+    """
+    # region Constructors
+
+    def __init__(self,
+                 rules: Iterable[Rule],
+                 name: Optional[str] = "",
+                 fields: Optional[Mapping[str, FieldT]] = None,
+                 default: Optional[Union[IStep, Callable[[Any, Context], Any]]] = None) -> None:
+        """
+        Args:
+            rules (Iterable[Rule]):
+            The rules, in order of precedence.
+
+            name (Optional[str], optional):
+            Used by the Manifest. Defaults to "".
+
+            fields (Optional[Mapping[str, FieldT]], optional):
+            Functions with the signature (data: Any, context: Context) -> Any that read a field.
+            Fields without a function are read by key from mappings, otherwise by attribute.
+            Fields are evaluated in this order, then by the number of rules that use them.
+
+            default (Optional[Union[Step, PipelineCallableT]], optional):
+            The step that runs when no rule matches. Defaults to None,
+            which passes the data through.
+        """
+        super().__init__(name or self.__class__.__name__)
+        self.__rules: Tuple[Rule, ...] = tuple(rules)
+        self.__fields: Dict[str, FieldT] = dict(fields or {})
+        self.__default = default
+        self.__table: Optional[RouteTable] = None
+        self.__local = threading.local()
+
+    def __init_subclass__(cls, **kwargs: Any):
+        raise TypeError(f"type '{Router.__name__}' is not an acceptable base type")
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return Router, (self.__rules, self.name, self.__fields, self.__default)
+
+    # endregion
+    # region Properties
+
+    @property
+    def rules(self) -> Tuple[Rule, ...]:
+        return self.__rules
+
+    @property
+    def default(self) -> Optional[Union[IStep, Callable[[Any, Context], Any]]]:
+        return self.__default
+
+    @property
+    def table(self) -> Optional[RouteTable]:
+        return self.__table
+
+    @property
+    def manifest(self) -> Manifest:
+        """
+        The manifest of the last run in the current thread, or None if it wasn't traced.
+        """
+        return cast("Manifest", materialize(getattr(self.__local, "manifest", None)))
+
+    # endregion
+    # region Runners
+
+    def compile(self) -> RouteTable:
+        """
+        Compiles the rules into a decision tree. The tree is compiled on the first run.
+        """
+        self.__table = _compile_rules(self.__rules, self.__fields, self.__default)
+        return self.__table
+
+    def run(self, data: Any = None, context: Optional[Context] = None) -> Any:
+        return self.execute(data, context).data
+
+    def execute(self, data: Any = None, context: Optional[Context] = None) -> Execution:
+        """
+        Runs the router, and returns the output and manifest of the run.
+        """
+        data, manifest = self._run(data, context or Context())
+        return Execution(data, manifest)
+
+    async def arun(self, data: Any = None, context: Optional[Context] = None) -> Any:
+        """
+        Runs the router from a coroutine, like Pipeline.arun().
+        """
+        return (await self.aexecute(data, context)).data
+
+    async def aexecute(self, data: Any = None, context: Optional[Context] = None) -> Execution:
+        data, manifest = await self._arun(data, context or Context())
+        return Execution(data, manifest)
+
+    @raise_events
+    def _run(self, data: Any, context: Context) -> Tuple[Any, Optional[Record]]:
+        table = self.__table or self.compile()
+
+        recorder, index, trace_token = start_trace(FULL, self.name, StepType.ROUTER)
+        try:
+            route = table.select(data, context)
+            if recorder is None:
+                if route is not None:
+                    data = run_case(route.case, data, context, None, -1)
+            elif route is None:
+                recorder.close(record_case(recorder, None, index))
+            else:
+                route_index = recorder.open(route.name, route.case.step_type, index)
+                data = run_case(route.case, data, context, recorder, route_index)
+                recorder.close(route_index)
+        finally:
+            end_trace(trace_token)
+
+        record = None
+        if recorder is not None:
+            if trace_token is not None:
+                recorder.close(index)
+            record = Record(recorder, index)
+        self.__local.manifest = record
+
+        return data, record
+
+    @raise_events
+    async def _arun(self, data: Any, context: Context) -> Tuple[Any, Optional[Record]]:
+        table = self.__table or self.compile()
+
+        recorder, index, trace_token = start_trace(FULL, self.name, StepType.ROUTER)
+        try:
+            route = table.select(data, context)
+            if recorder is None:
+                if route is not None:
+                    data = await arun_case(route.case, data, context, None, -1)
+            elif route is None:
+                recorder.close(record_case(recorder, None, index))
+            else:
+                route_index = recorder.open(route.name, route.case.step_type, index)
+                data = await arun_case(route.case, data, context, recorder, route_index)
+                recorder.close(route_index)
+        finally:
+            end_trace(trace_token)
+
+        record = None
+        if recorder is not None:
+            # The CPU time of the thread includes the coroutines that ran while the step awaited
+            recorder.set_cpu_time(index, None)
+            if trace_token is not None:
+                recorder.close(index)
+            record = Record(recorder, index)
+        self.__local.manifest = record
+
+        return data, record
+
+    # endregion
+
+
+def _compile_rules(
+    rules: Tuple[Rule, ...],
+    fields: Mapping[str, FieldT],
+    default: Optional[Union[IStep, Callable[[Any, Context], Any]]]
+) -> RouteTable:
+    conditions = [_get_conditions(rule) for rule in rules]
+    routes = [_create_route(rule.step, rule.name) for rule in rules]
+
+    # Fields that split more rules are read first
+    names: Dict[str, int] = {name: 0 for name in fields}
+    for when in conditions:
+        for name in when:
+            names[name] = names.get(name, 0) + 1
+    order = list(fields) + sorted((n for n in names if n not in fields), key=lambda n: -names[n])
+    readers = [fields.get(name) or _create_field_reader(name) for name in order]
+
+    nodes: Dict[Tuple[int, Tuple[int, ...]], _Node] = {}
+
+    def build(depth: int, candidates: Tuple[int, ...]) -> _Node:
+        key = (depth, candidates)
+        node = nodes.get(key)
+        if node is not None:
+            return node
+
+        # The first candidate matches if it has no conditions left
+        if not candidates or not any(name in conditions[candidates[0]] for name in order[depth:]):
+            node = _Node(None, {}, cast(_Node, None), routes[candidates[0]] if candidates else None)
+        else:
+            name = order[depth]
+            constrained = [i for i in candidates if name in conditions[i]]
+            if not constrained:
+                node = build(depth + 1, candidates)
+            else:
+                values: Dict[Any, None] = {}
+                for i in constrained:
+                    values.update(dict.fromkeys(conditions[i][name]))
+                node = _Node(
+                    readers[depth],
+                    {
+                        value: build(depth + 1, tuple(
+                            i for i in candidates if name not in conditions[i] or value in conditions[i][name]
+                        ))
+                        for value in values
+                    },
+                    build(depth + 1, tuple(i for i in candidates if name not in conditions[i])),
+                    None
+                )
+
+        nodes[key] = node
+        return node
+
+    return RouteTable(
+        build(0, tuple(range(len(rules)))),
+        _create_route(default, "") if default else None
+    )
+
+
+def _get_conditions(rule: Rule) -> Dict[str, FrozenSet[Any]]:
+    conditions: Dict[str, FrozenSet[Any]] = {}
+    for name, value in rule.when.items():
+        values: List[Any] = list(value.labels) if isinstance(value, Labels) else [value]
+        try:
+            conditions[name] = frozenset(values)
+        except TypeError:
+            raise TypeError(f"Router rule values must be hashable: {name}={value!r}") from None
+    return conditions
+
+
+def _create_route(step: Union[IStep, Callable[[Any, Context], Any]], name: str) -> Route:
+    case = compile_step(step)
+    return Route(case, name or case.name)
+
+
+def _create_field_reader(name: str) -> FieldT:
+    def read_field(data: Any, context: Context) -> Any:
+        if isinstance(data, MappingABC):
+            return data.get(name)
+        return getattr(data, name, None)
+
+    return read_field
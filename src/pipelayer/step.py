@@ -1,12 +1,57 @@
 from __future__ import annotations
 
 import inspect
-from typing import Any, Callable, Tuple, Union, cast
+from types import CodeType
+from typing import (Any, Callable, NamedTuple, Optional, Set, Tuple, Union,
+                    cast)
+from weakref import WeakKeyDictionary, WeakValueDictionary
 
 from pipelayer.context import Context
 from pipelayer.enum import StepType
 from pipelayer.exception import InvalidFilterException
-from pipelayer.protocol import ICompoundStep, IStep, PipelineCallableT
+from pipelayer.protocol import ICompoundStep, IFilter, IStep, PipelineCallableT
+
+
+class StepMetadata(NamedTuple):
+    name: str
+    step_type: StepType
+    signature: inspect.Signature
+    is_valid: bool
+
+
+# Metadata is keyed by code object, so closures and lambdas that are recreated
+# (e.g. a pipeline built per request) share a single entry.
+_metadata_cache: WeakKeyDictionary[CodeType, StepMetadata] = WeakKeyDictionary()
+
+# Proxies hold their function, so they are keyed by the function's id and only
+# cached for as long as something else (e.g. an execution plan) holds the proxy.
+_proxy_cache: WeakValueDictionary[int, _StepProxy] = WeakValueDictionary()
+
+
+def get_function_metadata(func: Callable[..., Any]) -> StepMetadata:
+    """
+    Returns the cached name, step type and signature of a function.
+    inspect.getsource and inspect.signature are only called the first time a code object is seen.
+    """
+    unwrapped = inspect.unwrap(func, stop=lambda f: hasattr(f, "__signature__"))
+    if hasattr(unwrapped, "__signature__"):
+        return _create_function_metadata(unwrapped)
+
+    code = unwrapped.__code__
+    metadata = _metadata_cache.get(code)
+    if metadata is None:
+        metadata = _metadata_cache[code] = _create_function_metadata(unwrapped)
+    return metadata
+
+
+def _create_function_metadata(func: Callable[..., Any]) -> StepMetadata:
+    signature = inspect.signature(func)
+    return StepMetadata(
+        name=f"<{inspect.getsource(func).strip()}>" if func.__name__ == "<lambda>" else func.__name__,
+        step_type=StepType.FUNCTION,
+        signature=signature,
+        is_valid=len(signature.parameters) == 2
+    )
 
 
 class _StepProxy:
@@ -18,6 +63,10 @@ class _StepProxy:
         self.__func = func
         self.__name = ""
 
+    @property
+    def func(self) -> Callable[..., Any]:
+        return cast(Callable[..., Any], self.__func)
+
     @property
     def name(self) -> str:
         if not self.__name:
@@ -28,6 +77,140 @@ class _StepProxy:
         return self.__func(data, context)
 
 
+# region Classification
+
+class StepKind(NamedTuple):
+    step_type: StepType
+    is_step: bool
+    is_filter: bool
+    is_compound: bool
+
+
+class _DynamicStepKind(NamedTuple):
+    """
+    The protocol members a type does not implement, which have to be checked on each instance.
+    """
+    step_type: StepType
+    step_members: Optional[Tuple[Tuple[str, bool], ...]]
+    filter_members: Optional[Tuple[Tuple[str, bool], ...]]
+    compound_members: Optional[Tuple[Tuple[str, bool], ...]]
+
+    def classify(self, obj: Any) -> StepKind:
+        is_step = _has_members(obj, self.step_members)
+        return StepKind(
+            self.step_type if is_step else StepType.FUNCTION,
+            is_step,
+            _has_members(obj, self.filter_members),
+            _has_members(obj, self.compound_members)
+        )
+
+
+_step_kinds: WeakKeyDictionary[type, Union[StepKind, _DynamicStepKind]] = WeakKeyDictionary()
+
+
+def register_step_type(
+    cls: type,
+    step_type: StepType = StepType.FILTER,
+    is_filter: bool = False,
+    is_compound: bool = False
+) -> None:
+    """
+    Registers a class as a step, bypassing protocol detection for its instances.
+    Use this for classes that implement the step protocols dynamically (e.g. with __getattr__).
+    """
+    _step_kinds[cls] = StepKind(step_type, True, is_filter, is_compound)
+
+
+def classify_step(obj: Any) -> StepKind:
+    """
+    Returns the kind of a step. The result is cached by type, so only the
+    first instance of a type is checked against the step protocols.
+    """
+    if isinstance(obj, type):
+        return _create_step_kind(
+            obj.__class__, isinstance(obj, IStep), isinstance(obj, IFilter), isinstance(obj, ICompoundStep)
+        )
+
+    cls = obj.__class__
+    kind = _step_kinds.get(cls)
+    if kind is None:
+        kind = _step_kinds[cls] = _get_step_kind(cls)
+    return kind if kind.__class__ is StepKind else cast(_DynamicStepKind, kind).classify(obj)
+
+
+def _get_step_kind(cls: type) -> Union[StepKind, _DynamicStepKind]:
+    step_members = _get_missing_members(cls, IStep)
+    filter_members = _get_missing_members(cls, IFilter)
+    compound_members = _get_missing_members(cls, ICompoundStep)
+
+    if step_members is None and filter_members is None and compound_members is None:
+        return _create_step_kind(cls, True, True, True)
+
+    return _DynamicStepKind(
+        _get_step_type(cls), step_members, filter_members, compound_members
+    )
+
+
+def _get_missing_members(cls: type, protocol: type) -> Optional[Tuple[Tuple[str, bool], ...]]:
+    """
+    Returns None if the type implements the protocol, otherwise the (name, is_callable)
+    members to check on each instance. Members defined on the type, including properties,
+    are not checked on instances.
+    """
+    members = tuple(
+        (member, callable(getattr(protocol, member, None)))
+        for member in sorted(_get_protocol_members(protocol))
+        if inspect.getattr_static(cls, member, None) is None
+    )
+    return members or None
+
+
+def _get_protocol_members(protocol: type) -> Set[str]:
+    """
+    Returns the names of the methods, properties and attributes that a protocol declares.
+    """
+    return {
+        name
+        for base in protocol.__mro__ if base.__name__ not in ("Protocol", "Generic", "object")
+        for name in (*vars(base), *getattr(base, "__annotations__", {}))
+        if not _is_protocol_internal(name)
+    }
+
+
+def _is_protocol_internal(name: str) -> bool:
+    """
+    Dunder attributes, and the attributes that typing and abc add to protocol classes, aren't members.
+    """
+    return (name.startswith("__") and name.endswith("__")) or name.startswith("_abc_") or name in (
+        "_is_protocol", "_is_runtime_protocol"
+    )
+
+
+def _has_members(obj: Any, members: Optional[Tuple[Tuple[str, bool], ...]]) -> bool:
+    if members is None:
+        return True
+    for member, is_callable in members:
+        if is_callable:
+            if getattr(obj, member, None) is None:
+                return False
+        elif not hasattr(obj, member):
+            return False
+    return True
+
+
+def _create_step_kind(cls: type, is_step: bool, is_filter: bool, is_compound: bool) -> StepKind:
+    return StepKind(_get_step_type(cls) if is_step else StepType.FUNCTION, is_step, is_filter, is_compound)
+
+
+def _get_step_type(cls: type) -> StepType:
+    return StepType(cls.__name__) if cls.__name__ in StepType else StepType.FILTER
+
+
+register_step_type(_StepProxy, StepType.FUNCTION)
+
+# endregion
+
+
 def initialize_step(
     step: Union[IStep, PipelineCallableT]
 ) -> Tuple[
@@ -47,13 +230,25 @@ def get_step(step: Union[IStep, PipelineCallableT]) -> Union[IStep, PipelineCall
     if is_step_type(step):
         return cast(type, step)()
     if not isinstance(step, IStep):
-        step = cast(IStep, _StepProxy(step))
+        step = cast(IStep, get_proxy(step))
     return step
 
 
+def get_proxy(func: PipelineCallableT) -> _StepProxy:
+    """
+    Returns a (cached) proxy that implements IStep for a function.
+    """
+    proxy = _proxy_cache.get(id(func))
+    if proxy is None or proxy.func is not func:
+        proxy = _StepProxy(func)
+        _proxy_cache[id(func)] = proxy
+    return proxy
+
+
 def get_step_func(step: Union[IStep, PipelineCallableT]) -> PipelineCallableT:
-    if is_step(step):
-        run_func = cast(ICompoundStep, step)._run if is_compound_step(step) else cast(IStep, step).run
+    kind = classify_step(step)
+    if kind.is_step:
+        run_func = cast(ICompoundStep, step)._run if kind.is_compound else cast(IStep, step).run
         return cast(PipelineCallableT, run_func)
 
     return cast(PipelineCallableT, step)
@@ -68,18 +263,14 @@ def get_step_name(step: Any) -> str:
         return cast(type, step).__name__ if inspect.isclass(step) else step.__class__.__name__
 
     return (
-        f"<{inspect.getsource(step).strip()}>"
+        get_function_metadata(step).name
         if step.__name__ == "<lambda>"
         else step.__name__
     )
 
 
 def get_step_type(step: Union[IStep, PipelineCallableT]) -> StepType:
-    if is_proxy(step):
-        return StepType.FUNCTION
-    if is_step(step):
-        return StepType(step.__class__.__name__) if step.__class__.__name__ in StepType else StepType.FILTER
-    return StepType.FUNCTION
+    return classify_step(step).step_type
 
 
 def is_step_type(step: Union[IStep, PipelineCallableT]) -> bool:
@@ -99,8 +290,7 @@ def is_class_func_static(class_type: type, func_name: str = "run") -> bool:
 def is_callable_valid(obj: Callable[..., Any]) -> bool:
     if not obj or not inspect.isfunction(obj):
         return False
-    args = inspect.signature(obj).parameters
-    return len(args) == 2
+    return get_function_metadata(obj).is_valid
 
 
 def is_proxy(obj: Any) -> bool:
@@ -108,8 +298,12 @@ def is_proxy(obj: Any) -> bool:
 
 
 def is_step(obj: Any) -> bool:
-    return isinstance(obj, IStep)
+    return classify_step(obj).is_step
+
+
+def is_filter(obj: Any) -> bool:
+    return classify_step(obj).is_filter
 
 
 def is_compound_step(obj: Any) -> bool:
-    return isinstance(obj, ICompoundStep)
+    return classify_step(obj).is_compound
@@ -0,0 +1,394 @@
+from __future__ import annotations
+
+import threading
+import weakref
+from contextvars import ContextVar
+from queue import Empty, Full, Queue
+from time import perf_counter_ns
+from typing import (Any, Dict, Iterable, Iterator, List, NamedTuple, Optional,
+                    Sequence, Tuple, Union)
+
+from pipelayer.case import run_case
+from pipelayer.context import Context
+from pipelayer.enum import Action
+from pipelayer.event_args import FilterEventArgs
+from pipelayer.plan import PlanStep
+from pipelayer.protocol import IFilter
+
+DEFAULT_MAXSIZE = 64
+
+# How often a blocked worker checks whether the stream was closed, in seconds
+_POLL_INTERVAL = 0.05
+
+
+class StageStats(NamedTuple):
+    """
+    The throughput of a stage: the records it ran, the time its workers spent running them,
+    waiting for records (idle_ns) and waiting for room in the next queue (blocked_ns),
+    and the time since the stream started.
+    """
+    name: str
+    workers: int
+    processed: int
+    busy_ns: int
+    idle_ns: int
+    blocked_ns: int
+    elapsed_ns: int
+
+    @property
+    def throughput(self) -> float:
+        """
+        Records per second.
+        """
+        return self.processed * 1e9 / self.elapsed_ns if self.elapsed_ns else 0.0
+
+    @property
+    def utilization(self) -> float:
+        """
+        The fraction of the elapsed time that the stage's workers were running records.
+        """
+        return self.busy_ns / (self.elapsed_ns * self.workers) if self.elapsed_ns else 0.0
+
+
+class Stream:
+    """
+    Runs records through the steps of a pipeline, with each step running as a stage with its own
+    workers, connected by bounded queues, so a record can be in one step while the next record is
+    in the step before it. It's created by Pipeline.stream(), and iterates over the outputs.
+
+    When a queue is full, the stage before it waits, so records are read from the input only as fast
+    as the slowest stage runs them. Records are read from the input in a thread, and the steps of a
+    stream share its context. A stream that isn't closed is stopped when it's garbage collected.
+    """
+    __slots__ = (
+        "__stages", "__workers", "__maxsize", "__ordered", "__threads", "__finalizer",
+        "__started", "__pending", "__next", "__done", "__weakref__"
+    )
+
+    # region Constructors
+
+    def __init__(
+        self,
+        steps: Sequence[PlanStep],
+        records: Iterable[Any],
+        context: Context,
+        workers: Union[int, Sequence[int]] = 1,
+        maxsize: int = DEFAULT_MAXSIZE,
+        ordered: bool = True
+    ) -> None:
+        workers = (workers,) * len(steps) if isinstance(workers, int) else tuple(workers)
+        if len(workers) != len(steps):
+            raise ValueError(f"workers has {len(workers)} counts, but there are {len(steps)} steps")
+        if any(count < 1 for count in workers):
+            raise ValueError("each stage must have at least 1 worker")
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+
+        self.__stages = _Stages(tuple(steps), records, context, workers, maxsize)
+        self.__workers: Tuple[int, ...] = workers
+        self.__maxsize = maxsize
+        self.__ordered = ordered
+        self.__threads: List[threading.Thread] = []
+        # The workers don't reference the stream, so they're stopped when it's garbage collected
+        self.__finalizer = weakref.finalize(self, self.__stages.stop.set)
+        self.__started = 0
+        # Outputs that arrived before the outputs of earlier records
+        self.__pending: Dict[int, Any] = {}
+        self.__next = 0
+        self.__done = False
+
+    def __init_subclass__(cls, **kwargs: Any):
+        raise TypeError(f"type '{Stream.__name__}' is not an acceptable base type")
+
+    # endregion
+    # region Properties
+
+    @property
+    def workers(self) -> Tuple[int, ...]:
+        return self.__workers
+
+    @property
+    def maxsize(self) -> int:
+        return self.__maxsize
+
+    @property
+    def ordered(self) -> bool:
+        return self.__ordered
+
+    @property
+    def stats(self) -> Tuple[StageStats, ...]:
+        """
+        The throughput of each stage so far.
+        """
+        elapsed = perf_counter_ns() - self.__started if self.__started else 0
+        stages = self.__stages
+        return tuple(
+            StageStats(
+                entry.name,
+                len(counters),
+                sum(c.processed for c in counters),
+                sum(c.busy_ns for c in counters),
+                sum(c.idle_ns for c in counters),
+                sum(c.blocked_ns for c in counters),
+                elapsed
+            )
+            for entry, counters in zip(stages.steps, stages.counters)
+        )
+
+    # endregion
+    # region Iterator
+
+    def __iter__(self) -> Iterator[Any]:
+        return self
+
+    def __next__(self) -> Any:
+        """
+        Returns the next output, in the order of the records if the stream is ordered,
+        otherwise in the order they're finished. Raises the error of a failed step.
+        """
+        if self.__done:
+            raise StopIteration
+        if not self.__started:
+            self.__start()
+
+        if self.__ordered and self.__next in self.__pending:
+            return self.__pop()
+
+        stages = self.__stages
+        output = stages.queues[-1]
+        while True:
+            item = output.get()
+            if item is _DONE:
+                self.close()
+                raise StopIteration
+            if isinstance(item, _Failure):
+                self.close()
+                raise item.error
+            sequence, data, _ = item
+            if not self.__ordered:
+                stages.window.release()
+                return data
+            self.__pending[sequence] = data
+            if sequence == self.__next:
+                return self.__pop()
+
+    def __enter__(self) -> Stream:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Stops the stages, and waits for their workers to finish the records they're running.
+        The thread that reads the input isn't waited for, as reading a record can block.
+        It stops once it has read the record.
+        """
+        self.__done = True
+        self.__finalizer()
+        for thread in self.__threads:
+            thread.join()
+        self.__threads.clear()
+
+    def __pop(self) -> Any:
+        data = self.__pending.pop(self.__next)
+        self.__next += 1
+        self.__stages.window.release()
+        return data
+
+    # endregion
+    # region Workers
+
+    def __start(self) -> None:
+        self.__started = perf_counter_ns()
+        stages = self.__stages
+        threading.Thread(target=stages.feed, name="pipelayer-stream-input", daemon=True).start()
+        threads = self.__threads
+        for stage, entry in enumerate(stages.steps):
+            threads.extend(
+                threading.Thread(
+                    target=stages.work,
+                    args=(stage, entry, counters),
+                    name=f"pipelayer-stream-{entry.name}",
+                    daemon=True
+                )
+                for counters in stages.counters[stage]
+            )
+        for thread in threads:
+            thread.start()
+
+    # endregion
+
+
+class _Stages:
+    """
+    The queues and workers of the stages of a stream.
+    """
+    __slots__ = ("steps", "records", "context", "workers", "queues", "counters", "remaining", "lock", "stop", "window")
+
+    def __init__(
+        self,
+        steps: Tuple[PlanStep, ...],
+        records: Iterable[Any],
+        context: Context,
+        workers: Tuple[int, ...],
+        maxsize: int
+    ) -> None:
+        self.steps = steps
+        self.records = records
+        self.context = context
+        self.workers = workers
+        # The input queue of each stage, and the output queue
+        self.queues: List[Queue] = [Queue(maxsize) for _ in range(len(steps) + 1)]
+        self.counters = [[_Counters() for _ in range(count)] for count in workers]
+        self.remaining = list(workers)
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+        # The records that were read but not returned. Records returned in order wait for slower
+        # records before them, so they're limited to the records the queues and workers hold.
+        self.window = threading.Semaphore(maxsize * len(self.queues) + sum(workers))
+
+    def feed(self) -> None:
+        queue, stop, window = self.queues[0], self.stop, self.window
+        try:
+            for sequence, data in enumerate(self.records):
+                while not window.acquire(timeout=_POLL_INTERVAL):
+                    if stop.is_set():
+                        return
+                if not _put(queue, (sequence, data, False), stop):
+                    return
+        except BaseException as e:
+            self.fail(e)
+            return
+        self.finish_stage(-1)
+
+    def work(self, stage: int, entry: PlanStep, counters: _Counters) -> None:
+        """
+        Runs records through a step until the stage before it has finished.
+        Records that exited the pipeline are passed on without running the step.
+        """
+        source, target, stop, context = self.queues[stage], self.queues[stage + 1], self.stop, self.context
+        exits: List[FilterEventArgs] = []
+        _exits.set(exits)
+        try:
+            while True:
+                waited = perf_counter_ns()
+                item = _get(source, stop)
+                started = perf_counter_ns()
+                counters.idle_ns += started - waited
+                if item is None:
+                    return
+                if item is _DONE:
+                    break
+
+                sequence, data, exited = item
+                if not exited:
+                    # Compound steps don't record manifests, as the stream isn't traced
+                    data = run_case(entry, data, context, None, -1, _handle_exit)
+                    if exits:
+                        exits.clear()
+                        exited = True
+                    ended = perf_counter_ns()
+                    counters.busy_ns += ended - started
+                    counters.processed += 1
+                    started = ended
+
+                if not _put(target, (sequence, data, exited), stop):
+                    return
+                counters.blocked_ns += perf_counter_ns() - started
+        except BaseException as e:
+            self.fail(e)
+            return
+        self.finish_stage(stage)
+
+    def finish_stage(self, stage: int) -> None:
+        """
+        Passes the end of the stream to the next stage, once each worker of the stage has finished.
+        """
+        if stage >= 0:
+            with self.lock:
+                self.remaining[stage] -= 1
+                if self.remaining[stage]:
+                    return
+        stop = self.stop
+        count = self.workers[stage + 1] if stage + 1 < len(self.workers) else 1
+        for _ in range(count):
+            if not _put(self.queues[stage + 1], _DONE, stop):
+                return
+
+    def fail(self, error: BaseException) -> None:
+        """
+        Stops the stages, and passes the error to the output.
+        """
+        with self.lock:
+            if self.stop.is_set():
+                return
+            self.stop.set()
+        output, failure = self.queues[-1], _Failure(error)
+        # Outputs are dropped to make room for the error, as they won't be read
+        while True:
+            try:
+                output.put_nowait(failure)
+                return
+            except Full:
+                pass
+            try:
+                output.get_nowait()
+            except Empty:
+                pass
+
+
+class _Counters:
+    """
+    The counters of a stage worker, which only it writes to.
+    """
+    __slots__ = ("processed", "busy_ns", "idle_ns", "blocked_ns")
+
+    def __init__(self) -> None:
+        self.processed = 0
+        self.busy_ns = 0
+        self.idle_ns = 0
+        self.blocked_ns = 0
+
+
+class _Failure(NamedTuple):
+    error: BaseException
+
+
+# Passed through the queues after the last record
+_DONE = object()
+
+
+def _put(queue: Queue, item: Any, stop: threading.Event) -> bool:
+    """
+    Puts an item on a queue, waiting while it's full. Returns False if the stream stopped.
+    """
+    while not stop.is_set():
+        try:
+            queue.put(item, timeout=_POLL_INTERVAL)
+            return True
+        except Full:
+            pass
+    return False
+
+
+def _get(queue: Queue, stop: threading.Event) -> Any:
+    """
+    Gets an item from a queue, waiting while it's empty. Returns None if the stream stopped.
+    """
+    while not stop.is_set():
+        try:
+            return queue.get(timeout=_POLL_INTERVAL)
+        except Empty:
+            pass
+    return None
+
+
+# The exits of the filter the current stage worker is running
+_exits: ContextVar[Optional[List[FilterEventArgs]]] = ContextVar("pipelayer.stream.exits", default=None)
+
+
+def _handle_exit(sender: IFilter, args: FilterEventArgs) -> None:
+    exits = _exits.get()
+    if exits is not None and args.action is Action.EXIT:
+        exits.append(args)
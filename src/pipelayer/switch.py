@@ -1,15 +1,22 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional, Tuple, Union, cast
-from uuid import uuid4
+import threading
+from typing import (TYPE_CHECKING, Any, Callable, Dict, Mapping, Optional,
+                    Tuple, Union, cast)
 
+from pipelayer.case import (CaseTable, arun_case, compile_cases, record_case,
+                            run_case)
 from pipelayer.context import Context
 from pipelayer.enum import StepType
+from pipelayer.execution import Execution
 from pipelayer.filter import Filter, raise_events
-from pipelayer.manifest import Manifest, close_manifest, create_manifest
+from pipelayer.plan import PlanStep
 from pipelayer.protocol import IStep, PipelineCallableT
-from pipelayer.step import (get_step, get_step_func, get_step_name,
-                            get_step_type)
+from pipelayer.recorder import Record, materialize
+from pipelayer.tracing import FULL, end_trace, start_trace
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pipelayer.manifest import Manifest
 
 
 class Switch(Filter):
@@ -21,7 +28,8 @@ class Switch(Filter):
     def __init__(self,
                  expression: Union[IStep, PipelineCallableT],
                  cases: Dict[Any, Union[IStep, PipelineCallableT]],
-                 name: Optional[str] = "") -> None:
+                 name: Optional[str] = "",
+                 default: Optional[Union[IStep, Callable[[Any, Context], Any]]] = None) -> None:
         """
         Args:
             expression (Union[Step, PipelineCallableT]):
@@ -33,16 +41,24 @@ class Switch(Filter):
 
             name (Optional[str], optional):
             Used by the Manifest. Defaults to "".
+
+            default (Optional[Union[Step, PipelineCallableT]], optional):
+            The case that runs when no label matches. Defaults to None,
+            which passes the data through.
         """
         super().__init__(name or self.__class__.__name__)
         self.__expression = expression
-        self.__cases = cases
-        self.__manifest: Optional[Manifest] = None
-        self.default = uuid4().hex
+        self.__cases: Dict[Any, Union[IStep, PipelineCallableT]] = _Cases(cases, self.__invalidate)
+        self.__default = default
+        self.__table: Optional[CaseTable] = None
+        self.__local = threading.local()
 
     def __init_subclass__(cls, **kwargs: Any):
         raise TypeError(f"type '{Switch.__name__}' is not an acceptable base type")
 
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return Switch, (self.__expression, dict(self.__cases), self.name, self.__default)
+
     # endregion
     # region Properties
 
@@ -52,15 +68,50 @@ class Switch(Filter):
 
     @property
     def cases(self) -> Dict[Any, Union[IStep, PipelineCallableT]]:
+        """
+        The cases. The case table is recompiled when they change.
+        """
         return self.__cases
 
+    @cases.setter
+    def cases(self, value: Dict[Any, Union[IStep, PipelineCallableT]]) -> None:
+        self.__cases = _Cases(value, self.__invalidate)
+        self.__table = None
+
+    @property
+    def default(self) -> Optional[Union[IStep, Callable[[Any, Context], Any]]]:
+        return self.__default
+
+    @default.setter
+    def default(self, value: Optional[Union[IStep, Callable[[Any, Context], Any]]]) -> None:
+        self.__default = value
+        self.__table = None
+
+    @property
+    def table(self) -> Optional[CaseTable]:
+        return self.__table
+
     @property
     def manifest(self) -> Manifest:
-        return cast(Manifest, self.__manifest)
+        """
+        The manifest of the last run in the current thread, or None if it wasn't traced.
+        """
+        return cast("Manifest", materialize(getattr(self.__local, "manifest", None)))
 
     # endregion
     # region Runners
 
+    def __invalidate(self) -> None:
+        self.__table = None
+
+    def compile(self) -> CaseTable:
+        """
+        Resolves the expression and cases into a case table that is reused across runs.
+        The table is compiled on the first run, and recompiled if the cases or default change.
+        """
+        self.__table = compile_cases(self.__expression, self.__cases, self.__default)
+        return self.__table
+
     def run(self, data: Any = None, context: Optional[Context] = None) -> Any:
         """[summary]
 
@@ -71,40 +122,136 @@ class Switch(Filter):
         Returns:
             Any: [description]
         """
-        data, self.__manifest = self._run(data, context or Context())
-        return data
+        return self.execute(data, context).data
 
-    @raise_events
-    def _run(self, data: Any, context: Context) -> Tuple[Any, Manifest]:
+    def execute(self, data: Any = None, context: Optional[Context] = None) -> Execution:
+        """
+        Runs the switch, and returns the output and manifest of the run.
+        Unlike the manifest property, the result isn't shared with other runs.
+        """
+        data, manifest = self._run(data, context or Context())
+        return Execution(data, manifest)
+
+    async def arun(self, data: Any = None, context: Optional[Context] = None) -> Any:
+        """
+        Runs the switch from a coroutine, like Pipeline.arun().
+        """
+        return (await self.aexecute(data, context)).data
 
-        manifest = create_manifest(get_step_name(self.expression), StepType.SWITCH)
+    async def aexecute(self, data: Any = None, context: Optional[Context] = None) -> Execution:
+        data, manifest = await self._arun(data, context or Context())
+        return Execution(data, manifest)
 
-        # Expression
-        step = get_step(self.expression)  # type: ignore
-        expr_func = get_step_func(step)
+    @raise_events
+    def _run(self, data: Any, context: Context) -> Tuple[Any, Optional[Record]]:
+        table = self.__table or self.compile()
 
-        # Eval Expression
-        label = next((case for case in self.cases if case == expr_func(data, context)), self.default)
+        recorder, index, trace_token = start_trace(FULL, table.expression.name, StepType.SWITCH)
+        try:
+            case = table.select(data, context)
+            if recorder is None:
+                if case is not None:
+                    data = run_case(case, data, context, None, -1)
+            else:
+                case_index = record_case(recorder, case, index)
+                if case is not None:
+                    data = run_case(case, data, context, recorder, case_index)
+                recorder.close(case_index)
+        finally:
+            end_trace(trace_token)
 
-        # Execute Case
-        case = self.cases.get(label)
-        case_name = "Default"
-        case_type = StepType.UNDEFINED
-        if case:
-            case_func = get_step_func(case)
-            case_name = get_step_name(case_func)
-            case_type = get_step_type(case_func)
+        record = None
+        if recorder is not None:
+            if trace_token is not None:
+                recorder.close(index)
+            record = Record(recorder, index)
+        self.__local.manifest = record
 
-        case_manifest = create_manifest(case_name, case_type)
+        return data, record
 
-        data = case_func(data, context) if case else data
+    @raise_events
+    async def _arun(self, data: Any, context: Context) -> Tuple[Any, Optional[Record]]:
+        table = self.__table or self.compile()
 
-        close_manifest(case_manifest)
-        manifest.steps.append(case_manifest)
+        recorder, index, trace_token = start_trace(FULL, table.expression.name, StepType.SWITCH)
+        try:
+            case = await table.aselect(data, context)
+            if recorder is None:
+                if case is not None:
+                    data = await arun_case(case, data, context, None, -1)
+            else:
+                case_index = record_case(recorder, case, index)
+                if case is not None:
+                    data = await arun_case(case, data, context, recorder, case_index)
+                recorder.close(case_index)
+        finally:
+            end_trace(trace_token)
 
-        close_manifest(manifest)
-        self.__manifest = manifest
+        record = None
+        if recorder is not None:
+            # The CPU time of the thread includes the coroutines that ran while the step awaited
+            recorder.set_cpu_time(index, None)
+            if trace_token is not None:
+                recorder.close(index)
+            record = Record(recorder, index)
+        self.__local.manifest = record
 
-        return data, manifest
+        return data, record
+
+    def _select_case(self, data: Any, context: Context) -> Optional[PlanStep]:
+        """
+        Evaluates the expression, and returns the matching case, or None.
+        """
+        return (self.__table or self.compile()).select(data, context)
 
     # endregion
+
+
+class _Cases(Dict[Any, Any]):
+    """
+    The cases of a Switch, which calls changed when they change, so the Switch recompiles its case table.
+    """
+    __slots__ = ("__changed",)
+
+    def __init__(self, cases: Mapping[Any, Any], changed: Callable[[], None]) -> None:
+        super().__init__(cases)
+        self.__changed = changed
+
+    def __setitem__(self, label: Any, case: Any) -> None:
+        super().__setitem__(label, case)
+        self.__changed()
+
+    def __delitem__(self, label: Any) -> None:
+        super().__delitem__(label)
+        self.__changed()
+
+    def __ior__(self, cases: Any) -> _Cases:  # type: ignore[misc]
+        self.update(cases)
+        return self
+
+    def clear(self) -> None:
+        super().clear()
+        self.__changed()
+
+    def pop(self, label: Any, *default: Any) -> Any:
+        case = super().pop(label, *default)
+        self.__changed()
+        return case
+
+    def popitem(self) -> Tuple[Any, Any]:
+        item = super().popitem()
+        self.__changed()
+        return item
+
+    def setdefault(self, label: Any, case: Any = None) -> Any:
+        if label in self:
+            return self[label]
+        self[label] = case
+        return case
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        super().update(*args, **kwargs)
+        self.__changed()
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return dict, (dict(self),)
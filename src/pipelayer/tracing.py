@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from contextvars import ContextVar, Token
+from random import random
+from typing import NamedTuple, Optional, Tuple
+
+from pipelayer.enum import StepType, TraceLevel
+from pipelayer.recorder import CpuTimeRecorder, Recorder
+
+
+class Tracing(NamedTuple):
+    """
+    Whether runs create a manifest. Use OFF, FULL or sampled(rate).
+    With cpu_time, manifests record the thread CPU time of each step, e.g.
+    Tracing(TraceLevel.FULL, cpu_time=True).
+    """
+    level: TraceLevel
+    rate: float = 1.0
+    cpu_time: bool = False
+
+    def sample(self) -> bool:
+        """
+        Returns True if a run should be traced.
+        """
+        if self.level is TraceLevel.FULL:
+            return True
+        if self.level is TraceLevel.OFF:
+            return False
+        return random() < self.rate
+
+
+OFF = Tracing(TraceLevel.OFF, 0.0)
+FULL = Tracing(TraceLevel.FULL, 1.0)
+
+
+def sampled(rate: float, cpu_time: bool = False) -> Tracing:
+    """
+    Traces a fraction of runs, e.g. sampled(0.01) traces 1% of runs.
+    """
+    if not 0 <= rate <= 1:
+        raise ValueError("rate must be between 0 and 1")
+    return Tracing(TraceLevel.SAMPLED, rate, cpu_time)
+
+
+# The recorder of the current run. Compound steps run by a step of the run record into it,
+# instead of sampling on their own. It's _UNTRACED while an untraced run calls a compound step.
+_recorder: ContextVar[Optional[Recorder]] = ContextVar("pipelayer.recorder", default=None)
+_UNTRACED = Recorder()
+
+
+def start_trace(
+    tracing: Tracing, name: str, step_type: StepType
+) -> Tuple[Optional[Recorder], int, Optional[Token[Optional[Recorder]]]]:
+    """
+    Returns the recorder of the run and the index of its step, or None and -1 if the run isn't traced,
+    and a token to pass to end_trace if the run isn't part of another run.
+    """
+    recorder = _recorder.get()
+    if recorder is _UNTRACED:
+        # A compound step of an untraced run. Runs started by its own steps aren't part of the run.
+        return None, -1, _recorder.set(None)
+    if recorder is not None:
+        index = recorder.take_step()
+        if index >= 0:
+            return recorder, index, None
+
+    if not tracing.sample():
+        return None, -1, None
+
+    recorder = CpuTimeRecorder() if tracing.cpu_time else Recorder()
+    return recorder, recorder.open(name, step_type, -1), _recorder.set(recorder)
+
+
+def start_untraced() -> Token[Optional[Recorder]]:
+    """
+    Called by an untraced run before it calls a compound step, so the step isn't traced either.
+    Returns a token to pass to end_trace when the step returns.
+    """
+    return _recorder.set(_UNTRACED)
+
+
+def end_trace(token: Optional[Token[Optional[Recorder]]]) -> None:
+    if token is not None:
+        _recorder.reset(token)
+
+
+def start_branch(recorder: Optional[Recorder], name: str, step_type: StepType) -> Tuple[Optional[Recorder], int]:
+    """
+    Starts recording a branch that runs concurrently with other steps of the run, in a copied context.
+    The branch records into its own recorder, which is attached to the run's recorder when the branch ends.
+    """
+    if recorder is None:
+        return None, -1
+    branch = recorder.branch()
+    _recorder.set(branch)
+    return branch, branch.open(name, step_type, -1)
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import os
+import pickle
+import threading
+from typing import Any, List, NamedTuple, Tuple, cast
+
+try:
+    from multiprocessing import resource_tracker
+    from multiprocessing.shared_memory import SharedMemory
+except ImportError:  # pragma: no cover
+    # Python 3.7
+    resource_tracker = SharedMemory = None  # type: ignore
+
+HAS_SHARED_MEMORY = SharedMemory is not None
+
+DEFAULT_MIN_SIZE = 1 << 20
+
+
+class SharedPayload(NamedTuple):
+    """
+    An object pickled with protocol 5, whose large buffers are in shared memory blocks,
+    which are passed by name.
+    """
+    pickled: bytes
+    blocks: Tuple[Tuple[str, int], ...]
+
+
+class SharedBlocks:
+    """
+    The shared memory blocks an unpacked object uses. release() closes the blocks that
+    nothing references anymore. Blocks that are still referenced, e.g. by an array in the
+    output of a run, are closed by a later release, once they're freed.
+    """
+    __slots__ = ("__blocks",)
+
+    def __init__(self, blocks: List[SharedMemory]) -> None:
+        self.__blocks = blocks
+
+    def __len__(self) -> int:
+        return len(self.__blocks)
+
+    def release(self) -> None:
+        blocks, self.__blocks = self.__blocks, []
+        with _pending_lock:
+            _pending.extend(blocks)
+            _pending[:] = [block for block in _pending if not _close(block)]
+
+
+class SharedMemoryTransport:
+    """
+    Sends data to and from processes with pickle protocol 5, placing out-of-band buffers of
+    min_size bytes or more in shared memory instead of the pickled data,
+    e.g. InProcess(step, transport=SharedMemoryTransport()).
+
+    Objects that support out-of-band buffers, like NumPy arrays, are unpickled over the shared
+    memory without copying it. Wrap bytes and bytearrays in a pickle.PickleBuffer to send them
+    this way, and they're received as a memoryview; otherwise they're pickled with the data.
+    A buffer is copied into shared memory once. A block is unlinked when it's received, and its
+    memory is freed once it's closed in both processes. It requires Python 3.8 or later.
+    """
+    __slots__ = ("__min_size",)
+
+    def __init__(self, min_size: int = DEFAULT_MIN_SIZE) -> None:
+        if not HAS_SHARED_MEMORY:
+            raise RuntimeError("SharedMemoryTransport requires Python 3.8 or later, for shared memory")
+        if min_size < 1:
+            raise ValueError("min_size must be at least 1")
+        self.__min_size = min_size
+
+    @property
+    def min_size(self) -> int:
+        return self.__min_size
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return SharedMemoryTransport, (self.__min_size,)
+
+    def pack(self, obj: Any) -> SharedPayload:
+        blocks: List[Tuple[str, int]] = []
+
+        def buffer_callback(buffer: pickle.PickleBuffer) -> bool:
+            raw = buffer.raw()
+            if raw.nbytes < self.__min_size:
+                # Small buffers are pickled with the data
+                return True
+            block = SharedMemory(create=True, size=raw.nbytes)
+            try:
+                _untrack(block)
+                blocks.append((block.name, raw.nbytes))
+                cast(memoryview, block.buf)[:raw.nbytes] = raw
+            finally:
+                block.close()
+            return False
+
+        try:
+            return SharedPayload(pickle.dumps(obj, 5, buffer_callback=buffer_callback), tuple(blocks))
+        except BaseException:
+            discard(SharedPayload(b"", tuple(blocks)))
+            raise
+
+    def unpack(self, payload: SharedPayload) -> Tuple[Any, SharedBlocks]:
+        """
+        Returns the object, and the blocks to release when the run that uses it ends.
+        """
+        blocks: List[SharedMemory] = []
+        buffers = []
+        try:
+            for name, size in payload.blocks:
+                block = SharedMemory(name)
+                blocks.append(block)
+                block.unlink()
+                # Blocks can be larger than requested, as they're rounded up to whole pages
+                buffers.append(cast(memoryview, block.buf)[:size])
+            return pickle.loads(payload.pickled, buffers=buffers), SharedBlocks(blocks)
+        except BaseException:
+            buffers.clear()
+            SharedBlocks(blocks).release()
+            raise
+
+
+def discard(payload: SharedPayload) -> None:
+    """
+    Unlinks the blocks of a payload that wasn't received, e.g. because the process failed.
+    """
+    for name, _ in payload.blocks:
+        try:
+            block = SharedMemory(name)
+        except FileNotFoundError:
+            continue
+        block.close()
+        block.unlink()
+
+
+_pending: List[SharedMemory] = []
+_pending_lock = threading.Lock()
+
+
+def _close(block: SharedMemory) -> bool:
+    try:
+        block.close()
+    except BufferError:
+        # An unpacked object still uses the block
+        return False
+    return True
+
+
+def _untrack(block: SharedMemory) -> None:
+    """
+    The receiving process unlinks the blocks a process creates, so the creating process
+    doesn't track them to unlink them when it exits.
+    """
+    if os.name == "posix":
+        resource_tracker.unregister(f"/{block.name}", "shared_memory")
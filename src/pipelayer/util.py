@@ -1,12 +1,111 @@
 import json
+import re
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import IO, Any, Callable, Dict, List, Match, Optional, Tuple
 
-from pipelayer.manifest import Manifest
+from pipelayer.manifest import Manifest, ManifestList
+from pydantic.json import timedelta_isoformat
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
 
-def render_manifest(manifest: Manifest, indent: int = 2) -> str:
+
+def render_manifest(manifest: Manifest, indent: Optional[int] = 2, compact: bool = False) -> str:
+    """
+    Renders a formatted Manifest, without the fields that aren't set.
+    Compact manifests have no indentation or whitespace.
+    orjson is used if it's installed, and the output is the same as json.dumps, with non-ASCII
+    characters escaped, either way.
+    """
+    obj = _to_json_object(manifest)
+    if orjson is None:
+        return json.dumps(obj, **_get_format(indent, compact))
+
+    if compact or indent is None:
+        rendered = orjson.dumps(obj).decode()
+        if not compact:
+            rendered = _SEPARATOR_OR_STRING.sub(_space_separator, rendered)
+    else:
+        rendered = orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+        if indent != 2:
+            # Strings can't contain line breaks, so the leading spaces of each line are its indentation
+            rendered = _INDENTATION.sub(lambda match: " " * (len(match.group()) // 2 * indent), rendered)
+    return rendered if rendered.isascii() else _NON_ASCII.sub(_escape, rendered)
+
+
+def write_manifest(manifest: Manifest, stream: IO[str], indent: Optional[int] = 2, compact: bool = False) -> None:
+    """
+    Writes a Manifest to a text stream as it's encoded, in the format of render_manifest.
+    """
+    json.dump(_to_json_object(manifest), stream, **_get_format(indent, compact))
+
+
+_INDENTATION = re.compile(r"^ +", re.MULTILINE)
+_NON_ASCII = re.compile(r"[^\x00-\x7f]")
+_SEPARATOR_OR_STRING = re.compile(r'"(?:[^"\\]|\\.)*"|[,:]')
+
+
+def _space_separator(match: Match[str]) -> str:
+    """
+    Adds the space that json.dumps puts after separators when there's no indentation.
+    """
+    token = match.group()
+    return f"{token} " if token in (",", ":") else token
+
+
+def _escape(match: Match[str]) -> str:
+    """
+    Escapes a non-ASCII character like json.dumps, with surrogate pairs outside the Basic Multilingual Plane.
+    """
+    code = ord(match.group())
+    if code < 0x10000:
+        return f"\\u{code:04x}"
+    code -= 0x10000
+    return f"\\u{0xd800 | code >> 10:04x}\\u{0xdc00 | code & 0x3ff:04x}"
+
+
+def _get_format(indent: Optional[int], compact: bool) -> Dict[str, Any]:
+    separators: Optional[Tuple[str, str]] = (",", ":") if compact else None
+    return {"indent": None if compact else indent, "separators": separators}
+
+
+def _to_json_object(value: Any) -> Any:
     """
-    Renders a formatted Manifest
+    Converts a manifest into the objects json encodes, like Manifest.json() with exclude_none.
     """
-    manifest_str = manifest.json()
-    manifest_dict = json.loads(manifest_str)
-    return json.dumps(manifest_dict, indent=indent)
+    value_type = type(value)
+    if value_type in _JSON_TYPES:
+        return value
+    encoder = _ENCODERS.get(value_type)
+    if encoder is not None:
+        return encoder(value)
+
+    for base, encoder in _ENCODERS.items():
+        if isinstance(value, base):
+            return encoder(value)
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _encode_dict(value: Dict[str, Any]) -> Dict[str, Any]:
+    return {name: v if type(v) in _JSON_TYPES else _to_json_object(v) for name, v in value.items() if v is not None}
+
+
+def _encode_list(value: List[Any]) -> List[Any]:
+    return [_to_json_object(v) for v in value]
+
+
+_JSON_TYPES = frozenset((str, int, float, bool))
+
+_ENCODERS: Dict[type, Callable[[Any], Any]] = {
+    Manifest: lambda manifest: _encode_dict(manifest.__dict__),
+    dict: _encode_dict,
+    list: _encode_list,
+    ManifestList: _encode_list,
+    datetime: datetime.timestamp,
+    timedelta: timedelta_isoformat,
+}
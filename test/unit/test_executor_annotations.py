@@ -0,0 +1,121 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+from pipelayer import (ExecutorKind, Executors, Filter, InProcess, Pipeline,
+                       runs_in)
+from pipelayer.executor import (get_executor_kind, get_process_pool,
+                                is_worker_process)
+from pipelayer.filter import raise_events
+from pipelayer.plan import compile_step
+
+
+@runs_in(ExecutorKind.CPU)
+def get_pid(data, context):
+    return os.getpid()
+
+
+@runs_in(ExecutorKind.IO)
+def add_thread(data, context):
+    return data + [threading.current_thread().name]
+
+
+def increment(data, context):
+    return data + 1
+
+
+def is_dispatched(step):
+    return isinstance(compile_step(step).step, InProcess)
+
+
+@runs_in(ExecutorKind.IO)
+class Lookup(Filter):
+    @raise_events
+    def run(self, data, context):
+        return data + [threading.current_thread().name]
+
+
+@runs_in(ExecutorKind.INLINE)
+class InlineLookup(Lookup):
+    pass
+
+
+@pytest.fixture(scope="module")
+def executors():
+    with ThreadPoolExecutor(1, thread_name_prefix="io") as io, ProcessPoolExecutor(1) as cpu:
+        yield Executors(io, cpu)
+
+
+@pytest.mark.unit
+class TestExecutorAnnotations:
+
+    @pytest.mark.happy
+    def test_get_executor_kind(self):
+        assert get_executor_kind(get_pid) is ExecutorKind.CPU
+        assert get_executor_kind(Lookup()) is ExecutorKind.IO
+        assert get_executor_kind(Lookup) is ExecutorKind.IO
+        assert get_executor_kind(InlineLookup()) is ExecutorKind.INLINE
+        assert get_executor_kind(increment) is ExecutorKind.INLINE
+
+    @pytest.mark.happy
+    def test_cpu_step(self, executors):
+        pipeline = Pipeline([get_pid], executors=executors)
+
+        execution = pipeline.execute()
+
+        assert execution.data != os.getpid()
+        step = execution.manifest.steps[0]
+        assert step.executor == "cpu"
+        assert step.queue_wait_ns >= 0
+
+    @pytest.mark.happy
+    def test_cpu_step_in_worker_process(self):
+        # CPU steps run inline in the workers of process pools that run steps
+        assert is_dispatched(get_pid)
+        assert not get_process_pool().submit(is_dispatched, get_pid).result()
+
+        with ProcessPoolExecutor(1) as pool:
+            assert InProcess(increment, pool).run(1) == 2
+            assert not pool.submit(is_dispatched, get_pid).result()
+
+    @pytest.mark.happy
+    def test_cpu_step_in_child_process(self):
+        # e.g. the worker process of a web server
+        with ProcessPoolExecutor(1) as pool:
+            assert not pool.submit(is_worker_process).result()
+            assert pool.submit(is_dispatched, get_pid).result()
+
+    @pytest.mark.happy
+    def test_io_step(self, executors):
+        pipeline = Pipeline([add_thread, Lookup(), InlineLookup()], executors=executors)
+
+        execution = asyncio.run(pipeline.aexecute([]))
+
+        assert [name.startswith("io") for name in execution.data[:2]] == [True, True]
+        assert execution.data[2] == threading.current_thread().name
+        assert [s.executor for s in execution.manifest.steps] == ["io", "io", None]
+        assert all(s.queue_wait_ns >= 0 for s in execution.manifest.steps[:2])
+
+    @pytest.mark.happy
+    def test_io_step_runs_inline_in_run(self, executors):
+        execution = Pipeline([add_thread], executors=executors).execute([])
+
+        assert execution.data == [threading.current_thread().name]
+        assert execution.manifest.steps[0].executor is None
+
+    @pytest.mark.happy
+    def test_executors_setter(self, executors):
+        pipeline = Pipeline([add_thread])
+        pipeline.compile()
+
+        pipeline.executors = executors
+
+        assert pipeline.plan is None
+        assert asyncio.run(pipeline.arun([]))[0].startswith("io")
+
+    @pytest.mark.sad
+    def test_invalid_kind(self):
+        with pytest.raises(TypeError):
+            runs_in("io")
@@ -0,0 +1,73 @@
+import pytest
+from pipelayer import (Action, Context, Filter, FilterEventArgs, Pipeline,
+                       PipelineEventArgs, State)
+from pipelayer.filter import raise_events
+
+
+class Increment(Filter):
+    @raise_events
+    def run(self, data, context) -> int:
+        return data + 1
+
+
+@pytest.fixture
+def created_event_args(monkeypatch) -> list:
+    import pipelayer.filter
+    import pipelayer.pipeline
+
+    created: list = []
+
+    def count(cls):
+        def create(*args):
+            created.append(cls.__name__)
+            return cls(*args)
+        return create
+
+    monkeypatch.setattr(pipelayer.filter, "FilterEventArgs", count(FilterEventArgs))
+    monkeypatch.setattr(pipelayer.pipeline, "PipelineEventArgs", count(PipelineEventArgs))
+    return created
+
+
+@pytest.mark.unit
+class TestFilterEventFastPath:
+
+    @pytest.mark.happy
+    def test_no_event_args_without_handlers(self, created_event_args):
+        pipeline = Pipeline([Increment(), Pipeline([Increment()]), lambda d, c: d])
+
+        assert pipeline.run(0) == 2
+        assert created_event_args == []
+
+    @pytest.mark.happy
+    def test_event_args_with_handlers(self, created_event_args):
+        increment = Increment()
+        pipeline = Pipeline([increment])
+        pipeline.run(0)
+
+        increment.end += lambda sender, args: None
+        pipeline.step_end += lambda sender, args: None
+
+        assert pipeline.run(0) == 1
+        assert created_event_args == ["FilterEventArgs", "FilterEventArgs", "PipelineEventArgs"]
+
+    @pytest.mark.happy
+    def test_exit_after_handler_added(self):
+        def exit_pipeline(sender: Filter, args: FilterEventArgs) -> None:
+            args.action = Action.EXIT
+
+        increment = Increment()
+        pipeline = Pipeline([increment, Increment()])
+
+        assert pipeline.run(0) == 2
+
+        increment.end += exit_pipeline
+
+        assert pipeline.run(0) == 1
+
+    @pytest.mark.happy
+    def test_event_args_slots(self):
+        args = FilterEventArgs(1, Context(), State.RUNNING)
+
+        assert not hasattr(args, "__dict__")
+        with pytest.raises(AttributeError):
+            args.other = 1  # type: ignore
@@ -0,0 +1,125 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pipelayer import Action, Context, Filter, FilterEventArgs, Pipeline, State
+from pipelayer.filter import FilterEventHandlerList, raise_events
+
+
+class MyFilter(Filter):
+    @raise_events
+    def run(self, data, context):
+        return data
+
+
+def handler(sender: Filter, args: FilterEventArgs) -> None:
+    pass
+
+
+@pytest.mark.unit
+class TestFilterEventSubscriptions:
+
+    @pytest.mark.happy
+    def test_subscribe(self):
+        handlers = FilterEventHandlerList()
+
+        with handlers.subscribe(handler):
+            assert handlers == [handler]
+
+        assert handlers == []
+
+    @pytest.mark.happy
+    def test_subscriptions_are_deduplicated(self):
+        handlers = FilterEventHandlerList()
+
+        first = handlers.subscribe(handler)
+        second = handlers.subscribe(handler)
+
+        assert handlers == [handler]
+
+        first.close()
+        first.close()
+
+        assert handlers == [handler]
+
+        second.close()
+
+        assert handlers == []
+
+    @pytest.mark.happy
+    def test_unsubscribe_while_raising(self):
+        my_filter = MyFilter()
+        called = []
+
+        def first(sender, args):
+            # Another run ends while the event is raised
+            subscription.close()
+
+        def second(sender, args):
+            called.append(sender)
+
+        subscription = my_filter.exit.subscribe(first)
+        my_filter.exit.subscribe(second)
+
+        my_filter._on_exit(FilterEventArgs(None, Context(), State.EXITING))
+
+        assert called == [my_filter]
+
+    @pytest.mark.happy
+    def test_appended_handler_is_kept(self):
+        handlers = FilterEventHandlerList([handler])
+
+        with handlers.subscribe(handler):
+            assert handlers == [handler]
+
+        assert handlers == [handler]
+
+    @pytest.mark.happy
+    def test_iadd_in_place(self):
+        my_filter = MyFilter()
+        handlers = my_filter.start
+
+        my_filter.start += handler
+
+        assert my_filter.start is handlers
+        assert isinstance(my_filter.start, FilterEventHandlerList)
+
+    @pytest.mark.happy
+    def test_pipeline_subscribes_for_run(self):
+        counts = []
+
+        def count_handlers(sender: Filter, args: FilterEventArgs) -> None:
+            counts.append(len(sender.exit))
+
+        my_filter = MyFilter()
+        my_filter.end += count_handlers
+        pipeline = Pipeline([my_filter])
+
+        for _ in range(10_000):
+            pipeline.run(None)
+
+        assert set(counts) == {1}
+        assert len(my_filter.exit) == 0
+
+    @pytest.mark.happy
+    def test_exit_handled_while_subscribed(self):
+        def exit_filter(sender: Filter, args: FilterEventArgs) -> None:
+            args.action = Action.EXIT
+
+        my_filter = MyFilter()
+        my_filter.start += exit_filter
+        pipeline = Pipeline([my_filter, lambda d, c: "not exited"])
+
+        for _ in range(100):
+            assert pipeline.run("exited") == "exited"
+
+        assert len(my_filter.exit) == 0
+
+    @pytest.mark.happy
+    def test_shared_filter_across_threads(self):
+        my_filter = MyFilter()
+        pipelines = [Pipeline([my_filter]) for _ in range(4)]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda i: pipelines[i % 4].run(i), range(2000)))
+
+        assert len(my_filter.exit) == 0
@@ -0,0 +1,66 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from pipelayer import Pipeline
+from pipelayer.interpreter import (HAS_SUBINTERPRETERS, create_executor,
+                                   in_interpreter)
+
+builds = 0
+
+
+def increment(data, context):
+    return data + 1
+
+
+def get_builds(data, context):
+    return builds
+
+
+def build_pipeline():
+    global builds
+    builds += 1
+    return Pipeline([increment, increment], "Mapping")
+
+
+def build_counter():
+    global builds
+    builds += 1
+    return Pipeline([get_builds], "Counter")
+
+
+@pytest.fixture(scope="module")
+def executor():
+    with create_executor(1) as executor:
+        yield executor
+
+
+@pytest.mark.unit
+class TestInInterpreter:
+
+    @pytest.mark.happy
+    def test_run(self, executor):
+        step = in_interpreter(build_pipeline, executor)
+
+        execution = Pipeline([step]).execute(1)
+
+        assert execution.data == 3
+        assert step.name == "build_pipeline"
+        assert [s.name for s in execution.manifest.steps[0].steps[0].steps] == ["increment", "increment"]
+
+    @pytest.mark.happy
+    def test_factory_name(self, executor):
+        step = in_interpreter(f"{__name__}:build_pipeline", executor)
+
+        assert step.name == "build_pipeline"
+        assert step.run(1) == 3
+
+    @pytest.mark.happy
+    def test_built_once_per_worker(self, executor):
+        step = in_interpreter(build_counter, executor)
+
+        assert step.run() == step.run()
+
+    @pytest.mark.happy
+    def test_create_executor(self):
+        with create_executor(1) as executor:
+            assert HAS_SUBINTERPRETERS or isinstance(executor, ProcessPoolExecutor)
@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+def run_python(code: str) -> str:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+@pytest.mark.unit
+class TestLazyImports:
+
+    @pytest.mark.happy
+    def test_import_does_not_load_pydantic(self):
+        output = run_python(
+            "import sys\n"
+            "import pipelayer\n"
+            "from pipelayer import Context, Filter, FilterEventArgs, StepType\n"
+            "print(sorted(m for m in ('pydantic', 'stringbender', 'pipelayer.pipeline') if m in sys.modules))"
+        )
+
+        assert output == "[]"
+
+    @pytest.mark.happy
+    def test_run_does_not_load_pydantic(self):
+        output = run_python(
+            "import sys\n"
+            "from pipelayer import Pipeline\n"
+            "def increment(data, context):\n"
+            "    return data + 1\n"
+            "pipeline = Pipeline([increment])\n"
+            "pipeline.run(1)\n"
+            "print('pydantic' in sys.modules)\n"
+            "pipeline.manifest\n"
+            "print('pydantic' in sys.modules)"
+        )
+
+        assert output.split() == ["False", "True"]
+
+    @pytest.mark.happy
+    def test_names_imported_when_used(self):
+        import pipelayer
+        from pipelayer.pipeline import Pipeline
+
+        assert pipelayer.Pipeline is Pipeline
+        assert "Pipeline" in dir(pipelayer)
+        assert set(pipelayer.__all__) <= set(dir(pipelayer))
+
+    @pytest.mark.sad
+    def test_unknown_name(self):
+        import pipelayer
+
+        with pytest.raises(AttributeError):
+            pipelayer.Unknown
+
+        with pytest.raises(ImportError):
+            from pipelayer import Unknown  # NOQA F401
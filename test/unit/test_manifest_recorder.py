@@ -0,0 +1,102 @@
+import pytest
+from pipelayer import Filter, Pipeline, StepType, Switch
+from pipelayer.manifest import Manifest, close_manifest, create_manifest
+from pipelayer.recorder import Record, Recorder
+
+
+class Increment(Filter):
+    def run(self, data, context):
+        return data + 1
+
+
+class ForeignStep(Filter):
+    """
+    A compound step that returns its own manifest.
+    """
+    manifest = None
+
+    def run(self, data, context):
+        return self._run(data, context)[0]
+
+    def _run(self, data, context):
+        manifest = create_manifest(self.name, StepType.PIPELINE)
+        manifest.steps.append(create_manifest("foreign", StepType.FUNCTION))
+        close_manifest(manifest)
+        return data + 1, manifest
+
+
+def is_even(data, context):
+    return data % 2 == 0
+
+
+@pytest.mark.unit
+class TestManifestRecorder:
+
+    @pytest.mark.happy
+    def test_record(self):
+        recorder = Recorder()
+        root = recorder.open("root", StepType.PIPELINE, -1)
+        child = recorder.open("child", StepType.FILTER, root)
+        recorder.close(child)
+        sibling = recorder.open("sibling", StepType.FUNCTION, root)
+
+        manifest = Record(recorder, root).to_manifest()
+
+        assert isinstance(manifest, Manifest)
+        assert [s.name for s in manifest.steps] == ["child", "sibling"]
+        assert manifest.steps[0].duration is not None
+        assert manifest.steps[1].end is None
+        assert recorder.to_manifest(child) is manifest.steps[0]
+
+        recorder.close(sibling)
+        recorder.close(root)
+
+        assert recorder.to_manifest(sibling).end is not None
+
+    @pytest.mark.happy
+    def test_manifest_created_when_read(self, monkeypatch):
+        calls = []
+        construct = Manifest.construct
+        monkeypatch.setattr(Manifest, "construct", lambda **kwargs: calls.append(kwargs) or construct(**kwargs))
+        pipeline = Pipeline([Increment(), Switch(is_even, {True: Increment()})])
+
+        execution = pipeline.execute(1)
+
+        assert not calls
+        assert [s.name for s in execution.manifest.steps] == ["Increment", "Switch"]
+        assert execution.manifest.step_type == StepType.PIPELINE.value
+        assert len(calls) == 4
+        assert pipeline.manifest is execution.manifest
+
+    @pytest.mark.happy
+    def test_nested_manifests(self):
+        inner = Pipeline([Increment()], "Inner")
+        inner.start += lambda sender, args: None
+        switch = Switch(is_even, {True: inner})
+        pipeline = Pipeline([switch])
+
+        manifest = pipeline.execute(0).manifest
+
+        assert manifest.steps[0].steps[0].name == "Inner"
+        assert manifest.steps[0].steps[0].steps[0].name == "Increment"
+        assert switch.manifest is manifest.steps[0]
+        assert inner.manifest is manifest.steps[0].steps[0]
+
+    @pytest.mark.happy
+    def test_foreign_compound_step(self):
+        manifest = Pipeline([ForeignStep()]).execute(1).manifest
+
+        assert [s.name for s in manifest.steps[0].steps] == ["foreign"]
+
+    @pytest.mark.happy
+    def test_run_started_by_step(self):
+        inner = Pipeline([Increment()], "Inner")
+
+        def run_inner(data, context):
+            return inner.run(data)
+
+        manifest = Pipeline([run_inner]).execute(1).manifest
+
+        assert [s.name for s in manifest.steps] == ["run_inner"]
+        assert manifest.steps[0].steps == []
+        assert inner.manifest.name == "Inner"
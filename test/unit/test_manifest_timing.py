@@ -0,0 +1,109 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from itertools import count
+
+import pytest
+from pipelayer import ExecutorKind, Pipeline, runs_in
+from pipelayer.enum import TraceLevel
+from pipelayer.tracing import Tracing, sampled
+
+
+def step(data, context):
+    return data
+
+
+def wait(data, context):
+    time.sleep(0.02)
+    return data
+
+
+def work(data, context):
+    end = time.thread_time() + 0.02
+    while time.thread_time() < end:
+        pass
+    return data
+
+
+@runs_in(ExecutorKind.IO)
+def work_in_executor(data, context):
+    return work(data, context)
+
+
+async def sleep(data, context):
+    await asyncio.sleep(0.02)
+    return data
+
+
+@pytest.mark.unit
+class TestManifestTiming:
+
+    @pytest.mark.happy
+    def test_duration_ns(self, monkeypatch):
+        clock = count(1_000, 250)
+        monkeypatch.setattr("pipelayer.recorder.perf_counter_ns", lambda: next(clock))
+
+        manifest = Pipeline([step, step]).execute().manifest
+
+        assert [s.duration_ns for s in manifest.steps] == [250, 250]
+        assert manifest.duration_ns == 1_250
+        assert manifest.steps[0].duration == timedelta(0)
+        assert manifest.duration == timedelta(microseconds=1)
+
+    @pytest.mark.happy
+    def test_wall_clock_read_once(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr("pipelayer.recorder.time_ns", lambda: calls.append(None) or 1_611_261_876_000_000_000)
+
+        manifest = Pipeline([step] * 10).execute().manifest
+
+        assert len(calls) == 1
+        assert (manifest.start - datetime(1970, 1, 1)).total_seconds() == pytest.approx(1_611_261_876, abs=1)
+        assert all(manifest.start <= s.start <= s.end <= manifest.end for s in manifest.steps)
+
+    @pytest.mark.happy
+    def test_durations_are_not_negative(self):
+        manifest = Pipeline([step] * 100).execute().manifest
+
+        assert all(s.duration_ns >= 0 for s in manifest.steps)
+
+    @pytest.mark.happy
+    def test_render_manifest(self):
+        from pipelayer.util import render_manifest
+
+        rendered = render_manifest(Pipeline([step]).execute().manifest)
+
+        assert '"duration_ns": ' in rendered
+        assert "null" not in rendered
+
+    @pytest.mark.happy
+    def test_cpu_time(self):
+        pipeline = Pipeline([wait, work], tracing=Tracing(TraceLevel.FULL, cpu_time=True))
+
+        wait_manifest, work_manifest = pipeline.execute().manifest.steps
+
+        assert wait_manifest.cpu_time_ns < wait_manifest.duration_ns / 2
+        assert work_manifest.cpu_time_ns >= 20_000_000
+        assert sampled(1, cpu_time=True).cpu_time
+
+    @pytest.mark.happy
+    def test_cpu_time_in_arun(self):
+        pipeline = Pipeline([work_in_executor, sleep], tracing=Tracing(TraceLevel.FULL, cpu_time=True))
+
+        execution = asyncio.run(pipeline.aexecute())
+        work_manifest, sleep_manifest = execution.manifest.steps
+
+        # The CPU time of a step in an executor is measured in its thread
+        assert work_manifest.executor == "io"
+        assert work_manifest.cpu_time_ns >= 20_000_000
+        # The CPU time of a step that awaited includes other coroutines, so it's unknown
+        assert sleep_manifest.cpu_time_ns is None
+
+    @pytest.mark.happy
+    def test_cpu_time_off_by_default(self):
+        from pipelayer.util import render_manifest
+
+        manifest = Pipeline([step]).execute().manifest
+
+        assert manifest.cpu_time_ns is None
+        assert "cpu_time_ns" not in render_manifest(manifest)
@@ -0,0 +1,194 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pipelayer import (Action, Filter, InExecutor, Parallel, Pipeline,
+                       StepType)
+from pipelayer.filter import raise_events
+from pipelayer.tracing import OFF
+
+
+def increment(data, context):
+    return data + 1
+
+
+def double(data, context):
+    return data * 2
+
+
+def wait(data, context):
+    time.sleep(0.1)
+    return data
+
+
+def get_thread(data, context):
+    return threading.get_ident()
+
+
+def total(outputs, context):
+    return sum(outputs)
+
+
+class Increment(Filter):
+    @raise_events
+    def run(self, data, context):
+        return data + 1
+
+
+def exit_pipeline(sender, args):
+    args.action = Action.EXIT
+
+
+@pytest.mark.unit
+class TestParallel:
+
+    @pytest.mark.happy
+    def test_run(self):
+        parallel = Parallel([increment, double, Pipeline([increment, double])])
+
+        assert parallel.run(3) == [4, 6, 8]
+        assert Parallel([increment, double], total).run(3) == 10
+
+    @pytest.mark.happy
+    def test_branches_run_concurrently(self):
+        parallel = Parallel([wait] * 5)
+
+        start = time.perf_counter()
+        parallel.run(1)
+
+        assert time.perf_counter() - start < 0.3
+
+    @pytest.mark.happy
+    def test_nested(self):
+        # More branches than the pool has workers, which each wait for their own branches
+        with ThreadPoolExecutor(2) as executor:
+            inner = Parallel([increment, increment], total, executor=executor)
+            parallel = Parallel([inner] * 30, total, executor=executor)
+
+            assert parallel.run(1) == 120
+            assert asyncio.run(parallel.arun(1)) == 120
+
+    @pytest.mark.happy
+    def test_nested_in_executor_step(self):
+        with ThreadPoolExecutor(2) as executor:
+            inner = Parallel([increment, increment], total, executor=executor)
+
+            def run_inner(data, context):
+                return inner.run(data)
+
+            parallel = Parallel([InExecutor(run_inner, executor)] * 30, total, executor=executor)
+
+            assert asyncio.run(parallel.arun(1)) == 120
+
+    @pytest.mark.happy
+    def test_executor(self):
+        with ThreadPoolExecutor(1, thread_name_prefix="branch") as executor:
+            threads = Parallel([get_thread, get_thread], executor=executor).run(None)
+            pool_thread = executor.submit(threading.get_ident).result()
+
+        assert threads == [threading.get_ident(), pool_thread]
+
+    @pytest.mark.happy
+    def test_manifest(self):
+        parallel = Parallel([increment, Pipeline([double], "Inner")], total, "Lookups")
+        pipeline = Pipeline([parallel, increment])
+
+        manifest = pipeline.execute(1).manifest
+
+        assert [s.name for s in manifest.steps] == ["Lookups", "increment"]
+        lookups = manifest.steps[0]
+        assert lookups.step_type == StepType.PARALLEL.value
+        assert [(s.name, s.step_type) for s in lookups.steps] == [("increment", "Function"), ("Inner", "Pipeline")]
+        assert lookups.steps[1].steps[0].name == "double"
+        assert all(lookups.start <= s.start and s.end <= lookups.end for s in lookups.steps)
+        assert parallel.execute(1).manifest.name == "Lookups"
+
+    @pytest.mark.happy
+    def test_untraced(self):
+        execution = Pipeline([Parallel([increment, double])], tracing=OFF).execute(1)
+
+        assert execution.data == [2, 2]
+        assert execution.manifest is None
+
+    @pytest.mark.happy
+    def test_branch_exit(self):
+        exiting = Increment()
+        exiting.end += exit_pipeline
+        pipeline = Pipeline([Parallel([exiting, double]), increment])
+
+        execution = pipeline.execute(1)
+
+        assert execution.data == [2, 2]
+        assert [s.name for s in execution.manifest.steps] == ["Parallel"]
+        assert pipeline.run(1) == [2, 2]
+
+    @pytest.mark.happy
+    def test_frozen(self):
+        exiting = Increment()
+        exiting.end += exit_pipeline
+        frozen = Pipeline([Parallel([increment, double], total), Parallel([exiting]), increment]).freeze()
+
+        execution = frozen.execute(1)
+
+        assert execution.data == [5]
+        assert [len(s.steps) for s in execution.manifest.steps] == [2, 1]
+
+    @pytest.mark.happy
+    def test_arun(self):
+        async def async_double(data, context):
+            await asyncio.sleep(0.1)
+            return data * 2
+
+        parallel = Parallel([async_double, async_double, wait, Pipeline([increment])])
+
+        start = time.perf_counter()
+        execution = asyncio.run(Pipeline([parallel]).aexecute(2))
+
+        assert time.perf_counter() - start < 0.3
+        assert execution.data == [4, 4, 2, 3]
+        assert len(execution.manifest.steps[0].steps) == 4
+
+    @pytest.mark.sad
+    def test_branch_error(self):
+        def fail(data, context):
+            raise ValueError()
+
+        with pytest.raises(ValueError):
+            Parallel([increment, fail]).run(1)
+
+    @pytest.mark.sad
+    def test_branch_error_stops_branches(self):
+        finished = []
+
+        def fail(data, context):
+            raise ValueError()
+
+        def slow(data, context):
+            time.sleep(0.05)
+            finished.append(data)
+            return data
+
+        with ThreadPoolExecutor(2) as executor:
+            with pytest.raises(ValueError):
+                Parallel([fail, slow, slow, slow, slow], executor=executor).run(1)
+
+            # The branches that started have finished, and the others don't run
+            assert finished == [1, 1]
+            time.sleep(0.15)
+            assert finished == [1, 1]
+
+    @pytest.mark.sad
+    def test_run_with_coroutine_branches(self):
+        async def async_double(data, context):
+            return data * 2
+
+        with pytest.raises(TypeError):
+            Parallel([async_double]).run(1)
+
+    @pytest.mark.sad
+    def test_subclass(self):
+        with pytest.raises(TypeError):
+            class MyParallel(Parallel):
+                pass
@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pipelayer import Action, Filter, Parallel, Pipeline, Router, Rule, Switch
+from pipelayer.executor import InExecutor
+from pipelayer.filter import raise_events
+
+
+async def double(data, context):
+    await asyncio.sleep(0)
+    return data * 2
+
+
+def increment(data, context):
+    return data + 1
+
+
+async def is_even(data, context):
+    return data % 2 == 0
+
+
+class AsyncIncrement(Filter):
+    @raise_events
+    async def run(self, data, context):
+        await asyncio.sleep(0)
+        return data + 1
+
+
+class ThreadFilter(Filter):
+    @raise_events
+    def run(self, data, context):
+        return [*data, threading.get_ident()]
+
+
+def exit_pipeline(sender, args):
+    args.action = Action.EXIT
+
+
+@pytest.mark.unit
+class TestPipelineAsync:
+
+    @pytest.mark.happy
+    def test_arun(self):
+        pipeline = Pipeline([double, increment, AsyncIncrement()])
+
+        execution = asyncio.run(pipeline.aexecute(2))
+
+        assert execution.data == 6
+        assert [s.name for s in execution.manifest.steps] == ["double", "increment", "AsyncIncrement"]
+
+    @pytest.mark.happy
+    def test_async_filter_events(self):
+        events = []
+        async_increment = AsyncIncrement()
+        async_increment.start += lambda sender, args: events.append(("start", args.data))
+        async_increment.end += lambda sender, args: events.append(("end", args.data))
+        async_increment.end += exit_pipeline
+
+        data = asyncio.run(Pipeline([async_increment, double]).arun(1))
+
+        assert data == 2
+        assert events == [("start", 1), ("end", 2)]
+
+    @pytest.mark.happy
+    def test_nested_switch_and_pipeline(self):
+        inner = Pipeline([double], "Inner")
+        inner.start += lambda sender, args: None
+        switch = Switch(is_even, {True: inner, False: AsyncIncrement()})
+        pipeline = Pipeline([switch, switch])
+
+        execution = asyncio.run(pipeline.aexecute(1))
+
+        assert execution.data == 4
+        assert [s.steps[0].name for s in execution.manifest.steps] == ["AsyncIncrement", "Inner"]
+        assert execution.manifest.steps[1].steps[0].steps[0].name == "double"
+        assert asyncio.run(switch.arun(2)) == 4
+
+    @pytest.mark.happy
+    def test_in_executor(self):
+        loop_thread = threading.get_ident()
+
+        with ThreadPoolExecutor(1) as executor:
+            threads = asyncio.run(Pipeline([
+                ThreadFilter(),
+                InExecutor(ThreadFilter(), executor),
+                InExecutor(ThreadFilter())
+            ]).arun([]))
+
+        assert threads[0] == loop_thread
+        assert loop_thread not in threads[1:]
+        assert Pipeline([InExecutor(ThreadFilter())]).run([]) == [loop_thread]
+
+    @pytest.mark.happy
+    def test_in_executor_exit(self):
+        thread_filter = ThreadFilter()
+        thread_filter.end += exit_pipeline
+
+        manifest = asyncio.run(Pipeline([InExecutor(thread_filter), increment]).aexecute([])).manifest
+
+        assert [s.name for s in manifest.steps] == ["ThreadFilter"]
+
+    @pytest.mark.happy
+    def test_concurrent_runs(self):
+        async def wait(data, context):
+            await asyncio.sleep(0.05)
+            return data
+
+        pipeline = Pipeline([wait, increment])
+
+        async def run_all():
+            return await asyncio.gather(*(pipeline.aexecute(i) for i in range(100)))
+
+        start = time.perf_counter()
+        executions = asyncio.run(run_all())
+
+        assert time.perf_counter() - start < 2
+        assert [e.data for e in executions] == list(range(1, 101))
+        assert all(len(e.manifest.steps) == 2 for e in executions)
+
+    @pytest.mark.sad
+    def test_run_with_coroutine_steps(self):
+        pipeline = Pipeline([Pipeline([double])])
+
+        with pytest.raises(TypeError):
+            pipeline.run(1)
+
+        with pytest.raises(TypeError):
+            pipeline.freeze()
+
+    @pytest.mark.sad
+    def test_run_with_coroutine_cases(self):
+        async_case = Pipeline([Switch(lambda data, context: True, {True: double})])
+        async_expression = Pipeline([Switch(is_even, {True: increment})])
+        router = Pipeline([Router([Rule({"value": 1}, double)])])
+        parallel = Parallel([double])
+
+        for pipeline in (async_case, async_expression):
+            with pytest.raises(TypeError):
+                pipeline.run(2)
+            with pytest.raises(TypeError):
+                pipeline.freeze().run(2)
+        with pytest.raises(TypeError):
+            router.run({"value": 1})
+        with pytest.raises(TypeError):
+            parallel.run(1)
@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pipelayer import (Action, Context, Execution, Filter, FilterEventArgs,
+                       Pipeline, Switch)
+from pipelayer.filter import raise_events
+
+
+class Double(Filter):
+    @raise_events
+    def run(self, data, context) -> int:
+        return data * 2
+
+
+class Increment(Filter):
+    def run(self, data, context) -> int:
+        return data + 1
+
+
+def exit_if_odd(sender: Filter, args: FilterEventArgs) -> None:
+    if args.data % 2:
+        args.action = Action.EXIT
+
+
+def create_pipeline() -> Pipeline:
+    double = Double()
+    double.start += exit_if_odd
+
+    return Pipeline([
+        double,
+        Increment(),
+        Switch(lambda d, c: d % 3, {
+            0: lambda d, c: d,
+            1: lambda d, c: d * 10,
+            2: lambda d, c: -d
+        }, "Mod 3")
+    ])
+
+
+def expected(data: int) -> int:
+    if data % 2:
+        return data
+    data = data * 2 + 1
+    return {0: data, 1: data * 10, 2: -data}[data % 3]
+
+
+@pytest.mark.unit
+class TestPipelineConcurrency:
+
+    @pytest.mark.happy
+    def test_execute(self):
+        execution = create_pipeline().execute(2, Context())
+
+        assert isinstance(execution, Execution)
+        assert execution.data == expected(2)
+        assert [s.name for s in execution.manifest.steps] == ["Double", "Increment", "Mod 3"]
+
+    @pytest.mark.happy
+    def test_exit_does_not_leak_into_next_run(self):
+        pipeline = create_pipeline()
+
+        assert pipeline.run(1) == 1
+        assert len(pipeline.manifest.steps) == 1
+        assert pipeline.run(2) == expected(2)
+        assert len(pipeline.manifest.steps) == 3
+
+    @pytest.mark.happy
+    def test_shared_pipeline_across_threads(self):
+        pipeline = create_pipeline()
+
+        def run(data: int) -> tuple:
+            execution = pipeline.execute(data)
+            return data, execution.data, len(execution.manifest.steps), len(pipeline.manifest.steps)
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(run, range(2000)))
+
+        for data, output, step_count, thread_step_count in results:
+            assert output == expected(data)
+            assert step_count == (1 if data % 2 else 3)
+            assert thread_step_count == step_count
@@ -0,0 +1,155 @@
+import gc
+
+import pytest
+from pipelayer import (Action, Filter, FilterEventArgs, Pipeline,
+                       PipelineEventArgs, Switch)
+from pipelayer.filter import raise_events
+from pipelayer.freeze import FrozenPipeline
+
+
+class Increment(Filter):
+    @raise_events
+    def run(self, data, context) -> int:
+        return data + 1
+
+
+class Double(Filter):
+    def run(self, data, context) -> int:
+        return data * 2
+
+
+def exit_over_ten(sender: Filter, args: FilterEventArgs) -> None:
+    if args.data > 10:
+        args.action = Action.EXIT
+
+
+def to_str(data, context) -> str:
+    return str(data)
+
+
+def create_pipeline() -> Pipeline:
+    increment = Increment()
+    increment.end += exit_over_ten
+
+    return Pipeline([
+        Double,
+        Pipeline([
+            increment,
+            Double(),
+            Switch(lambda d, c: d % 3, {
+                0: lambda d, c: d + 100,
+                1: lambda d, c: d + 200
+            }, "Mod 3")
+        ], "Inner"),
+        lambda d, c: d * 10,
+        to_str
+    ], "Outer")
+
+
+def manifest_names(manifest) -> list:
+    return [(m.name, m.step_type, manifest_names(m)) for m in manifest.steps]
+
+
+@pytest.mark.unit
+class TestPipelineFreeze:
+
+    @pytest.mark.happy
+    @pytest.mark.parametrize("data", range(12))
+    def test_equivalent_to_run(self, data):
+        pipeline = create_pipeline()
+        frozen = pipeline.freeze()
+
+        assert isinstance(frozen, FrozenPipeline)
+        assert frozen.run(data) == pipeline.run(data)
+        assert frozen.manifest.name == pipeline.manifest.name == "Outer"
+        assert manifest_names(frozen.manifest) == manifest_names(pipeline.manifest)
+
+    @pytest.mark.happy
+    def test_nested_steps_are_inlined(self):
+        frozen = create_pipeline().freeze()
+
+        assert "Inner" in frozen.source
+        assert "Mod 3" in frozen.source
+        assert frozen.source.count("while True:") == 2
+
+    @pytest.mark.happy
+    def test_exit_in_top_level(self):
+        increment = Increment()
+        increment.end += exit_over_ten
+        pipeline = Pipeline([increment, lambda d, c: 0])
+        frozen = pipeline.freeze()
+
+        assert frozen.run(20) == pipeline.run(20) == 21
+        assert frozen.run(1) == pipeline.run(1) == 0
+        assert len(frozen.manifest.steps) == 2
+
+    @pytest.mark.happy
+    def test_without_trace(self):
+        frozen = create_pipeline().freeze(trace=False)
+
+        assert frozen.run(1) == create_pipeline().run(1)
+        assert frozen.manifest is None
+        assert "_create_manifest" not in frozen.source
+
+    @pytest.mark.happy
+    def test_step_end_events(self):
+        events = []
+
+        def step_end(sender: Pipeline, args: PipelineEventArgs) -> None:
+            events.append((sender.name, args.manifest_entry.name, args.data))
+
+        pipeline = create_pipeline()
+        pipeline.step_end += step_end
+        pipeline.run(1)
+        expected = list(events)
+        events.clear()
+
+        pipeline.freeze().run(1)
+
+        assert events == expected
+
+    @pytest.mark.happy
+    def test_steps_with_handlers_are_not_inlined(self):
+        events = []
+
+        def inner_start(sender: Filter, args: FilterEventArgs) -> None:
+            events.append(sender.name)
+
+        inner = Pipeline([Double()], "Inner")
+        inner.start += inner_start
+        outer = Pipeline([inner], "Outer")
+        outer.start += inner_start
+        frozen = outer.freeze()
+
+        assert frozen.run(2) == 4
+        assert events == ["Outer", "Inner"]
+        assert frozen.source.count("while True:") == 1
+        assert manifest_names(frozen.manifest) == [("Inner", "Pipeline", [("Double", "Filter", [])])]
+
+    @pytest.mark.happy
+    def test_exit_in_pipeline_that_is_not_inlined(self):
+        pipeline = create_pipeline()
+        pipeline.steps[1].start += lambda sender, args: None
+        frozen = pipeline.freeze()
+
+        assert [frozen.run(data) for data in range(8)] == [pipeline.run(data) for data in range(8)]
+
+    @pytest.mark.happy
+    def test_deeply_nested(self):
+        pipeline = Pipeline([Double()])
+        for _ in range(20):
+            pipeline = Pipeline([pipeline])
+
+        assert pipeline.freeze().run(1) == 2
+
+    @pytest.mark.happy
+    def test_exit_handlers_released(self):
+        increment = Increment()
+        frozen = Pipeline([increment]).freeze()
+
+        assert len(increment.exit) == 1
+
+        del frozen
+        gc.collect()
+
+        assert len(increment.exit) == 0
@@ -0,0 +1,159 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pipelayer import (Action, ExecutorKind, Executors, Filter,
+                       FilterEventArgs, Pipeline, runs_in)
+from pipelayer.filter import raise_events
+from pipelayer.plan import OP_ENTER, OP_LEAVE, OP_STEP
+
+
+class Increment(Filter):
+    @raise_events
+    def run(self, data, context) -> int:
+        return data + 1
+
+
+def exit_over(limit: int):
+    def handler(sender: Filter, args: FilterEventArgs) -> None:
+        if args.data > limit:
+            args.action = Action.EXIT
+    return handler
+
+
+def times_ten(data, context) -> int:
+    return data * 10
+
+
+@runs_in(ExecutorKind.IO)
+def get_thread_name(data, context) -> str:
+    return threading.current_thread().name
+
+
+def do_nothing(sender: Filter, args: FilterEventArgs) -> None:
+    pass
+
+
+def create_pipeline(inline: bool = True) -> Pipeline:
+    exiting = Increment("Exiting")
+    exiting.end += exit_over(3)
+
+    inner = Pipeline([exiting, Increment()], "Inner")
+    middle = Pipeline([Increment(), inner, Increment()], "Middle")
+    if not inline:
+        inner.start += do_nothing
+        middle.start += do_nothing
+
+    return Pipeline([Increment(), middle, times_ten], "Outer")
+
+
+def manifest_names(manifest) -> list:
+    return [(m.name, m.step_type, manifest_names(m)) for m in manifest.steps]
+
+
+@pytest.mark.unit
+class TestPipelineInlining:
+
+    @pytest.mark.happy
+    def test_flat_plan(self):
+        plan = create_pipeline().compile()
+
+        assert len(plan) == 3
+        assert [(step.op, step.entry.name) for step in plan.flat] == [
+            (OP_STEP, "Increment"),
+            (OP_ENTER, "Middle"),
+            (OP_STEP, "Increment"),
+            (OP_ENTER, "Inner"),
+            (OP_STEP, "Exiting"),
+            (OP_STEP, "Increment"),
+            (OP_LEAVE, "Inner"),
+            (OP_STEP, "Increment"),
+            (OP_LEAVE, "Middle"),
+            (OP_STEP, "times_ten"),
+        ]
+        assert [step.exit_to for step in plan.flat if step.op != OP_LEAVE] == [10, 10, 8, 8, 6, 6, 8, 10]
+
+    @pytest.mark.happy
+    @pytest.mark.parametrize("data", [0, 2, 5])
+    def test_equivalent_to_nested_runs(self, data):
+        inlined = create_pipeline()
+        nested = create_pipeline(inline=False)
+
+        assert inlined.run(data) == nested.run(data)
+        assert manifest_names(inlined.manifest) == manifest_names(nested.manifest)
+
+    @pytest.mark.happy
+    def test_exit_leaves_innermost_pipeline(self):
+        pipeline = create_pipeline()
+
+        # 2 + 1 + 1, Inner exits at 5, + 1, * 10
+        assert pipeline.run(2) == 60
+        assert [m.name for m in pipeline.manifest.steps[1].steps[1].steps] == ["Exiting"]
+
+    @pytest.mark.happy
+    def test_nested_manifest_and_step_end(self):
+        events = []
+
+        def step_end(sender: Pipeline, args) -> None:
+            events.append((sender.name, args.manifest_entry.name))
+
+        inner = Pipeline([Increment()], "Inner")
+        outer = Pipeline([inner], "Outer")
+        inner.step_end += step_end
+        outer.step_end += step_end
+
+        assert outer.run(1) == 2
+        assert events == [("Inner", "Increment"), ("Outer", "Inner")]
+        assert inner.manifest.name == "Inner"
+        assert [m.name for m in inner.manifest.steps] == ["Increment"]
+
+    @pytest.mark.happy
+    def test_nested_steps_changed(self):
+        inner_steps = [Increment()]
+        outer = Pipeline([Pipeline(inner_steps, "Inner")])
+        outer.run(0)
+        plan = outer.plan
+
+        inner_steps.append(Increment())
+
+        assert outer.run(0) == 2
+        assert outer.plan is not plan
+
+    @pytest.mark.happy
+    def test_nested_executors_changed(self):
+        inner = Pipeline([get_thread_name], "Inner")
+        outer = Pipeline([inner])
+        asyncio.run(outer.arun())
+
+        with ThreadPoolExecutor(1, thread_name_prefix="inner") as executor:
+            inner.executors = Executors(io=executor)
+
+            assert asyncio.run(outer.arun()).startswith("inner")
+
+    @pytest.mark.happy
+    def test_handlers_added_after_compile(self):
+        events = []
+        inner = Pipeline([Increment()], "Inner")
+        outer = Pipeline([inner])
+        outer.run(0)
+
+        inner.start += lambda sender, args: events.append(sender.name)
+
+        assert outer.run(0) == 1
+        assert events == ["Inner"]
+        assert [m.name for m in outer.manifest.steps[0].steps] == ["Increment"]
+
+    @pytest.mark.happy
+    def test_pipeline_not_inlined_into_itself(self):
+        first = Pipeline([], "First")
+        second = Pipeline([first], "Second")
+        first.steps = [second]
+
+        plan = first.compile()
+
+        assert [(step.op, step.entry.name) for step in plan.flat] == [
+            (OP_ENTER, "Second"),
+            (OP_STEP, "First"),
+            (OP_LEAVE, "Second"),
+        ]
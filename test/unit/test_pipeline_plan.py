@@ -0,0 +1,90 @@
+import pytest
+from pipelayer import Filter, Pipeline, StepType
+from pipelayer.plan import ExecutionPlan, PlanStep
+
+
+class AppendFilter(Filter):
+    def run(self, data, context) -> list:
+        return (data or []) + [self.name]
+
+
+def append_function(data, context) -> list:
+    return (data or []) + ["append_function"]
+
+
+@pytest.mark.unit
+class TestPipelinePlan:
+
+    @pytest.mark.happy
+    def test_compile(self):
+        pipeline = Pipeline([AppendFilter(), append_function, Pipeline([AppendFilter], "Inner")])
+        plan = pipeline.compile()
+
+        assert isinstance(plan, ExecutionPlan)
+        assert pipeline.plan is plan
+        assert len(plan) == 3
+        assert all(isinstance(entry, PlanStep) for entry in plan)
+        assert [entry.name for entry in plan] == ["AppendFilter", "append_function", "Inner"]
+        assert [entry.step_type for entry in plan] == [StepType.FILTER, StepType.FUNCTION, StepType.PIPELINE]
+        assert [entry.is_filter for entry in plan] == [True, False, True]
+        assert [entry.is_compound for entry in plan] == [False, False, True]
+
+    @pytest.mark.happy
+    def test_compiled_on_first_run_and_reused(self):
+        pipeline = Pipeline([AppendFilter(), append_function])
+        assert pipeline.plan is None
+
+        assert pipeline.run() == ["AppendFilter", "append_function"]
+        plan = pipeline.plan
+
+        assert plan is not None
+        assert pipeline.run() == ["AppendFilter", "append_function"]
+        assert pipeline.plan is plan
+
+    @pytest.mark.happy
+    def test_plan_invalidated_when_steps_assigned(self):
+        pipeline = Pipeline([AppendFilter()])
+        pipeline.run()
+        plan = pipeline.plan
+
+        pipeline.steps = [append_function]
+
+        assert pipeline.plan is None
+        assert pipeline.run() == ["append_function"]
+        assert pipeline.plan is not plan
+
+    @pytest.mark.happy
+    def test_plan_invalidated_when_steps_mutated(self):
+        steps = [AppendFilter()]
+        pipeline = Pipeline(steps)
+        pipeline.run()
+        plan = pipeline.plan
+
+        steps.append(append_function)
+
+        assert pipeline.run() == ["AppendFilter", "append_function"]
+        assert pipeline.plan is not plan
+
+    @pytest.mark.happy
+    def test_generator_steps_compiled_once(self):
+        pipeline = Pipeline(step for step in [AppendFilter(), append_function])
+
+        assert pipeline.run() == ["AppendFilter", "append_function"]
+        assert pipeline.run() == ["AppendFilter", "append_function"]
+
+    @pytest.mark.happy
+    def test_class_steps_instantiated_per_run(self):
+        instances = []
+
+        class TrackedFilter(Filter):
+            def run(self, data, context):
+                instances.append(self)
+                return data
+
+        pipeline = Pipeline([TrackedFilter])
+        pipeline.run()
+        pipeline.run()
+
+        assert len(instances) == 2
+        assert instances[0] is not instances[1]
+        assert pipeline.manifest.steps[0].name == "TrackedFilter"
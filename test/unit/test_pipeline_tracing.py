@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+from pipelayer import Filter, Pipeline, Switch
+from pipelayer.enum import TraceLevel
+from pipelayer.recorder import Recorder
+from pipelayer.tracing import FULL, OFF, Tracing, sampled
+
+
+class Increment(Filter):
+    def run(self, data, context):
+        return data + 1
+
+
+def is_even(data, context):
+    return data % 2 == 0
+
+
+def create_pipeline(tracing: Tracing = FULL) -> Pipeline:
+    inner = Pipeline([Increment()], "Inner", tracing=OFF)
+    switch = Switch(is_even, {True: Increment(), False: Pipeline([Increment(), Increment()], "Odd")})
+    return Pipeline([Increment(), inner, switch], "Outer", tracing=tracing)
+
+
+@pytest.mark.unit
+class TestPipelineTracing:
+
+    @pytest.mark.happy
+    def test_full(self):
+        pipeline = create_pipeline()
+
+        execution = pipeline.execute(0)
+
+        assert execution.data == 3
+        assert [s.name for s in execution.manifest.steps] == ["Increment", "Inner", "Switch"]
+        assert pipeline.manifest is execution.manifest
+
+    @pytest.mark.happy
+    def test_off(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(Recorder, "open", lambda *args: calls.append(args))
+        pipeline = create_pipeline(OFF)
+
+        execution = pipeline.execute(0)
+
+        assert execution.data == 3
+        assert execution.manifest is None
+        assert pipeline.manifest is None
+        assert not calls
+
+    @pytest.mark.happy
+    def test_nested_steps_follow_the_run(self):
+        switch = Switch(is_even, {True: Increment(), False: Pipeline([Increment()], "Odd")})
+        pipeline = Pipeline([Increment(), switch])
+
+        Pipeline([pipeline], tracing=OFF).run(0)
+        assert pipeline.manifest is None
+        assert switch.manifest is None
+
+        Pipeline([pipeline]).run(0)
+        assert pipeline.manifest is not None
+        assert switch.manifest is not None
+
+    @pytest.mark.happy
+    def test_steps_start_their_own_runs(self):
+        manifests = []
+        unrelated = Pipeline([Increment()], "Unrelated")
+
+        def run_unrelated(data, context):
+            manifests.append(unrelated.execute(data).manifest)
+            return data
+
+        nested = Pipeline([run_unrelated], "Nested")
+        nested.start += lambda sender, args: None
+        pipeline = Pipeline([run_unrelated, nested], tracing=OFF)
+
+        pipeline.run(0)
+        pipeline.freeze().run(0)
+        asyncio.run(pipeline.arun(0))
+
+        assert nested.manifest is None
+        assert len(manifests) == 6
+        assert all(m is not None and m.name == "Unrelated" for m in manifests)
+
+    @pytest.mark.happy
+    def test_sampled(self):
+        pipeline = create_pipeline(sampled(0.5))
+
+        manifests = [pipeline.execute(0).manifest for _ in range(200)]
+
+        assert any(m is None for m in manifests)
+        assert any(m is not None for m in manifests)
+
+    @pytest.mark.happy
+    def test_step_end_without_manifest(self):
+        events = []
+        pipeline = create_pipeline(OFF)
+        pipeline.step_end += lambda sender, args: events.append(args.manifest_entry)
+
+        pipeline.run(0)
+
+        assert events == [None, None, None]
+
+    @pytest.mark.happy
+    def test_tracing_property(self):
+        pipeline = create_pipeline()
+        assert pipeline.tracing is FULL
+
+        pipeline.tracing = OFF
+
+        assert pipeline.execute(0).manifest is None
+
+    @pytest.mark.happy
+    def test_freeze(self):
+        pipeline = create_pipeline(sampled(0.5))
+
+        frozen = pipeline.freeze()
+        manifests = [frozen.execute(0).manifest for _ in range(200)]
+
+        assert frozen.tracing.level is TraceLevel.SAMPLED
+        assert any(m is None for m in manifests)
+        assert any(m is not None and len(m.steps) == 3 for m in manifests)
+        assert pipeline.freeze(False).tracing is OFF
+        assert pipeline.freeze(True).tracing is FULL
+
+    @pytest.mark.sad
+    @pytest.mark.parametrize("rate", [-0.1, 2])
+    def test_sampled_rate_out_of_range(self, rate):
+        with pytest.raises(ValueError):
+            sampled(rate)
@@ -0,0 +1,123 @@
+import asyncio
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from pipelayer import (Action, Context, Filter, InProcess, Parallel, Pipeline,
+                       Router, Rule, Switch)
+from pipelayer.filter import raise_events
+from pipelayer.tracing import OFF
+
+
+def get_pid(data, context):
+    return os.getpid()
+
+
+def increment(data, context):
+    return data + 1
+
+
+def double(data, context):
+    return data * 2
+
+
+def is_even(data, context):
+    return data % 2 == 0
+
+
+def add_offset(data, context):
+    return data + context.offset
+
+
+def total(outputs, context):
+    return sum(outputs)
+
+
+class Increment(Filter):
+    @raise_events
+    def run(self, data, context):
+        return data + 1
+
+
+class ExitingIncrement(Filter):
+    def __init__(self):
+        super().__init__()
+        self.end += exit_pipeline
+
+    @raise_events
+    def run(self, data, context):
+        return data + 1
+
+
+def exit_pipeline(sender, args):
+    args.action = Action.EXIT
+
+
+@pytest.fixture(scope="module")
+def executor():
+    with ProcessPoolExecutor(2) as executor:
+        yield executor
+
+
+@pytest.mark.unit
+class TestInProcess:
+
+    @pytest.mark.happy
+    def test_run(self, executor):
+        assert InProcess(get_pid, executor).run() != os.getpid()
+        assert Pipeline([increment, InProcess(Pipeline([double, Increment()]), executor)]).run(1) == 5
+
+    @pytest.mark.happy
+    def test_context_keys(self, executor):
+        context = Context()
+        context.offset = 10
+        context.lock = object()
+
+        assert InProcess(add_offset, executor, ["offset"]).run(1, context) == 11
+
+    @pytest.mark.happy
+    def test_manifest(self, executor):
+        pipeline = Pipeline([InProcess(Pipeline([double, increment], "Mapping"), executor), increment])
+
+        manifest = pipeline.execute(1).manifest
+
+        assert [s.name for s in manifest.steps] == ["Mapping", "increment"]
+        child = manifest.steps[0].steps[0]
+        assert (child.name, child.step_type) == ("Mapping", "Pipeline")
+        assert [s.name for s in child.steps] == ["double", "increment"]
+        assert child.duration_ns <= manifest.steps[0].duration_ns
+        assert Pipeline([InProcess(increment, executor)], tracing=OFF).execute(1).manifest is None
+
+    @pytest.mark.happy
+    def test_exit(self, executor):
+        pipeline = Pipeline([InProcess(ExitingIncrement(), executor), increment])
+
+        assert pipeline.run(1) == 2
+
+    @pytest.mark.happy
+    def test_arun(self, executor):
+        execution = asyncio.run(Pipeline([InProcess(double, executor), increment]).aexecute(2))
+
+        assert execution.data == 5
+        assert execution.manifest.steps[0].steps[0].name == "double"
+
+    @pytest.mark.happy
+    def test_pickle_compound_steps(self):
+        steps = [
+            Pipeline([increment, Increment()], "P"),
+            Switch(is_even, {True: double}, default=increment),
+            Router([Rule({"real": 2}, double)], default=increment),
+            Parallel([increment, double], total)
+        ]
+        steps[0].start += lambda sender, args: None
+
+        for step in steps:
+            copy = pickle.loads(pickle.dumps(step))
+            assert type(copy) is type(step) and copy.name == step.name
+            assert copy.run(2) == step.run(2)
+
+    @pytest.mark.sad
+    def test_unpicklable_step(self, executor):
+        with pytest.raises((pickle.PicklingError, AttributeError)):
+            InProcess(lambda data, context: data, executor).run(1)
@@ -0,0 +1,110 @@
+from types import SimpleNamespace
+
+import pytest
+from pipelayer import Pipeline, Router, Rule, StepType
+from pipelayer.case import Labels
+
+
+def route(name: str):
+    return lambda data, context: name
+
+
+def create_router() -> Router:
+    return Router([
+        Rule({"country": "GB", "tier": Labels("gold", "silver")}, route("gb premium"), "GB Premium"),
+        Rule({"country": "GB"}, route("gb")),
+        Rule({"tier": "gold", "type": "json"}, route("gold json")),
+        Rule({"country": Labels("FR", "DE"), "type": "xml"}, route("eu xml")),
+    ], "Route", default=route("default"))
+
+
+@pytest.mark.unit
+class TestRouter:
+
+    @pytest.mark.happy
+    @pytest.mark.parametrize("record, expected", [
+        ({"country": "GB", "tier": "gold", "type": "json"}, "gb premium"),
+        ({"country": "GB", "tier": "silver"}, "gb premium"),
+        ({"country": "GB", "tier": "bronze", "type": "json"}, "gb"),
+        ({"country": "US", "tier": "gold", "type": "json"}, "gold json"),
+        ({"country": "DE", "tier": "gold", "type": "json"}, "gold json"),
+        ({"country": "DE", "tier": "bronze", "type": "xml"}, "eu xml"),
+        ({"country": "DE", "tier": "bronze", "type": "json"}, "default"),
+        ({}, "default"),
+    ])
+    def test_first_matching_rule(self, record, expected):
+        assert create_router().run(record) == expected
+
+    @pytest.mark.happy
+    def test_attributes_and_field_functions(self):
+        router = Router(
+            [Rule({"country": "GB", "big": True}, route("big gb"))],
+            fields={"big": lambda d, c: d.size > 100}
+        )
+
+        assert router.run(SimpleNamespace(country="GB", size=1000)) == "big gb"
+        assert router.run(SimpleNamespace(country="GB", size=10)).size == 10
+
+    @pytest.mark.happy
+    def test_fields_read_once(self):
+        reads = []
+
+        def tier(data, context):
+            reads.append(data)
+            return data["tier"]
+
+        router = Router([
+            Rule({"tier": "gold", "country": "GB"}, route("a")),
+            Rule({"tier": "gold"}, route("b")),
+            Rule({"tier": "silver"}, route("c")),
+        ], fields={"tier": tier})
+
+        assert router.run({"tier": "gold", "country": "US"}) == "b"
+        assert len(reads) == 1
+
+    @pytest.mark.happy
+    def test_manifest(self):
+        router = create_router()
+        pipeline = Pipeline([router])
+
+        pipeline.run({"country": "GB", "tier": "gold"})
+
+        assert router.manifest.name == "Route"
+        assert router.manifest.step_type == StepType.ROUTER.value
+        assert [m.name for m in router.manifest.steps] == ["GB Premium"]
+        assert pipeline.manifest.steps[0].step_type == StepType.ROUTER.value
+        assert [m.name for m in pipeline.manifest.steps[0].steps] == ["GB Premium"]
+
+    @pytest.mark.happy
+    def test_no_match_without_default(self):
+        router = Router([Rule({"country": "GB"}, route("gb"))])
+
+        assert router.run({"country": "US"}) == {"country": "US"}
+        assert router.manifest.steps[0].name == "Default"
+
+    @pytest.mark.happy
+    def test_compound_step(self):
+        router = Router([Rule({}, Pipeline([route("inner")], "Inner"))])
+
+        assert router.run({}) == "inner"
+        assert router.manifest.steps[0].name == "Inner"
+
+    @pytest.mark.happy
+    def test_many_rules(self):
+        router = Router(
+            [Rule({"country": f"C{i}", "tier": f"T{i % 7}"}, route(str(i))) for i in range(300)]
+        )
+
+        assert router.run({"country": "C123", "tier": "T4"}) == "123"
+        assert router.run({"country": "C123", "tier": "T5"}) == {"country": "C123", "tier": "T5"}
+
+    @pytest.mark.sad
+    def test_unhashable_rule_value(self):
+        with pytest.raises(TypeError):
+            Router([Rule({"country": ["GB"]}, route("gb"))]).compile()
+
+    @pytest.mark.sad
+    def test_subclass(self):
+        with pytest.raises(TypeError):
+            class MyRouter(Router):
+                pass
@@ -0,0 +1,132 @@
+import pytest
+from pipelayer import Filter, Pipeline, StepType, Switch
+from pipelayer.enum import Action, EnumContains
+from pipelayer.protocol import ICompoundStep, IFilter, IStep
+from pipelayer.step import (StepKind, classify_step, get_proxy,
+                            get_step_type, register_step_type)
+
+
+class MyFilter(Filter):
+    def run(self, data, context):
+        return data
+
+
+class PlainStep:
+    def __init__(self, name: str = "") -> None:
+        self.name = name
+
+    def run(self, data, context):
+        return data
+
+
+class StaticStep:
+    @staticmethod
+    def run(data, context):
+        return data
+
+
+class InstanceRunStep:
+    def __init__(self) -> None:
+        self.run = lambda data, context: data
+
+
+class NoneRunStep:
+    run = None
+
+
+def my_function(data, context):
+    return data
+
+
+def get_objects() -> list:
+    instance_run_step = InstanceRunStep()
+    return [
+        MyFilter(),
+        PlainStep("plain"),
+        StaticStep(),
+        instance_run_step,
+        NoneRunStep(),
+        Pipeline([]),
+        Switch(None, {}),
+        get_proxy(my_function),
+        my_function,
+        lambda d, c: d,
+        MyFilter,
+        StaticStep,
+        None,
+        "step",
+    ]
+
+
+@pytest.mark.unit
+class TestStepClassification:
+
+    @pytest.mark.happy
+    @pytest.mark.parametrize("obj", get_objects())
+    def test_matches_protocols(self, obj):
+        kind = classify_step(obj)
+
+        assert kind.is_step is isinstance(obj, IStep)
+        assert kind.is_filter is isinstance(obj, IFilter)
+        assert kind.is_compound is isinstance(obj, ICompoundStep)
+        assert classify_step(obj) == kind
+
+    @pytest.mark.happy
+    def test_step_types(self):
+        assert get_step_type(MyFilter()) is StepType.FILTER
+        assert get_step_type(PlainStep()) is StepType.FILTER
+        assert get_step_type(Pipeline([])) is StepType.PIPELINE
+        assert get_step_type(Switch(None, {})) is StepType.SWITCH
+        assert get_step_type(get_proxy(my_function)) is StepType.FUNCTION
+        assert get_step_type(my_function) is StepType.FUNCTION
+
+    @pytest.mark.happy
+    def test_instance_members_checked_per_instance(self):
+        class CompoundStep(PlainStep):
+            manifest = None
+
+            def _run(self, data, context):
+                return data, None
+
+        unnamed = CompoundStep()
+        del unnamed.name
+
+        assert classify_step(CompoundStep()).is_compound
+        assert not classify_step(unnamed).is_compound
+        assert classify_step(InstanceRunStep()).is_step
+        assert not classify_step(NoneRunStep()).is_step
+
+    @pytest.mark.happy
+    def test_register_step_type(self):
+        class DynamicStep:
+            def __getattr__(self, name):
+                raise AttributeError(name)
+
+        assert not classify_step(DynamicStep()).is_step
+
+        register_step_type(DynamicStep, StepType.PIPELINE, is_filter=True, is_compound=True)
+
+        assert classify_step(DynamicStep()) == StepKind(StepType.PIPELINE, True, True, True)
+
+
+@pytest.mark.unit
+class TestEnumContains:
+
+    @pytest.mark.happy
+    def test_contains(self):
+        assert Action.EXIT in Action
+        assert 3 in Action
+        assert "Pipeline" in StepType
+        assert 4 not in Action
+        assert "Pipe" not in StepType
+        assert StepType.PIPELINE not in Action
+
+    @pytest.mark.sad
+    def test_contains_unhashable(self):
+        from enum import Enum
+
+        class Shape(Enum, metaclass=EnumContains):
+            SQUARE = 4
+
+        assert [] not in Shape
+        assert {} not in StepType
@@ -0,0 +1,153 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pipelayer import Filter, Pipeline, Scope, Scoped, Switch
+from pipelayer.lifecycle import PooledLifecycle, register_scope
+
+
+def create_filter_type():
+    class CountingFilter(Filter):
+        instances: list = []
+
+        def __init__(self) -> None:
+            super().__init__()
+            self.busy = False
+            CountingFilter.instances.append(self)
+
+        def run(self, data, context):
+            assert not self.busy
+            self.busy = True
+            time.sleep(0.001)
+            self.busy = False
+            return (data or []) + [self]
+
+    return CountingFilter
+
+
+@pytest.mark.unit
+class TestStepLifecycle:
+
+    @pytest.mark.happy
+    def test_run_scope_by_default(self):
+        filter_type = create_filter_type()
+        pipeline = Pipeline([filter_type])
+
+        first = pipeline.run()[0]
+        second = pipeline.run()[0]
+
+        assert first is not second
+        assert pipeline.manifest.steps[0].name == "CountingFilter"
+
+    @pytest.mark.happy
+    def test_compiled_instance_is_run(self):
+        filter_type = create_filter_type()
+        pipeline = Pipeline([filter_type, Scoped(filter_type)])
+
+        pipeline.compile()
+
+        assert len(filter_type.instances) == 2
+        assert pipeline.run() == filter_type.instances
+        assert len(pipeline.run()) == 2
+        assert len(filter_type.instances) == 4
+
+    @pytest.mark.happy
+    def test_singleton(self):
+        filter_type = create_filter_type()
+        pipeline = Pipeline([Scoped(filter_type, Scope.SINGLETON)])
+
+        outputs = [pipeline.run()[0] for _ in range(3)]
+
+        assert len(filter_type.instances) == 1
+        assert all(output is filter_type.instances[0] for output in outputs)
+        assert pipeline.manifest.steps[0].name == "CountingFilter"
+
+    @pytest.mark.happy
+    def test_thread(self):
+        filter_type = create_filter_type()
+        pipeline = Pipeline([Scoped(filter_type, Scope.THREAD)])
+
+        def run_twice() -> bool:
+            return pipeline.run()[0] is pipeline.run()[0]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            assert all(executor.map(lambda _: run_twice(), range(4)))
+
+        outputs = []
+        thread = threading.Thread(target=lambda: outputs.append(pipeline.run()[0]))
+        thread.start()
+        thread.join()
+
+        assert outputs[0] is not pipeline.run()[0]
+
+    @pytest.mark.happy
+    def test_pooled(self):
+        filter_type = create_filter_type()
+        pipeline = Pipeline([Scoped(filter_type, Scope.POOLED, pool_size=2)])
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            outputs = list(executor.map(lambda _: pipeline.run()[0], range(100)))
+
+        assert len(outputs) == 100
+        assert len(filter_type.instances) < 100
+        assert pipeline.run()[0] in filter_type.instances
+
+    @pytest.mark.happy
+    def test_pooled_keeps_pool_size(self):
+        lifecycle = PooledLifecycle(object, pool_size=1)
+        first, second = lifecycle.acquire(), lifecycle.acquire()
+        lifecycle.release(first)
+        lifecycle.release(second)
+
+        assert lifecycle.acquire() is first
+        assert lifecycle.acquire() is not second
+
+    @pytest.mark.happy
+    def test_factory(self):
+        filter_type = create_filter_type()
+        created = []
+
+        def factory():
+            created.append(filter_type())
+            return created[-1]
+
+        pipeline = Pipeline([Scoped(filter_type, Scope.SINGLETON, factory)])
+        pipeline.run()
+        pipeline.run()
+
+        assert len(created) == 1
+
+    @pytest.mark.happy
+    def test_register_scope(self):
+        filter_type = register_scope(create_filter_type(), Scope.SINGLETON)
+        pipeline = Pipeline([filter_type])
+
+        assert pipeline.run()[0] is pipeline.run()[0]
+        assert len(filter_type.instances) == 1
+
+    @pytest.mark.happy
+    def test_switch_case(self):
+        filter_type = create_filter_type()
+        switch = Switch(lambda d, c: "a", {"a": Scoped(filter_type, Scope.SINGLETON)})
+
+        assert switch.run(None)[0] is switch.run(None)[0]
+
+    @pytest.mark.happy
+    def test_frozen(self):
+        filter_type = create_filter_type()
+        frozen = Pipeline([Scoped(filter_type, Scope.POOLED, pool_size=1), filter_type]).freeze()
+
+        first = frozen.run()
+        second = frozen.run()
+
+        assert first[0] is second[0]
+        assert first[1] is not second[1]
+
+    @pytest.mark.sad
+    def test_invalid_scope(self):
+        with pytest.raises(TypeError):
+            Scoped(create_filter_type(), "request")
+
+        with pytest.raises(ValueError):
+            Scoped(create_filter_type(), Scope.POOLED, pool_size=0)
@@ -0,0 +1,109 @@
+import gc
+import inspect
+from functools import wraps
+
+import pytest
+from pipelayer import Pipeline, StepType
+from pipelayer.step import (_metadata_cache, get_function_metadata,
+                            get_proxy, get_step_name)
+
+
+def create_lambda():
+    return lambda data, context: data
+
+
+@pytest.mark.unit
+class TestStepMetadata:
+
+    @pytest.mark.happy
+    def test_lambda_source_read_once(self, monkeypatch):
+        calls = []
+        getsource = inspect.getsource
+
+        def counting_getsource(obj):
+            calls.append(obj)
+            return getsource(obj)
+
+        monkeypatch.setattr(inspect, "getsource", counting_getsource)
+
+        names = {get_step_name(create_lambda()) for _ in range(10)}
+
+        assert names == {"<return lambda data, context: data>"}
+        assert len(calls) <= 1
+
+    @pytest.mark.happy
+    def test_signature_inspected_once(self, monkeypatch):
+        calls = []
+        signature = inspect.signature
+
+        def counting_signature(obj, *args, **kwargs):
+            calls.append(obj)
+            return signature(obj, *args, **kwargs)
+
+        monkeypatch.setattr(inspect, "signature", counting_signature)
+
+        def step(data, context):
+            return data
+
+        for _ in range(10):
+            Pipeline([step, lambda d, c: d]).run()
+
+        assert len(calls) == 2
+
+    @pytest.mark.happy
+    def test_metadata(self):
+        def my_step(data, context):
+            return data
+
+        metadata = get_function_metadata(my_step)
+
+        assert metadata.name == "my_step"
+        assert metadata.step_type is StepType.FUNCTION
+        assert list(metadata.signature.parameters) == ["data", "context"]
+        assert metadata.is_valid
+        assert get_function_metadata(my_step) is metadata
+
+    @pytest.mark.happy
+    def test_metadata_of_wrapped_function(self):
+        def decorate(func):
+            @wraps(func)
+            def wrapper(*args):
+                return func(*args)
+            return wrapper
+
+        @decorate
+        def first(data, context):
+            return data
+
+        @decorate
+        def second(data):
+            return data
+
+        assert get_function_metadata(first).is_valid
+        assert not get_function_metadata(second).is_valid
+
+    @pytest.mark.happy
+    def test_metadata_cache_is_weak(self):
+        namespace: dict = {}
+        exec("def temporary(data, context):\n    return data", namespace)
+        code = namespace["temporary"].__code__
+        get_function_metadata(namespace["temporary"])
+
+        assert code in _metadata_cache
+
+        del namespace["temporary"]
+        del code
+        gc.collect()
+
+        assert not any(c.co_name == "temporary" for c in _metadata_cache.keys())
+
+    @pytest.mark.happy
+    def test_proxy_cached(self):
+        def my_step(data, context):
+            return data
+
+        proxy = get_proxy(my_step)
+
+        assert get_proxy(my_step) is proxy
+        assert proxy.func is my_step
+        assert get_proxy(lambda d, c: d) is not proxy
@@ -0,0 +1,232 @@
+import gc
+import threading
+import time
+from itertools import count
+
+import pytest
+from pipelayer import Action, Context, Filter, Pipeline
+from pipelayer.filter import raise_events
+from pipelayer.stream import Stream
+
+
+def increment(data, context):
+    return data + 1
+
+
+def double(data, context):
+    return data * 2
+
+
+def wait(data, context):
+    time.sleep(0.02)
+    return data
+
+
+def wait_for_odd(data, context):
+    # Odd records finish after the records after them
+    time.sleep(0.02 if data % 2 else 0)
+    return data
+
+
+class ExitOnEven(Filter):
+    def __init__(self):
+        super().__init__()
+        self.end += exit_on_even
+
+    @raise_events
+    def run(self, data, context):
+        return data
+
+
+def exit_on_even(sender, args):
+    if args.data % 2 == 0:
+        args.action = Action.EXIT
+
+
+@pytest.mark.unit
+class TestStream:
+
+    @pytest.mark.happy
+    def test_stream(self):
+        pipeline = Pipeline([increment, double, Pipeline([increment])])
+
+        assert list(pipeline.stream(range(10))) == [pipeline.run(i) for i in range(10)]
+
+    @pytest.mark.happy
+    def test_empty_pipeline(self):
+        assert list(Pipeline([]).stream(range(3))) == [0, 1, 2]
+        assert list(Pipeline([]).stream(range(3), maxsize=1, ordered=False)) == [0, 1, 2]
+
+    @pytest.mark.happy
+    def test_stages_overlap(self):
+        pipeline = Pipeline([wait, wait, wait])
+
+        start = time.perf_counter()
+        assert list(pipeline.stream(range(10))) == list(range(10))
+
+        # One record at a time, 10 records of 3 steps take 0.6s
+        assert time.perf_counter() - start < 0.45
+
+    @pytest.mark.happy
+    def test_ordered(self):
+        pipeline = Pipeline([wait_for_odd, increment])
+
+        assert list(pipeline.stream(range(20), workers=(4, 1))) == list(range(1, 21))
+
+    @pytest.mark.happy
+    def test_unordered(self):
+        pipeline = Pipeline([wait_for_odd])
+
+        outputs = list(pipeline.stream(range(20), workers=4, ordered=False))
+
+        assert sorted(outputs) == list(range(20))
+        assert outputs != list(range(20))
+
+    @pytest.mark.happy
+    def test_backpressure(self):
+        read = []
+
+        def records():
+            for i in range(100):
+                read.append(i)
+                yield i
+
+        with Pipeline([wait]).stream(records(), maxsize=2) as stream:
+            next(stream)
+            time.sleep(0.1)
+
+            # The input queue, the worker and the output queue hold a few records
+            assert len(read) < 10
+
+    @pytest.mark.happy
+    def test_ordered_backpressure(self):
+        read = []
+
+        def records():
+            for i in range(1000):
+                read.append(i)
+                yield i
+
+        def wait_for_first(data, context):
+            time.sleep(0.2 if data == 0 else 0)
+            return data
+
+        with Pipeline([wait_for_first]).stream(records(), workers=4, maxsize=2) as stream:
+            assert next(stream) == 0
+
+            # The outputs of the records after the first wait for it, but not all the records are read
+            assert len(read) < 20
+
+    @pytest.mark.happy
+    def test_not_closed(self):
+        def not_closed(data, context):
+            return data
+
+        stream = Pipeline([not_closed]).stream(count())
+        next(stream)
+        names = ("pipelayer-stream-input", "pipelayer-stream-not_closed")
+        threads = [thread for thread in threading.enumerate() if thread.name in names]
+
+        del stream
+        gc.collect()
+
+        for thread in threads:
+            thread.join(1)
+        assert not any(thread.is_alive() for thread in threads)
+
+    @pytest.mark.happy
+    def test_close_while_reading(self):
+        read = threading.Event()
+
+        def records():
+            yield 1
+            read.wait()
+
+        stream = Pipeline([increment]).stream(records())
+
+        assert next(stream) == 2
+        # The input thread is reading the next record
+        stream.close()
+        read.set()
+
+    @pytest.mark.happy
+    def test_exit(self):
+        pipeline = Pipeline([ExitOnEven(), increment])
+
+        assert list(pipeline.stream(range(6), workers=2)) == [0, 2, 2, 4, 4, 6]
+
+    @pytest.mark.happy
+    def test_stats(self):
+        stream = Pipeline([increment, wait]).stream(range(10), workers=(1, 2))
+
+        list(stream)
+        stats = stream.stats
+
+        assert [(s.name, s.workers, s.processed) for s in stats] == [("increment", 1, 10), ("wait", 2, 10)]
+        assert stats[1].busy_ns >= 10 * 20_000_000
+        assert stats[1].throughput > 0
+        assert 0 < stats[1].utilization <= 1
+
+    @pytest.mark.happy
+    def test_context(self):
+        lock = threading.Lock()
+
+        def count(data, context):
+            with lock:
+                context.count += 1
+            return data
+
+        pipeline = Pipeline([count, count])
+        context = Context()
+        context.count = 0
+
+        list(pipeline.stream(range(5), context, workers=3))
+
+        assert context.count == 10
+
+    @pytest.mark.sad
+    def test_step_error(self):
+        def fail(data, context):
+            if data == 3:
+                raise ValueError()
+            return data
+
+        stream = Pipeline([fail, increment]).stream(range(100), maxsize=1)
+
+        with pytest.raises(ValueError):
+            list(stream)
+        assert next(stream, None) is None
+
+    @pytest.mark.sad
+    def test_input_error(self):
+        def records():
+            yield 1
+            raise KeyError()
+
+        with pytest.raises(KeyError):
+            list(Pipeline([increment]).stream(records()))
+
+    @pytest.mark.sad
+    def test_invalid_arguments(self):
+        pipeline = Pipeline([increment, double])
+
+        with pytest.raises(ValueError):
+            pipeline.stream([], workers=(1,))
+        with pytest.raises(ValueError):
+            pipeline.stream([], workers=0)
+        with pytest.raises(ValueError):
+            pipeline.stream([], maxsize=0)
+
+    @pytest.mark.sad
+    def test_coroutine_steps(self):
+        async def async_increment(data, context):
+            return data + 1
+
+        with pytest.raises(TypeError):
+            Pipeline([async_increment]).stream([1])
+
+    @pytest.mark.sad
+    def test_subclass(self):
+        with pytest.raises(TypeError):
+            class MyStream(Stream):
+                pass
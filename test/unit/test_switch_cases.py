@@ -0,0 +1,104 @@
+import pytest
+from pipelayer import Switch
+from pipelayer.case import Interval, Labels, Predicate
+
+
+def named(name: str):
+    return lambda data, context: name
+
+
+def create_switch() -> Switch:
+    return Switch(lambda d, c: d, {
+        Interval(None, 0): named("negative"),
+        Interval(0, 1024): named("small"),
+        Interval(1024, 1024 * 1024): named("medium"),
+        Interval(1024 * 1024, None): named("large"),
+    })
+
+
+@pytest.mark.unit
+class TestSwitchCases:
+
+    @pytest.mark.happy
+    @pytest.mark.parametrize("data, expected", [
+        (-5, "negative"),
+        (0, "small"),
+        (1023.5, "small"),
+        (1024, "medium"),
+        (1024 * 1024, "large"),
+        (10 ** 9, "large"),
+    ])
+    def test_intervals(self, data, expected):
+        assert create_switch().run(data) == expected
+
+    @pytest.mark.happy
+    def test_interval_gaps(self):
+        switch = Switch(lambda d, c: d, {
+            Interval(10, 20): named("teens"),
+            Interval(30, 40): named("thirties"),
+        })
+
+        assert switch.run(5) == 5
+        assert switch.run(25) == 25
+        assert switch.run(40) == 40
+        assert switch.run(35) == "thirties"
+        assert switch.run("text") == "text"
+
+    @pytest.mark.happy
+    def test_many_intervals(self):
+        switch = Switch(lambda d, c: d, {Interval(i * 10, i * 10 + 10): named(str(i)) for i in range(500)})
+
+        assert switch.run(0) == "0"
+        assert switch.run(4999) == "499"
+        assert switch.run(1234) == "123"
+
+    @pytest.mark.happy
+    def test_labels(self):
+        switch = Switch(lambda d, c: d, {
+            Labels("GB", "IE"): named("uk and ireland"),
+            "FR": named("france"),
+        })
+
+        assert switch.run("IE") == "uk and ireland"
+        assert switch.run("GB") == "uk and ireland"
+        assert switch.run("FR") == "france"
+        assert switch.run("DE") == "DE"
+
+    @pytest.mark.happy
+    def test_labels_before_intervals_before_predicates(self):
+        switch = Switch(lambda d, c: d, {
+            Predicate(lambda value: value % 2 == 0): named("even"),
+            Interval(0, 10): named("digit"),
+            Labels(4, 5): named("four or five"),
+        }, default=named("default"))
+
+        assert switch.run(4) == "four or five"
+        assert switch.run(2) == "digit"
+        assert switch.run(12) == "even"
+        assert switch.run(13) == "default"
+
+    @pytest.mark.happy
+    def test_label_equality(self):
+        assert Interval(0, 1) == Interval(0, 1)
+        assert Labels(1, 2) == Labels(1, 2)
+        assert len({Interval(0, 1), Interval(0, 1), Labels(0, 1)}) == 2
+        assert 0.5 in Interval(0, 1)
+        assert 1 not in Interval(0, 1)
+
+    @pytest.mark.sad
+    def test_overlapping_intervals(self):
+        switch = Switch(lambda d, c: d, {
+            Interval(0, 10): named("first"),
+            Interval(5, 15): named("second"),
+        })
+
+        with pytest.raises(ValueError):
+            switch.run(1)
+
+        with pytest.raises(ValueError):
+            Switch(lambda d, c: d, {Interval(None, 0): named("a"), Interval(None, 5): named("b")}).compile()
+
+    @pytest.mark.sad
+    def test_invalid_interval(self):
+        with pytest.raises(ValueError):
+            Interval(10, 0)
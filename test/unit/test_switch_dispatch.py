@@ -0,0 +1,112 @@
+import pytest
+from pipelayer import Filter, Pipeline, StepType, Switch
+
+
+class Increment(Filter):
+    def run(self, data, context) -> int:
+        return data + 1
+
+
+class AnyOf:
+    def __init__(self, *values) -> None:
+        self.values = values
+
+    def __eq__(self, other) -> bool:
+        return other in self.values
+
+    def __hash__(self) -> int:
+        return id(self)
+
+
+@pytest.mark.unit
+class TestSwitchDispatch:
+
+    @pytest.mark.happy
+    def test_expression_evaluated_once(self):
+        calls = []
+
+        def expression(data, context):
+            calls.append(data)
+            return data
+
+        switch = Switch(expression, {label: (lambda d, c: d * 2) for label in range(50)})
+
+        assert switch.run(49) == 98
+        assert switch.run(100) == 100
+        assert calls == [49, 100]
+
+    @pytest.mark.happy
+    def test_compiled_once(self):
+        switch = Switch(lambda d, c: d, {1: Increment()})
+        switch.run(1)
+        table = switch.table
+
+        switch.run(1)
+
+        assert table is not None
+        assert switch.table is table
+
+    @pytest.mark.happy
+    def test_default(self):
+        def negate(data, context) -> int:
+            return -data
+
+        switch = Switch(lambda d, c: d, {1: Increment()}, default=negate)
+
+        assert switch.run(1) == 2
+        assert switch.run(5) == -5
+        assert switch.manifest.steps[0].name == "negate"
+
+        switch.default = None
+
+        assert switch.run(5) == 5
+        assert switch.manifest.steps[0].name == "Default"
+        assert switch.manifest.steps[0].step_type == StepType.UNDEFINED.value
+
+    @pytest.mark.happy
+    def test_labels_compared_by_equality(self):
+        switch = Switch(lambda d, c: d, {
+            1: lambda d, c: "one",
+            AnyOf(2, 3): lambda d, c: "two or three",
+            AnyOf([4]): lambda d, c: "list"
+        })
+
+        assert switch.run(1) == "one"
+        assert switch.run(3) == "two or three"
+        assert switch.run([4]) == "list"
+        assert switch.run([5]) == [5]
+
+    @pytest.mark.happy
+    def test_compound_case(self):
+        switch = Switch(lambda d, c: d > 0, {True: Pipeline([Increment()], "Positive")})
+
+        assert switch.run(1) == 2
+        assert switch.manifest.steps[0].name == "Positive"
+        assert [m.name for m in switch.manifest.steps[0].steps] == ["Increment"]
+
+    @pytest.mark.happy
+    def test_assign_cases(self):
+        switch = Switch(lambda d, c: d, {1: Increment()})
+        switch.run(1)
+
+        switch.cases = {1: lambda d, c: 0}
+
+        assert switch.table is None
+        assert switch.run(1) == 0
+
+    @pytest.mark.happy
+    def test_change_cases(self):
+        switch = Switch(lambda d, c: d, {1: Increment()})
+        switch.run(1)
+
+        switch.cases[2] = lambda d, c: 0
+
+        assert switch.table is None
+        assert switch.run(2) == 0
+
+        del switch.cases[1]
+        switch.cases.update({3: lambda d, c: 3})
+
+        assert switch.table is None
+        assert switch.run(1) == 1
+        assert switch.run(3) == 3
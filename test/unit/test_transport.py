@@ -0,0 +1,84 @@
+import mmap
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from pipelayer import InProcess, transport
+from pipelayer.transport import HAS_SHARED_MEMORY, SharedMemoryTransport
+
+
+class Buffer:
+    """
+    Pickles its memory out-of-band, and wraps the buffer it's unpickled from without copying it.
+    """
+
+    def __init__(self, memory):
+        self.memory = memoryview(memory)
+
+    def __reduce_ex__(self, protocol):
+        return Buffer, (pickle.PickleBuffer(self.memory),)
+
+
+def reverse(data, context):
+    return pickle.PickleBuffer(bytearray(reversed(data)))
+
+
+def get_shared_memory():
+    return {name for name in os.listdir("/dev/shm") if name.startswith("psm_")}
+
+
+@pytest.mark.unit
+@pytest.mark.skipif(not HAS_SHARED_MEMORY, reason="Shared memory requires Python 3.8")
+class TestSharedMemoryTransport:
+
+    @pytest.mark.happy
+    def test_pack(self):
+        transport = SharedMemoryTransport(min_size=1024)
+        large, small = pickle.PickleBuffer(b"x" * 4096), pickle.PickleBuffer(b"y" * 16)
+
+        payload = transport.pack({"large": large, "small": small, "bytes": b"z" * 4096})
+        data, blocks = transport.unpack(payload)
+
+        assert [size for _, size in payload.blocks] == [4096]
+        assert bytes(data["large"]) == b"x" * 4096 and bytes(data["small"]) == b"y" * 16
+        assert data["bytes"] == b"z" * 4096
+        del data
+        blocks.release()
+
+    @pytest.mark.happy
+    def test_unpack_without_copying(self):
+        transport = SharedMemoryTransport(min_size=1024)
+        before = get_shared_memory()
+
+        buffer, blocks = transport.unpack(transport.pack(Buffer(bytearray(4096))))
+
+        assert isinstance(buffer.memory.obj, mmap.mmap)
+        assert get_shared_memory() == before
+        blocks.release()
+        assert len(blocks) == 0
+        buffer.memory[0] = 1
+
+    @pytest.mark.happy
+    def test_in_process(self):
+        data = bytearray(range(256)) * 1024
+        before = get_shared_memory()
+
+        with ProcessPoolExecutor(1) as executor:
+            step = InProcess(reverse, executor, transport=SharedMemoryTransport(min_size=1024))
+            assert step.run(pickle.PickleBuffer(data)) == bytearray(reversed(data))
+            assert step.run(bytearray(b"small")) == bytearray(b"llams")
+
+        assert get_shared_memory() == before
+
+    @pytest.mark.sad
+    def test_min_size(self):
+        with pytest.raises(ValueError):
+            SharedMemoryTransport(0)
+
+    @pytest.mark.sad
+    def test_without_shared_memory(self, monkeypatch):
+        monkeypatch.setattr(transport, "HAS_SHARED_MEMORY", False)
+
+        with pytest.raises(RuntimeError):
+            SharedMemoryTransport()
@@ -32,3 +32,64 @@ class TestUtil:
             '      "duration": "P0DT0H0M0.000998S"\n    }\n  ]\n}'
         )
         assert render_manifest(manifest) == should_be
+
+    @pytest.mark.happy
+    @pytest.mark.parametrize("indent", [None, 0, 2, 4])
+    @pytest.mark.parametrize("compact", [False, True])
+    def test_render_manifest_formats(self, manifest, monkeypatch, indent, compact):
+        import json
+        from io import StringIO
+
+        from pipelayer import util
+
+        should_be = json.dumps(
+            json.loads(manifest.json(exclude_none=True)),
+            indent=None if compact else indent,
+            separators=(",", ":") if compact else None
+        )
+        stream = StringIO()
+        util.write_manifest(manifest, stream, indent, compact)
+
+        assert util.render_manifest(manifest, indent, compact) == should_be
+        assert stream.getvalue() == should_be
+
+        monkeypatch.setattr(util, "orjson", None)
+
+        assert util.render_manifest(manifest, indent, compact) == should_be
+
+    @pytest.mark.happy
+    @pytest.mark.parametrize("indent", [None, 2, 4])
+    @pytest.mark.parametrize("compact", [False, True])
+    def test_render_manifest_escapes_non_ascii(self, monkeypatch, indent, compact):
+        import json
+
+        from pipelayer import Pipeline, util
+
+        def step(data, context):
+            return data
+
+        manifest = Pipeline([step], 'Pipé "🚀", \\ : ,').execute(1).manifest
+
+        rendered = util.render_manifest(manifest, indent, compact)
+        monkeypatch.setattr(util, "orjson", None)
+
+        assert rendered == util.render_manifest(manifest, indent, compact)
+        assert '"Pip\\u00e9 \\"\\ud83d\\ude80\\", \\\\ : ,"' in rendered
+        assert json.loads(rendered)["name"] == manifest.name
+
+    @pytest.mark.happy
+    def test_render_pipeline_manifest(self):
+        import json
+
+        from pipelayer import Pipeline, Switch
+        from pipelayer.util import render_manifest
+
+        def is_even(data, context):
+            return data % 2 == 0
+
+        def increment(data, context):
+            return data + 1
+
+        manifest = Pipeline([increment, Switch(is_even, {True: increment})]).execute(1).manifest
+
+        assert render_manifest(manifest) == json.dumps(json.loads(manifest.json(exclude_none=True)), indent=2)